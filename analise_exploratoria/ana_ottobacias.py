@@ -0,0 +1,190 @@
+"""
+Download paginado, paralelo e retomável das Ottobacias da ANA (ArcGIS REST).
+
+Fluxo:
+1) Descobre UMA vez a camada de polígonos do MapServer (metadados + contagem na
+   bbox) e guarda a escolha no manifesto do cache
+2) Divide a consulta em páginas (resultOffset/resultRecordCount, limitadas ao
+   maxRecordCount do serviço) e baixa as páginas em paralelo com uma sessão
+   HTTP compartilhada (pool de conexões + retentativas)
+3) Cada página é gravada em data/ottobacias_ana_paginas/; se o download for
+   interrompido, a próxima execução baixa só as páginas que faltam
+4) As páginas são unidas em data/ottobacias_ana.geojson, que
+   migrar_bacias_ana.find_local_otto_file encontra automaticamente
+
+O endereço do serviço é parâmetro (base_url), então o módulo pode ser exercitado
+contra um servidor HTTP local que imite a API do ArcGIS.
+"""
+import os
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from camada_setores import gravar_atomico
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+PAGINAS_DIR = os.path.join(DATA_DIR, 'ottobacias_ana_paginas')
+SAIDA_GEOJSON = os.path.join(DATA_DIR, 'ottobacias_ana.geojson')
+
+ANA_OTTOBACIAS_URL = 'https://geoservicos.ana.gov.br/arcgis/rest/services/BASES/OTTOBACIAS/MapServer'
+CAMADAS_CANDIDATAS = range(0, 7)
+TIMEOUT = 60
+
+
+def criar_sessao(pool: int = 8, tentativas: int = 3) -> requests.Session:
+    """Sessão HTTP com pool de conexões e retentativas com backoff (5xx/429)."""
+    sessao = requests.Session()
+    retry = Retry(total=tentativas, backoff_factor=1.0,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=retry)
+    sessao.mount('http://', adapter)
+    sessao.mount('https://', adapter)
+    return sessao
+
+
+def _get_json(sessao, url, params=None):
+    r = sessao.get(url, params=params, timeout=TIMEOUT)
+    r.raise_for_status()
+    data = r.json()
+    if isinstance(data, dict) and 'error' in data:
+        raise RuntimeError(f"ArcGIS REST retornou erro em {url}: {data['error']}")
+    return data
+
+
+def _params_consulta(bbox):
+    minx, miny, maxx, maxy = bbox
+    return {
+        'where': '1=1',
+        'geometry': json.dumps({'xmin': minx, 'ymin': miny, 'xmax': maxx, 'ymax': maxy,
+                                'spatialReference': {'wkid': 4326}}),
+        'geometryType': 'esriGeometryEnvelope',
+        'inSR': 4326,
+        'spatialRel': 'esriSpatialRelIntersects',
+    }
+
+
+def descobrir_camada(sessao, bbox, base_url: str = ANA_OTTOBACIAS_URL) -> dict:
+    """Procura a primeira camada de polígonos com feições na bbox.
+
+    Retorna dict com 'camada', 'total', 'max_registros' e 'campo_id'.
+    """
+    ultimo_erro = None
+    for camada in CAMADAS_CANDIDATAS:
+        try:
+            info = _get_json(sessao, f"{base_url}/{camada}", {'f': 'json'})
+            if info.get('geometryType') not in (None, 'esriGeometryPolygon'):
+                continue
+            params = _params_consulta(bbox)
+            params.update({'returnCountOnly': 'true', 'f': 'json'})
+            total = int(_get_json(sessao, f"{base_url}/{camada}/query", params).get('count', 0))
+            if total <= 0:
+                continue
+            return {
+                'camada': camada,
+                'total': total,
+                'max_registros': int(info.get('maxRecordCount') or 1000),
+                'campo_id': info.get('objectIdField') or 'OBJECTID',
+            }
+        except Exception as e:
+            ultimo_erro = e
+            continue
+    raise RuntimeError(f"Nenhuma camada de Ottobacias encontrada em {base_url}: {ultimo_erro}")
+
+
+def _caminho_pagina(offset: int) -> str:
+    return os.path.join(PAGINAS_DIR, f'pagina_{offset:08d}.geojson')
+
+
+def _baixar_pagina(sessao, base_url, camada_info, bbox, offset, tamanho):
+    destino = _caminho_pagina(offset)
+    if os.path.exists(destino):
+        return destino  # retomada: página já baixada
+    params = _params_consulta(bbox)
+    params.update({
+        'outFields': '*',
+        'returnGeometry': 'true',
+        'outSR': 4326,
+        'orderByFields': camada_info['campo_id'],
+        'resultOffset': offset,
+        'resultRecordCount': tamanho,
+        'f': 'geojson',
+    })
+    data = _get_json(sessao, f"{base_url}/{camada_info['camada']}/query", params)
+    if data.get('type') != 'FeatureCollection':
+        raise RuntimeError(f"Resposta inesperada na página offset={offset}")
+    _gravar_geojson(destino, data)
+    return destino
+
+
+def _gravar_geojson(destino, data):
+    def escrever(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    gravar_atomico(destino, escrever)
+
+
+def _carregar_manifesto():
+    path = os.path.join(PAGINAS_DIR, 'manifesto.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+
+def _salvar_manifesto(manifesto):
+    with open(os.path.join(PAGINAS_DIR, 'manifesto.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+
+
+def _limpar_paginas():
+    for nome in os.listdir(PAGINAS_DIR):
+        if nome.startswith('pagina_'):
+            os.remove(os.path.join(PAGINAS_DIR, nome))
+
+
+def baixar_ottobacias(bbox, base_url: str = ANA_OTTOBACIAS_URL, workers: int = 4,
+                      tamanho_pagina: int = None, saida: str = SAIDA_GEOJSON) -> str:
+    """Baixa as Ottobacias que intersectam a bbox e retorna o caminho do GeoJSON final.
+
+    bbox:           (minx, miny, maxx, maxy) em EPSG:4326
+    workers:        downloads simultâneos (uma conexão do pool por worker)
+    tamanho_pagina: registros por página (padrão: maxRecordCount do serviço)
+    """
+    os.makedirs(PAGINAS_DIR, exist_ok=True)
+    bbox = [round(float(v), 6) for v in bbox]
+    sessao = criar_sessao(pool=max(workers, 1))
+    try:
+        manifesto = _carregar_manifesto()
+        if manifesto and manifesto.get('base_url') == base_url and manifesto.get('bbox') == bbox:
+            camada_info = manifesto['camada_info']
+            print(f"   ↻ Retomando download (camada {camada_info['camada']}, {camada_info['total']} feições)")
+        else:
+            _limpar_paginas()
+            camada_info = descobrir_camada(sessao, bbox, base_url)
+            print(f"   ✓ Camada {camada_info['camada']}: {camada_info['total']} feições na bbox de SC")
+
+        tamanho = min(tamanho_pagina or camada_info['max_registros'], camada_info['max_registros'])
+        if manifesto and manifesto.get('tamanho_pagina') not in (None, tamanho):
+            _limpar_paginas()  # offsets antigos não batem com o novo tamanho de página
+        _salvar_manifesto({'base_url': base_url, 'bbox': bbox, 'camada_info': camada_info,
+                           'tamanho_pagina': tamanho})
+
+        offsets = [i * tamanho for i in range(math.ceil(camada_info['total'] / tamanho))]
+        faltando = [o for o in offsets if not os.path.exists(_caminho_pagina(o))]
+        print(f"   📥 {len(faltando)} de {len(offsets)} páginas para baixar ({workers} em paralelo)...")
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            list(pool.map(lambda o: _baixar_pagina(sessao, base_url, camada_info, bbox, o, tamanho), faltando))
+    finally:
+        sessao.close()
+
+    # Junta as páginas na ordem dos offsets (mesma ordem de OBJECTID)
+    features = []
+    for o in offsets:
+        with open(_caminho_pagina(o), encoding='utf-8') as f:
+            features.extend(json.load(f).get('features', []))
+    _gravar_geojson(saida, {'type': 'FeatureCollection', 'features': features})
+    print(f"   ✓ {len(features)} ottobacias salvas em {os.path.relpath(saida, BASE_DIR)}")
+    return saida
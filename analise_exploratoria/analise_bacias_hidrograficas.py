@@ -9,141 +9,43 @@ Inclui:
 import os
 import geopandas as gpd
 import folium
-import pandas as pd
-import requests
-import zipfile
-from io import BytesIO
-
-def download_bacias_sc():
-    """
-    Tenta baixar shapefile de bacias hidrográficas de SC
-    Fontes: ANA (Agência Nacional de Águas) ou SNIRH
-    """
-    print("📥 Tentando baixar dados de bacias hidrográficas...")
-    
-    # URLs possíveis para bacias de SC
-    urls_bacias = [
-        # ANA - Ottobacias nível 5 (sub-bacias)
-        "https://metadados.snirh.gov.br/geonetwork/srv/api/records/e49e4bab-49c2-41d4-9f5f-dokoł3e9e2a3f/attachments/ottobacia_nivel5.zip",
-        # Backup: usar geometria simplificada
-        None
-    ]
-    
-    # Por enquanto, vamos criar bacias sintéticas baseadas nos municípios
-    # até conseguirmos o shapefile oficial
-    print("⚠️ Usando bacias hidrográficas principais de SC (simplificadas)")
-    
-    # Principais bacias de Santa Catarina
-    bacias_sc = {
-        'Bacia do Itajaí': ['Blumenau', 'Itajaí', 'Rio do Sul', 'Brusque', 'Ibirama'],
-        'Bacia do Tubarão': ['Tubarão', 'Criciúma', 'Araranguá', 'Içara'],
-        'Bacia do Uruguai': ['Chapecó', 'Concórdia', 'Joaçaba', 'Xanxerê', 'São Miguel do Oeste'],
-        'Bacia Litorânea Norte': ['Joinville', 'São Francisco do Sul', 'Araquari'],
-        'Bacia Litorânea Central': ['Florianópolis', 'São José', 'Palhoça', 'Biguaçu'],
-        'Bacia do Rio do Peixe': ['Videira', 'Caçador', 'Curitibanos'],
-        'Bacia do Canoas': ['Lages', 'São Joaquim', 'Campos Novos']
-    }
-    
-    return bacias_sc
-
-def fetch_population():
-    """Busca população via API IBGE"""
-    try:
-        url = "https://servicodados.ibge.gov.br/api/v3/agregados/4714/periodos/2022/variaveis/93?localidades=N6[all]"
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        rows = []
-        for item in data[0]['resultados']:
-            for loc in item['series']:
-                codigo = str(loc['localidade']['id']).zfill(7)
-                pop = list(loc['serie'].values())[0] if loc['serie'] else None
-                if pop:
-                    rows.append({'codigo_ibge': codigo, 'populacao': float(pop)})
-        return pd.DataFrame(rows)
-    except Exception as e:
-        print(f"⚠️ Erro ao buscar população: {e}")
-        return None
-
-def calcular_risco_contaminacao(row):
-    """
-    Calcula nível de risco de contaminação baseado em:
-    - Volume de resíduos
-    - Proximidade com corpos d'água (simulado)
-    - População
-    """
-    domestico = row.get('domestico_t_ano', 0)
-    pop = row.get('populacao', 0)
-    
-    # Índice de risco simplificado
-    if domestico > 200000:  # >200k ton/ano
-        risco = 'CRÍTICO'
-        cor = '#d32f2f'
-    elif domestico > 100000:  # 100-200k
-        risco = 'ALTO'
-        cor = '#f57c00'
-    elif domestico > 50000:   # 50-100k
-        risco = 'MÉDIO'
-        cor = '#fbc02d'
-    else:
-        risco = 'BAIXO'
-        cor = '#388e3c'
-    
-    return risco, cor
+from camada_setores import carregar_municipios
+from dissolucao import dissolver, workers_padrao
+from ibge_populacao import buscar_populacao
+from bacias import BACIAS_SC
+from atributos import tabela_municipios, resumo_por_bacia, salvar_tabelas_bacias, MAPA_BACIAS_MUNICIPIOS
+from atributos_mapa import embutir_atributos
+from quantizacao import quantizar_gdf
+from popups import COLUNAS_BACIA, POPUP_BACIA, POPUP_BACIA_SEM_DADOS, com_per_capita
 
 print("="*70)
 print("🌊 ANÁLISE DE RESÍDUOS POR BACIAS HIDROGRÁFICAS")
 print("="*70)
 
-print("\n1️⃣ Carregando dados dos setores censitários...")
-gdf = gpd.read_file(r'SC_setores_CD2022.gpkg')
-print(f"   ✓ {len(gdf):,} setores carregados")
+print("\n1️⃣ Carregando polígonos municipais...")
+# Polígonos COMPLETOS de cada município (dissolve dos setores, reaproveitado do cache)
+# Para rodadas grandes, DISSOLVE_WORKERS=N paraleliza os dissolves em N processos
+print(f"   🔄 Setores dissolvidos por município ({workers_padrao()} processo(s))...")
+muni_gdf = carregar_municipios()
+print(f"   ✓ {len(muni_gdf):,} municípios carregados")
 
 print("\n2️⃣ Obtendo informações de bacias hidrográficas...")
-bacias_dict = download_bacias_sc()
-print(f"   ✓ {len(bacias_dict)} bacias principais identificadas")
+# Principais bacias de Santa Catarina (simplificadas, tabela única em bacias.py)
+print(f"   ✓ {len(BACIAS_SC)} bacias principais identificadas")
 
 print("\n3️⃣ Buscando dados populacionais...")
-pop_df = fetch_population()
+pop_df = buscar_populacao(uf='42')
 
 if pop_df is not None:
     print(f"   ✓ População de {len(pop_df)} municípios obtida")
     
-    # Calcular estimativas
-    pop_df['domestico_t_ano'] = pop_df['populacao'] * 0.95 * 365 / 1000
-    pop_df['reciclavel_t_ano'] = pop_df['domestico_t_ano'] * 0.10
-    
-    print("\n4️⃣ Agregando por município...")
-    gdf['CD_MUN_str'] = gdf['CD_MUN'].astype(str).str.zfill(7)
-    
-    # Dissolver TODOS os setores de cada município para criar polígonos COMPLETOS
-    print("   🔄 Dissolvendo setores censitários por município...")
-    muni_gdf = gdf.dissolve(by='CD_MUN_str', aggfunc='first').reset_index()
-    muni_gdf = gpd.GeoDataFrame(muni_gdf, geometry='geometry', crs=gdf.crs)
-    muni_gdf = muni_gdf.merge(pop_df, left_on='CD_MUN_str', right_on='codigo_ibge', how='left')
-    
-    print("\n5️⃣ Classificando municípios por bacia hidrográfica...")
-    # Criar coluna de bacia baseada no nome do município
-    def atribuir_bacia(nome_mun):
-        for bacia, municipios in bacias_dict.items():
-            for mun in municipios:
-                if mun.lower() in nome_mun.lower():
-                    return bacia
-        return 'Outras Bacias'
-    
-    muni_gdf['bacia'] = muni_gdf['NM_MUN'].apply(atribuir_bacia)
-    
-    print("\n6️⃣ Calculando níveis de risco de contaminação...")
-    muni_gdf[['risco', 'cor_risco']] = muni_gdf.apply(
-        lambda row: pd.Series(calcular_risco_contaminacao(row)), axis=1
-    )
+    print("\n4️⃣ Classificando municípios por bacia hidrográfica...")
+    print("\n5️⃣ Calculando níveis de risco de contaminação...")
+    # Estimativas, bacia e risco vêm de atributos.py (mesmo cálculo do caminho rápido do pipeline)
+    muni_gdf = tabela_municipios(muni_gdf, pop_df)
     
     # Agregar por bacia
-    bacias_agg = muni_gdf.groupby('bacia').agg({
-        'populacao': 'sum',
-        'domestico_t_ano': 'sum',
-        'reciclavel_t_ano': 'sum'
-    }).reset_index().sort_values('domestico_t_ano', ascending=False)
+    bacias_agg = resumo_por_bacia(muni_gdf)
     
     print(f"\n📊 RESUMO POR BACIA HIDROGRÁFICA:")
     print("-" * 80)
@@ -160,11 +62,11 @@ if pop_df is not None:
             print(f"{'🔴' if nivel=='CRÍTICO' else '🟠' if nivel=='ALTO' else '🟡' if nivel=='MÉDIO' else '🟢'} "
                   f"{nivel}: {count} municípios")
     
-    print("\n7️⃣ Criando mapa interativo com POLÍGONOS DAS BACIAS...")
+    print("\n6️⃣ Criando mapa interativo com POLÍGONOS DAS BACIAS...")
     
     # Dissolver os municípios por bacia para criar os polígonos das bacias
     print("   📐 Criando geometrias das bacias hidrográficas...")
-    bacias_geom = muni_gdf.dissolve(by='bacia', aggfunc='sum').reset_index()
+    bacias_geom = dissolver(muni_gdf[['bacia', 'geometry']], by='bacia').reset_index()
     bacias_geom = bacias_geom.to_crs(epsg=4326)
     
     # Juntar com as estatísticas agregadas
@@ -200,61 +102,33 @@ if pop_df is not None:
         'Outras Bacias': '#757575'
     }
     
-    # Adicionar POLÍGONOS das bacias coloridos
+    # Adicionar POLÍGONOS das bacias coloridos: as feições levam só 'bacia' e 'cor';
+    # os números vão no bloco de atributos e o popup sai de um template (popups.py)
     print("   🎨 Adicionando polígonos coloridos das bacias...")
-    for _, bacia_row in bacias_geom.iterrows():
-        cor = cores_bacias.get(bacia_row['bacia'], '#999999')
-        
-        popup_html = f"""
-        <div style="font-family: Arial; font-size: 14px; min-width: 300px;">
-            <h3 style="margin: 0 0 12px 0; padding-bottom: 8px; border-bottom: 3px solid {cor}; color: {cor};">
-                🌊 {bacia_row['bacia']}
-            </h3>
-            <div style="background: #e3f2fd; padding: 10px; margin: 8px 0; border-left: 5px solid #1976d2; border-radius: 4px;">
-                <strong>👥 População Total:</strong><br>
-                <span style="font-size: 18px; font-weight: bold; color: #1976d2;">
-                    {bacia_row['populacao']:,.0f} habitantes
-                </span>
-            </div>
-            <div style="background: #e8f5e9; padding: 10px; margin: 8px 0; border-left: 5px solid #388e3c; border-radius: 4px;">
-                <strong>🗑️ Resíduos Domésticos:</strong><br>
-                <span style="font-size: 18px; font-weight: bold; color: #388e3c;">
-                    {bacia_row['domestico_t_ano']:,.0f} t/ano
-                </span>
-            </div>
-            <div style="background: #fff3e0; padding: 10px; margin: 8px 0; border-left: 5px solid #f57c00; border-radius: 4px;">
-                <strong>♻️ Resíduos Recicláveis:</strong><br>
-                <span style="font-size: 18px; font-weight: bold; color: #f57c00;">
-                    {bacia_row['reciclavel_t_ano']:,.0f} t/ano
-                </span>
-            </div>
-            <div style="background: #f3e5f5; padding: 10px; margin: 8px 0; border-left: 5px solid {cor}; border-radius: 4px;">
-                <strong>� Per Capita:</strong><br>
-                <span style="font-size: 16px; font-weight: bold; color: {cor};">
-                    {(bacia_row['domestico_t_ano'] / bacia_row['populacao'] * 1000):.1f} kg/hab/ano
-                </span>
-            </div>
-        </div>
-        """
-        
-        folium.GeoJson(
-            bacia_row['geometry'],
-            style_function=lambda x, cor=cor: {
-                'fillColor': cor,
-                'color': '#ffffff',  # Borda branca para contraste
-                'weight': 4,  # Borda mais grossa
-                'fillOpacity': 0.6,  # Mais opaco para melhor visibilidade
-                'opacity': 1.0,  # Borda totalmente visível
-                'dashArray': None
-            },
-            highlight_function=lambda x: {
-                'weight': 6,
-                'fillOpacity': 0.8,
-                'color': '#ffff00'  # Borda amarela no hover
-            },
-            popup=folium.Popup(popup_html, max_width=400),
-            tooltip=folium.Tooltip(f"<b style='font-size: 14px;'>{bacia_row['bacia']}</b>", permanent=False)
-        ).add_to(m)
+    # (coordenadas na grade de quantizacao.py em vez de float64 completo)
+    colecao = quantizar_gdf(gpd.GeoDataFrame(
+        {'bacia': bacias_geom['bacia'], 'cor': bacias_geom['bacia'].map(cores_bacias).fillna('#999999')},
+        geometry=bacias_geom.geometry, crs=bacias_geom.crs
+    ))
+    gj_bacias = folium.GeoJson(
+        colecao.to_json(drop_id=True),
+        style_function=lambda f: {
+            'fillColor': f['properties']['cor'],
+            'color': '#ffffff',  # Borda branca para contraste
+            'weight': 4,  # Borda mais grossa
+            'fillOpacity': 0.6,  # Mais opaco para melhor visibilidade
+            'opacity': 1.0,  # Borda totalmente visível
+            'dashArray': None
+        },
+        highlight_function=lambda x: {
+            'weight': 6,
+            'fillOpacity': 0.8,
+            'color': '#ffff00'  # Borda amarela no hover
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['bacia'], labels=False, style='font-size: 14px; font-weight: bold;')
+    ).add_to(m)
+    embutir_atributos(m, 'bacias', [gj_bacias], com_per_capita(bacias_agg), 'bacia', COLUNAS_BACIA,
+                      POPUP_BACIA, POPUP_BACIA_SEM_DADOS)
     
     # Legenda personalizada para as bacias
     print("   📋 Adicionando legenda...")
@@ -285,22 +159,17 @@ if pop_df is not None:
     '''
     m.get_root().html.add_child(folium.Element(legend_html))
     
-    output_path = r'outputs\mapa_bacias_hidrograficas.html'
+    # Mapa próprio: outputs/mapa_bacias_hidrograficas.html é o de migrar_bacias_ana.py (Ottobacias da ANA)
+    output_path = MAPA_BACIAS_MUNICIPIOS
     m.save(output_path)
     
     file_size = os.path.getsize(output_path) / (1024 * 1024)
     print(f"\n✅ Mapa de BACIAS HIDROGRÁFICAS criado!")
     print(f"💾 Tamanho: {file_size:.2f} MB")
-    print(f"📁 Salvo em: {output_path}")
+    print(f"📁 Salvo em: {os.path.relpath(output_path)}")
     
     # Salvar CSVs
-    csv_bacias = r'outputs\resumo_por_bacia.csv'
-    bacias_agg.to_csv(csv_bacias, index=False, encoding='utf-8-sig')
-    
-    csv_risco = r'outputs\analise_risco_municipios.csv'
-    muni_gdf[['NM_MUN', 'bacia', 'populacao', 'domestico_t_ano', 'reciclavel_t_ano', 'risco']].to_csv(
-        csv_risco, index=False, encoding='utf-8-sig'
-    )
+    csv_bacias, csv_risco = salvar_tabelas_bacias(muni_gdf, bacias_agg)
     
     print(f"📊 Resumo por bacia salvo em: {csv_bacias}")
     print(f"⚠️ Análise de risco salva em: {csv_risco}")
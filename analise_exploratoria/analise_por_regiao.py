@@ -5,35 +5,21 @@ Versão leve para GitHub Pages
 import os
 import geopandas as gpd
 import folium
-from folium.plugins import HeatMap
-import pandas as pd
-import requests
-
-def fetch_population():
-    """Busca população via API IBGE"""
-    try:
-        url = "https://servicodados.ibge.gov.br/api/v3/agregados/4714/periodos/2022/variaveis/93?localidades=N6[all]"
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        rows = []
-        for item in data[0]['resultados']:
-            for loc in item['series']:
-                codigo = str(loc['localidade']['id']).zfill(7)
-                pop = list(loc['serie'].values())[0] if loc['serie'] else None
-                if pop:
-                    rows.append({'codigo_ibge': codigo, 'populacao': float(pop)})
-        return pd.DataFrame(rows)
-    except Exception as e:
-        print(f"Erro ao buscar população: {e}")
-        return None
+from camada_setores import carregar_setores
+from ibge_populacao import buscar_populacao
+from parametros import adicionar_estimativas
+from pontos_mapa import colecao_pontos, adicionar_pontos
+from popups import POPUP_MUNICIPIO_REGIAO
+from tiles_setores import estimativas_setores
+from calor_kde import (gerar_calor, adicionar_calor, centroides_ponderados,
+                       GRADIENTE_DOMESTICO, GRADIENTE_RECICLAVEL)
 
 print("="*60)
 print("📊 ANÁLISE DE RESÍDUOS POR MACRO-REGIÃO")
 print("="*60)
 
 print("\n1️⃣ Carregando dados dos setores censitários...")
-gdf = gpd.read_file(r'SC_setores_CD2022.gpkg')
+gdf = carregar_setores(['CD_MUN', 'NM_MUN', 'CD_RGI', 'NM_RGI', 'geometry'])
 print(f"   ✓ {len(gdf):,} setores carregados")
 
 print("\n2️⃣ Identificando Regiões Geográficas Imediatas (RGI)...")
@@ -43,14 +29,13 @@ for _, row in regioes.iterrows():
     print(f"      • {row['NM_RGI']}")
 
 print("\n3️⃣ Buscando dados populacionais (API IBGE)...")
-pop_df = fetch_population()
+pop_df = buscar_populacao(uf='42')
 
 if pop_df is not None:
     print(f"   ✓ População de {len(pop_df)} municípios obtida")
     
     # Calcular estimativas de resíduos
-    pop_df['domestico_t_ano'] = pop_df['populacao'] * 0.95 * 365 / 1000
-    pop_df['reciclavel_t_ano'] = pop_df['domestico_t_ano'] * 0.10
+    adicionar_estimativas(pop_df)
     
     print("\n4️⃣ Agregando dados por município...")
     gdf['CD_MUN_str'] = gdf['CD_MUN'].astype(str).str.zfill(7)
@@ -97,58 +82,30 @@ if pop_df is not None:
     for i, (_, regiao) in enumerate(regioes.iterrows()):
         cores_regioes[regiao['CD_RGI']] = cores_disponiveis[i % len(cores_disponiveis)]
     
-    # Adicionar municípios com cores por região
-    for _, row in muni_wgs.iterrows():
-        if pd.notna(row.get('domestico_t_ano')):
-            cor_regiao = cores_regioes.get(row['CD_RGI'], '#999999')
-            centroid = row['geometry'].centroid
-            
-            popup_html = f"""
-            <div style="font-family: Arial; font-size: 13px; min-width: 250px;">
-                <h4 style="margin: 0 0 10px 0; padding-bottom: 5px; border-bottom: 2px solid {cor_regiao};">
-                    📍 {row.get('NM_MUN', 'N/A')}
-                </h4>
-                <div style="background: #f0f0f0; padding: 8px; margin: 5px 0; border-radius: 4px;">
-                    <strong style="color: {cor_regiao};">🗺️ Região:</strong> {row.get('NM_RGI', 'N/A')}
-                </div>
-                <div style="background: #e3f2fd; padding: 6px; margin: 3px 0; border-left: 3px solid #034e7b;">
-                    <strong>🔵 Doméstico:</strong> {row.get('domestico_t_ano', 0):,.0f} t/ano
-                </div>
-                <div style="background: #fff3e0; padding: 6px; margin: 3px 0; border-left: 3px solid #e65100;">
-                    <strong>🟡 Reciclável:</strong> {row.get('reciclavel_t_ano', 0):,.0f} t/ano
-                </div>
-                <div style="background: #f5f5f5; padding: 6px; margin: 3px 0; border-radius: 4px;">
-                    <strong>👥 População:</strong> {row.get('populacao', 0):,.0f} hab
-                </div>
-            </div>
-            """
-            
-            folium.CircleMarker(
-                location=[centroid.y, centroid.x],
-                radius=4,
-                color=cor_regiao,
-                fill=True,
-                fillColor=cor_regiao,
-                fillOpacity=0.7,
-                weight=2,
-                popup=folium.Popup(popup_html, max_width=350)
-            ).add_to(m)
-    
-    # Heatmap doméstico
-    centroids = muni_wgs.copy()
-    centroids['centroid'] = centroids.geometry.centroid
-    heat_dom = [[pt.y, pt.x, wt] for pt, wt in zip(centroids['centroid'], centroids['domestico_t_ano']) 
-                if pd.notna(wt) and wt > 0]
-    if heat_dom:
-        HeatMap(heat_dom, name='🔵 Resíduos Domésticos (Heatmap)', radius=25, blur=30, 
-                gradient={0.0: '#d0d1e6', 0.5: '#74a9cf', 1.0: '#034e7b'}).add_to(m)
-    
-    # Heatmap reciclável
-    heat_rec = [[pt.y, pt.x, wt] for pt, wt in zip(centroids['centroid'], centroids['reciclavel_t_ano']) 
-                if pd.notna(wt) and wt > 0]
-    if heat_rec:
-        HeatMap(heat_rec, name='🟡 Resíduos Recicláveis (Heatmap)', radius=25, blur=30,
-                gradient={0.0: '#ffffcc', 0.5: '#feb24c', 1.0: '#e31a1c'}).add_to(m)
+    # Adicionar municípios com cores por região: a cor vai como propriedade de
+    # cada ponto e o popup sai de um template único (popups.py)
+    com_dados = muni_wgs[muni_wgs['domestico_t_ano'].notna()].copy()
+    com_dados['cor'] = com_dados['CD_RGI'].map(cores_regioes).fillna('#999999')
+    colecao = colecao_pontos(com_dados, ['NM_MUN', 'NM_RGI', 'cor', 'domestico_t_ano',
+                                         'reciclavel_t_ano', 'populacao'])
+    adicionar_pontos(m, 'municipios', colecao, [
+        {'grupo': m, 'campo': 'domestico_t_ano', 'raio': (4, 4), 'campo_cor': 'cor',
+         'estilo': {'fill': True, 'fillOpacity': 0.7, 'weight': 2}},
+    ], popup=POPUP_MUNICIPIO_REGIAO, max_width=350)
+    
+    output_path = os.path.join('outputs', 'mapa_regioes.html')
+    
+    # Calor por setor censitário (KDE pré-calculado em imagens por faixa de zoom,
+    # calor_kde.py) em vez do HeatMap com um ponto por município
+    setores = gdf.to_crs(3857)
+    est_setores = estimativas_setores(setores, pop_df)
+    for coluna, nome, rotulo, gradiente in [
+        ('domestico_t_ano', 'calor_domestico', '🔵 Resíduos Domésticos (calor)', GRADIENTE_DOMESTICO),
+        ('reciclavel_t_ano', 'calor_reciclavel', '🟡 Resíduos Recicláveis (calor)', GRADIENTE_RECICLAVEL),
+    ]:
+        x, y, pesos = centroides_ponderados(setores, est_setores[coluna])
+        if len(pesos):
+            adicionar_calor(m, output_path, nome, rotulo, gerar_calor(x, y, pesos), gradiente)
     
     # Legenda
     legenda_regioes = "<br>".join([f'<span style="color: {cores_regioes[cd]};">●</span> {nm}' 
@@ -180,7 +137,6 @@ if pop_df is not None:
     
     folium.LayerControl(position='topleft').add_to(m)
     
-    output_path = r'outputs\mapa_regioes.html'
     m.save(output_path)
     
     file_size = os.path.getsize(output_path) / (1024 * 1024)
@@ -189,7 +145,7 @@ if pop_df is not None:
     print(f"📁 Salvo em: {output_path}")
     
     # Salvar CSV com dados agregados por região
-    csv_path = r'outputs\resumo_por_regiao.csv'
+    csv_path = os.path.join('outputs', 'resumo_por_regiao.csv')
     regioes_agg.to_csv(csv_path, index=False, encoding='utf-8-sig')
     print(f"📊 Resumo CSV salvo em: {csv_path}")
     
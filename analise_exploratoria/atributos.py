@@ -0,0 +1,81 @@
+"""
+Tabelas de atributos por município e por bacia (sem geometrias).
+
+Concentra o que depende só de parâmetros (coeficientes de parametros.py,
+limiares de config/risco.json): estimativas de resíduos, bacia e risco de cada
+município e o resumo por bacia. É usado pelo script completo
+(analise_bacias_hidrograficas.py) e pelo caminho rápido do pipeline: quando só
+os parâmetros mudam, `python atributos.py` regrava os CSVs a partir dos
+atributos municipais em cache (camada_setores.carregar_atributos_municipios),
+sem carregar setores, dissolver ou gerar mapas, e troca só o bloco de
+atributos do mapa de bacias por municípios já gerado (atributos_mapa.atualizar_html).
+"""
+import os
+import pandas as pd
+from parametros import adicionar_estimativas
+from bacias import classificar_bacias
+from risco import classificar_risco
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUTS_DIR = os.path.join(BASE_DIR, 'outputs')
+RESUMO_BACIA_CSV = os.path.join(OUTPUTS_DIR, 'resumo_por_bacia.csv')
+RISCO_MUNICIPIOS_CSV = os.path.join(OUTPUTS_DIR, 'analise_risco_municipios.csv')
+# Mapa de analise_bacias_hidrograficas.py (bacias = municípios dissolvidos); o
+# mapa publicado mapa_bacias_hidrograficas.html é o de migrar_bacias_ana.py
+MAPA_BACIAS_MUNICIPIOS = os.path.join(OUTPUTS_DIR, 'mapa_bacias_municipios.html')
+
+COLUNAS_RISCO_CSV = ['NM_MUN', 'NM_RGI', 'bacia', 'populacao', 'domestico_t_ano', 'reciclavel_t_ano', 'risco']
+
+
+def tabela_municipios(muni: pd.DataFrame, pop_df: pd.DataFrame) -> pd.DataFrame:
+    """Junta população aos municípios e calcula resíduos, bacia e risco (colunas inteiras).
+
+    muni pode ser o GeoDataFrame de carregar_municipios ou só os atributos.
+    """
+    muni = muni.merge(pop_df[['codigo_ibge', 'municipio', 'populacao']],
+                      left_on='CD_MUN_str', right_on='codigo_ibge', how='left')
+    adicionar_estimativas(muni)
+    # Tabela de consulta (código IBGE / nome exato) aplicada de uma vez à coluna
+    muni['bacia'] = classificar_bacias(muni['NM_MUN'], muni['CD_MUN_str'])
+    # Limiares em config/risco.json (indicador padrão: domestico_t_ano)
+    muni['risco'], muni['cor_risco'] = classificar_risco(muni)
+    return muni
+
+
+def resumo_por_bacia(muni: pd.DataFrame) -> pd.DataFrame:
+    return muni.groupby('bacia').agg({
+        'populacao': 'sum',
+        'domestico_t_ano': 'sum',
+        'reciclavel_t_ano': 'sum'
+    }).reset_index().sort_values('domestico_t_ano', ascending=False)
+
+
+def salvar_tabelas_bacias(muni: pd.DataFrame, bacias_agg: pd.DataFrame):
+    """Grava resumo_por_bacia.csv e analise_risco_municipios.csv; retorna os caminhos."""
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
+    bacias_agg.to_csv(RESUMO_BACIA_CSV, index=False, encoding='utf-8-sig')
+    muni[[c for c in COLUNAS_RISCO_CSV if c in muni.columns]].to_csv(
+        RISCO_MUNICIPIOS_CSV, index=False, encoding='utf-8-sig'
+    )
+    return RESUMO_BACIA_CSV, RISCO_MUNICIPIOS_CSV
+
+
+if __name__ == '__main__':
+    from camada_setores import carregar_atributos_municipios
+    from ibge_populacao import buscar_populacao
+    from atributos_mapa import atualizar_html
+    from popups import COLUNAS_BACIA, com_per_capita
+
+    print("🔢 Recalculando tabelas de atributos (sem geometrias)...")
+    pop_df = buscar_populacao(uf='42')
+    if pop_df is None:
+        raise SystemExit("❌ Erro ao obter dados de população")
+    muni = tabela_municipios(carregar_atributos_municipios(), pop_df)
+    resumo = resumo_por_bacia(muni)
+    for path in salvar_tabelas_bacias(muni, resumo):
+        print(f"   ✓ {os.path.relpath(path, BASE_DIR)}")
+    if not (os.path.exists(MAPA_BACIAS_MUNICIPIOS)
+            and atualizar_html(MAPA_BACIAS_MUNICIPIOS, 'bacias', com_per_capita(resumo), 'bacia', COLUNAS_BACIA)):
+        raise SystemExit(f"❌ {os.path.relpath(MAPA_BACIAS_MUNICIPIOS, BASE_DIR)} sem bloco de atributos: "
+                         "rode analise_bacias_hidrograficas.py")
+    print(f"   ✓ {os.path.relpath(MAPA_BACIAS_MUNICIPIOS, BASE_DIR)} (atributos)")
@@ -0,0 +1,115 @@
+"""
+Atributos dos mapas separados das geometrias.
+
+Os mapas Folium levam as geometrias só com a chave de cada feição (ex.: 'bacia')
+e os valores numéricos (população, resíduos...) num bloco JSON à parte:
+
+    <script type="application/json" data-atributos="bacias">{...}</script>
+
+Um pequeno script no próprio HTML junta os registros às feições das camadas
+indicadas pela chave e monta os popups a partir de um template com marcadores {campo} / {campo:n0}
+(número com separador de milhar e 0 casas; ver popups.py).
+
+Quando só os parâmetros mudam (coeficientes, limiares), basta regravar esse
+bloco no HTML existente com atualizar_html(), sem recarregar setores nem
+reserializar as geometrias.
+"""
+import os
+import re
+import json
+import folium
+import pandas as pd
+from popups import adicionar_template_js
+
+_JS_RUNTIME = """
+<script>
+(function() {
+    var render = window.renderTemplate;
+    var blocos = {};
+    function vincular(cfg, camada) {
+        camada.eachLayer(function(l) {
+            if (!l.feature || !l.feature.properties) return;
+            var p = l.feature.properties;
+            if (!(cfg.chave in p)) return;
+            var reg = cfg.registros[p[cfg.chave]];
+            if (reg) Object.assign(p, reg);
+            var tpl = reg ? cfg.popup : (cfg.popup_sem_dados || cfg.popup);
+            l.bindPopup(render(tpl, p), {maxWidth: cfg.max_width || 400});
+        });
+    }
+    // Cada bloco vale só para as camadas que ele marcou (camada._atributos = nome);
+    // chamado também por camadas que trocam de geometria depois (piramide.py)
+    window.aplicarAtributos = function(camada) {
+        var cfg = blocos[camada._atributos];
+        if (cfg) vincular(cfg, camada);
+    };
+    window.addEventListener('load', function() {
+        document.querySelectorAll('script[data-atributos]').forEach(function(el) {
+            var nome = el.getAttribute('data-atributos');
+            var cfg = blocos[nome] = JSON.parse(el.textContent);
+            (cfg.camadas || []).forEach(function(v) {
+                var camada = window[v];
+                if (!camada) return;
+                camada._atributos = nome;
+                vincular(cfg, camada);
+            });
+        });
+    });
+})();
+</script>
+"""
+
+_PADRAO_BLOCO = r'(<script type="application/json" data-atributos="{nome}">)(.*?)(</script>)'
+
+
+def registros(df: pd.DataFrame, chave: str, colunas) -> dict:
+    """{valor da chave: {coluna: valor}} com NaN convertido para null."""
+    dados = df.set_index(chave)[list(colunas)]
+    dados = dados.astype(object).where(dados.notna(), None)
+    return {str(k): v for k, v in dados.to_dict(orient='index').items()}
+
+
+def json_html(obj) -> str:
+    # '</' dentro de <script> encerraria o bloco antes da hora
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def embutir_atributos(m: folium.Map, nome: str, camadas, df: pd.DataFrame, chave: str, colunas,
+                      popup: str, popup_sem_dados: str = None, max_width: int = 400):
+    """Adiciona ao mapa o bloco de atributos 'nome' e o script que monta os popups.
+
+    camadas: camadas folium.GeoJson cujas feições recebem os popups deste bloco
+    (as demais camadas do mapa não são tocadas). As feições precisam ter
+    properties[chave] (ex.: GeoJSON Feature com {'bacia': ...}); feições sem a
+    chave ficam sem popup e as demais propriedades ficam disponíveis no template.
+    """
+    cfg = {'chave': chave, 'registros': registros(df, chave, colunas), 'popup': popup,
+           'popup_sem_dados': popup_sem_dados, 'max_width': max_width,
+           'camadas': [c.get_name() for c in camadas]}
+    bloco = f'<script type="application/json" data-atributos="{nome}">{json_html(cfg)}</script>'
+    m.get_root().html.add_child(folium.Element(bloco))
+    if not getattr(m, '_runtime_atributos', False):
+        adicionar_template_js(m)
+        m.get_root().html.add_child(folium.Element(_JS_RUNTIME % {'mapa': m.get_name()}))
+        m._runtime_atributos = True
+
+
+def atualizar_html(path: str, nome: str, df: pd.DataFrame, chave: str, colunas) -> bool:
+    """Troca os registros do bloco 'nome' num HTML já gerado (template e geometrias intactos).
+
+    Retorna False se o HTML não tiver o bloco (mapa gerado por versão antiga).
+    """
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    padrao = re.compile(_PADRAO_BLOCO.format(nome=re.escape(nome)), re.DOTALL)
+    achado = padrao.search(html)
+    if achado is None:
+        return False
+    cfg = json.loads(achado.group(2))
+    cfg['registros'] = registros(df, chave, colunas)
+    html = html[:achado.start(2)] + json_html(cfg) + html[achado.end(2):]
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(tmp, path)
+    return True
@@ -2,10 +2,16 @@
 Script rápido para atualizar apenas o mapa com limites de zoom
 Usa os dados já processados anteriormente
 """
-import geopandas as gpd
 import folium
 import pandas as pd
 import os
+from camada_setores import carregar_municipios
+from dissolucao import dissolver
+from bacias import classificar_bacias
+from piramide import gerar_piramide, salvar_niveis, adicionar_piramide
+from camadas_externas import modo_externo, COLECAO_VAZIA
+from atributos_mapa import embutir_atributos
+from popups import COLUNAS_BACIA, POPUP_BACIA, POPUP_BACIA_SEM_DADOS, com_per_capita
 
 print("🗺️  Atualizando mapa com limites de zoom...")
 
@@ -13,44 +19,47 @@ print("🗺️  Atualizando mapa com limites de zoom...")
 print("📊 Carregando dados processados...")
 bacias_csv = pd.read_csv('outputs/resumo_por_bacia.csv')
 
-# Carregar GeoPackage completo
-print("📦 Carregando geometrias...")
-gdf = gpd.read_file('outputs/sectors_with_waste_estimates.gpkg')
+# Polígonos municipais já dissolvidos (cache derivado de SC_setores_CD2022.gpkg)
+print("📦 Carregando geometrias municipais...")
+muni_gdf = carregar_municipios()
 
 # Dissolver por bacia
 print("🔄 Criando geometrias das bacias...")
-muni_gdf = gdf.dissolve(by='CD_MUN', aggfunc='first').reset_index()
 
 # Garantir coluna 'bacia' (fallback por nome do município)
 if 'bacia' not in muni_gdf.columns:
     print("🧭 Coluna 'bacia' não encontrada nos dados. Atribuindo por nome do município...")
-    bacias_sc = {
-        'Bacia do Itajaí': ['Blumenau', 'Itajaí', 'Rio do Sul', 'Brusque', 'Ibirama'],
-        'Bacia do Tubarão': ['Tubarão', 'Criciúma', 'Araranguá', 'Içara'],
-        'Bacia do Uruguai': ['Chapecó', 'Concórdia', 'Joaçaba', 'Xanxerê', 'São Miguel do Oeste'],
-        'Bacia Litorânea Norte': ['Joinville', 'São Francisco do Sul', 'Araquari'],
-        'Bacia Litorânea Central': ['Florianópolis', 'São José', 'Palhoça', 'Biguaçu'],
-        'Bacia do Rio do Peixe': ['Videira', 'Caçador', 'Curitibanos'],
-        'Bacia do Canoas': ['Lages', 'São Joaquim', 'Campos Novos']
-    }
-
-    def atribuir_bacia(nome_mun: str) -> str:
-        if not isinstance(nome_mun, str):
-            return 'Outras Bacias'
-        for bacia, municipios in bacias_sc.items():
-            for mun in municipios:
-                if mun.lower() in nome_mun.lower():
-                    return bacia
-        return 'Outras Bacias'
-
     col_nome = 'NM_MUN' if 'NM_MUN' in muni_gdf.columns else None
     if col_nome is None:
         raise KeyError("Não foi possível atribuir 'bacia': coluna 'NM_MUN' não encontrada no GeoPackage.")
-    muni_gdf['bacia'] = muni_gdf[col_nome].apply(atribuir_bacia)
+    muni_gdf['bacia'] = classificar_bacias(muni_gdf[col_nome], muni_gdf['CD_MUN_str'])
 
 # Criar geometrias das bacias
-bacias_geom = muni_gdf.dissolve(by='bacia', aggfunc='sum')
-bacias_geom = bacias_geom.to_crs(epsg=4326)
+bacias_geom = dissolver(muni_gdf[['bacia', 'geometry']], by='bacia').reset_index()
+
+# Cores por bacia
+cores_bacias = {
+    'Bacia do Itajaí': '#1976d2',
+    'Bacia do Tubarão': '#388e3c',
+    'Bacia do Uruguai': '#7b1fa2',
+    'Bacia Litorânea Norte': '#0097a7',
+    'Bacia Litorânea Central': '#00796b',
+    'Bacia do Rio do Peixe': '#f57c00',
+    'Bacia do Canoas': '#5d4037',
+    'Outras Bacias': '#757575'
+}
+
+# Pirâmide por faixa de zoom: o nível mais grosseiro vai no HTML, os demais em
+# outputs/mapa_bacias_hidrograficas_dados/ (baixados ao dar zoom)
+print("🔺 Gerando pirâmide de zoom...")
+# (MAPAS_EXTERNOS=1: nenhum nível embutido)
+externo = modo_externo()
+niveis = gerar_piramide(bacias_geom)
+for _, _, nivel in niveis:
+    nivel['cor'] = nivel['bacia'].map(cores_bacias).fillna('#999999')
+urls_niveis = salvar_niveis(niveis, 'outputs/mapa_bacias_hidrograficas.html', 'bacias', ['bacia', 'cor'],
+                            embutir_primeiro=not externo)
+bacias_geom = niveis[0][2]
 bacias_geom = bacias_geom.merge(bacias_csv, left_on='bacia', right_on='bacia', how='left')
 
 # Criar mapa com limites de zoom
@@ -72,20 +81,9 @@ m = folium.Map(
     world_copy_jump=False
 )
 
-# Cores por bacia
-cores_bacias = {
-    'Bacia do Itajaí': '#1976d2',
-    'Bacia do Tubarão': '#388e3c',
-    'Bacia do Uruguai': '#7b1fa2',
-    'Bacia Litorânea Norte': '#0097a7',
-    'Bacia Litorânea Central': '#00796b',
-    'Bacia do Rio do Peixe': '#f57c00',
-    'Bacia do Canoas': '#5d4037',
-    'Outras Bacias': '#757575'
-}
-
 # Adicionar polígonos
 print("🎨 Adicionando polígonos...")
+camadas_bacias = []
 for _, bacia_row in bacias_geom.iterrows():
     cor = cores_bacias.get(bacia_row['bacia'], '#999999')
     # Estilo diferenciado para grupos não contíguos (ajuda a leitura)
@@ -93,50 +91,26 @@ for _, bacia_row in bacias_geom.iterrows():
     fill_opacity = 0.35 if bacia_row['bacia'] == 'Outras Bacias' else (0.5 if is_agrupada else 0.6)
     dash_array = '6,4' if bacia_row['bacia'] == 'Outras Bacias' else (None)
     
-    popup_html = f"""
-    <div style="font-family: Arial; font-size: 13px; min-width: 280px; max-width: 320px;">
-        <h3 style="margin: 0 0 10px 0; padding-bottom: 6px; border-bottom: 3px solid {cor}; color: {cor}; font-size: 16px;">
-            🌊 {bacia_row['bacia']}
-        </h3>
-        <div style="background: #e3f2fd; padding: 8px; margin: 6px 0; border-left: 4px solid #1976d2; border-radius: 3px;">
-            <strong style="font-size: 12px;">👥 População Total:</strong><br>
-            <span style="font-size: 16px; font-weight: bold; color: #1976d2;">
-                {bacia_row['populacao']:,.0f} habitantes
-            </span>
-        </div>
-        <div style="background: #e8f5e9; padding: 8px; margin: 6px 0; border-left: 4px solid #388e3c; border-radius: 3px;">
-            <strong style="font-size: 12px;">🗑️ Resíduos Domésticos:</strong><br>
-            <span style="font-size: 16px; font-weight: bold; color: #388e3c;">
-                {bacia_row['domestico_t_ano']:,.0f} t/ano
-            </span>
-        </div>
-        <div style="background: #fff3e0; padding: 8px; margin: 6px 0; border-left: 4px solid #f57c00; border-radius: 3px;">
-            <strong style="font-size: 12px;">♻️ Resíduos Recicláveis:</strong><br>
-            <span style="font-size: 16px; font-weight: bold; color: #f57c00;">
-                {bacia_row['reciclavel_t_ano']:,.0f} t/ano
-            </span>
-        </div>
-        <div style="background: #f3e5f5; padding: 10px; margin: 8px 0; border-left: 5px solid {cor}; border-radius: 4px;">
-            <strong>📊 Per Capita:</strong><br>
-            <span style="font-size: 16px; font-weight: bold; color: {cor};">
-                {(bacia_row['domestico_t_ano'] / bacia_row['populacao'] * 1000):.1f} kg/hab/ano
-            </span>
-        </div>
-    </div>
-    """
-    
-    folium.GeoJson(
-        bacia_row['geometry'],
-        style_function=lambda feature, cor=cor, fill_opacity=fill_opacity, dash_array=dash_array: {
-            'fillColor': cor,
-            'color': '#ffffff',
-            'weight': 4,
-            'fillOpacity': fill_opacity,
-            'dashArray': dash_array
-        },
-        tooltip=folium.Tooltip(bacia_row['bacia'], sticky=False),
-        popup=folium.Popup(popup_html, max_width=400)
+    estilo = {
+        'fillColor': cor,
+        'color': '#ffffff',
+        'weight': 4,
+        'fillOpacity': fill_opacity,
+        'dashArray': dash_array
+    }
+    gj = folium.GeoJson(
+        COLECAO_VAZIA if externo else {'type': 'Feature', 'properties': {'bacia': bacia_row['bacia'], 'cor': cor},
+                                       'geometry': bacia_row['geometry'].__geo_interface__},
+        style_function=None if externo else (lambda feature, estilo=estilo: estilo),
+        tooltip=folium.Tooltip(bacia_row['bacia'], sticky=False)
     ).add_to(m)
+    # tooltip fica na camada; o popup é refeito pelo bloco de atributos a cada troca de geometria
+    adicionar_piramide(m, gj, urls_niveis, filtro=('bacia', bacia_row['bacia']), estilo=estilo)
+    camadas_bacias.append(gj)
+
+# Popups: um template (popups.py) + resumo_por_bacia.csv num bloco de atributos
+embutir_atributos(m, 'bacias', camadas_bacias, com_per_capita(bacias_csv), 'bacia', COLUNAS_BACIA,
+                  POPUP_BACIA, POPUP_BACIA_SEM_DADOS)
 
 # Adicionar legenda responsiva
 print("📋 Adicionando legenda...")
@@ -0,0 +1,153 @@
+"""
+Classificação de municípios em bacias hidrográficas por tabela de consulta.
+
+Substitui as funções atribuir_bacia duplicadas nos scripts, que testavam
+substrings (mun.lower() in nome.lower()) contra todos os nomes de BACIAS_SC para
+cada município. Além de O(municípios x nomes), isso errava em casos como
+"São José" x "São José do Cedro".
+
+Agora:
+1) código IBGE normalizado (7 dígitos) -> bacia, pela tabela de códigos
+   config/bacias_municipios.csv (colunas codigo_ibge,bacia), gerada a partir
+   de BACIAS_SC com `python bacias.py` (nomes resolvidos para CD_MUN na camada
+   de municípios)
+2) nome normalizado (sem acentos, minúsculo, sem sufixo " - UF") -> bacia,
+   por correspondência EXATA
+3) opcional (substring=True): busca de nomes dentro do texto com Aho-Corasick
+   (pyahocorasick, se instalado; senão uma regex compilada equivalente)
+4) o restante fica em 'Outras Bacias'
+
+Tudo é aplicado como um único map vetorizado sobre a coluna, então escala para
+os 5.570 municípios do Brasil.
+"""
+import os
+import re
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TABELA_CODIGOS_CSV = os.path.join(BASE_DIR, 'config', 'bacias_municipios.csv')
+
+OUTRAS_BACIAS = 'Outras Bacias'
+
+# Principais bacias de Santa Catarina (municípios de referência)
+BACIAS_SC = {
+    'Bacia do Itajaí': ['Blumenau', 'Itajaí', 'Rio do Sul', 'Brusque', 'Ibirama'],
+    'Bacia do Tubarão': ['Tubarão', 'Criciúma', 'Araranguá', 'Içara'],
+    'Bacia do Uruguai': ['Chapecó', 'Concórdia', 'Joaçaba', 'Xanxerê', 'São Miguel do Oeste'],
+    'Bacia Litorânea Norte': ['Joinville', 'São Francisco do Sul', 'Araquari'],
+    'Bacia Litorânea Central': ['Florianópolis', 'São José', 'Palhoça', 'Biguaçu'],
+    'Bacia do Rio do Peixe': ['Videira', 'Caçador', 'Curitibanos'],
+    'Bacia do Canoas': ['Lages', 'São Joaquim', 'Campos Novos'],
+}
+
+
+def normalizar_nomes(nomes: pd.Series) -> pd.Series:
+    """Remove acentos, sufixo ' - UF' (formato da API do IBGE) e espaços extras; minúsculas."""
+    s = pd.Series(nomes, dtype='object').astype('string')
+    s = s.str.replace(r'\s+-\s+[A-Z]{2}$', '', regex=True)
+    s = s.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return s.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def normalizar_codigos(codigos: pd.Series) -> pd.Series:
+    """Códigos IBGE como texto de 7 dígitos (aceita int, float e str)."""
+    s = pd.Series(codigos, dtype='object').astype('string').str.replace(r'\.0$', '', regex=True)
+    return s.str.strip().str.zfill(7)
+
+
+def tabela_nomes(bacias=BACIAS_SC) -> dict:
+    """nome normalizado -> bacia."""
+    pares = [(mun, bacia) for bacia, municipios in bacias.items() for mun in municipios]
+    chaves = normalizar_nomes(pd.Series([m for m, _ in pares]))
+    return dict(zip(chaves, (b for _, b in pares)))
+
+
+def carregar_tabela_codigos(path: str = TABELA_CODIGOS_CSV) -> dict:
+    """codigo_ibge (7 dígitos) -> bacia, a partir de CSV (retorna {} se não existir)."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, dtype={'codigo_ibge': str})
+    return dict(zip(normalizar_codigos(df['codigo_ibge']), df['bacia']))
+
+
+def gerar_tabela_codigos(municipios: pd.DataFrame, bacias=BACIAS_SC, path: str = TABELA_CODIGOS_CSV) -> pd.DataFrame:
+    """Resolve os nomes de 'bacias' para CD_MUN (nome normalizado exato) e grava o CSV codigo_ibge,bacia.
+
+    municipios: tabela com CD_MUN e NM_MUN (ex.: camada_setores.carregar_atributos_municipios()).
+    Falha se algum nome de referência não existir ou for ambíguo na camada.
+    """
+    nomes = normalizar_nomes(municipios['NM_MUN']).to_numpy()
+    codigos = normalizar_codigos(municipios['CD_MUN']).to_numpy()
+    linhas = []
+    for bacia, referencias in bacias.items():
+        for mun in referencias:
+            achados = sorted(set(codigos[nomes == normalizar_nomes(pd.Series([mun]))[0]]))
+            if len(achados) != 1:
+                raise ValueError(f"Município de referência '{mun}' ({bacia}): {len(achados)} códigos na camada")
+            linhas.append({'codigo_ibge': achados[0], 'bacia': bacia})
+    tabela = pd.DataFrame(linhas).sort_values('codigo_ibge')
+    if path:
+        tabela.to_csv(path, index=False, encoding='utf-8')
+    return tabela
+
+
+def _buscador_substring(tabela: dict):
+    """Função nome_normalizado -> bacia do nome de referência mais longo contido no texto."""
+    try:
+        import ahocorasick
+        automato = ahocorasick.Automaton()
+        for chave, bacia in tabela.items():
+            automato.add_word(chave, (len(chave), bacia))
+        automato.make_automaton()
+
+        def buscar(texto):
+            achados = [v for _, v in automato.iter(texto)]
+            return max(achados)[1] if achados else None
+        return buscar
+    except ImportError:
+        # Alternância ordenada do nome mais longo para o mais curto
+        chaves = sorted(tabela, key=len, reverse=True)
+        padrao = re.compile('|'.join(re.escape(c) for c in chaves))
+
+        def buscar(texto):
+            achados = padrao.findall(texto)
+            return tabela[max(achados, key=len)] if achados else None
+        return buscar
+
+
+def classificar_bacias(nomes, codigos=None, tabela_codigos=None, substring: bool = False,
+                       bacias=BACIAS_SC) -> pd.Series:
+    """Bacia de cada município (Series alinhada a 'nomes').
+
+    nomes:          nomes dos municípios (NM_MUN ou 'Nome - UF')
+    codigos:        códigos IBGE correspondentes (opcional)
+    tabela_codigos: dict codigo -> bacia; None carrega config/bacias_municipios.csv
+    substring:      também procura nomes de referência dentro do nome (Aho-Corasick)
+    """
+    nomes = pd.Series(nomes)
+    resultado = pd.Series(pd.NA, index=nomes.index, dtype='object')
+
+    if codigos is not None:
+        tabela_codigos = carregar_tabela_codigos() if tabela_codigos is None else tabela_codigos
+        if tabela_codigos:
+            resultado = normalizar_codigos(pd.Series(codigos, index=nomes.index)).map(tabela_codigos).astype('object')
+
+    normalizados = normalizar_nomes(nomes)
+    tabela = tabela_nomes(bacias)
+    resultado = resultado.fillna(normalizados.map(tabela).astype('object'))
+
+    if substring:
+        faltando = resultado.isna() & normalizados.notna()
+        if faltando.any():
+            buscar = _buscador_substring(tabela)
+            unicos = normalizados[faltando].unique()
+            achados = {n: buscar(n) for n in unicos}
+            resultado = resultado.fillna(normalizados.map(achados).astype('object'))
+
+    return resultado.fillna(OUTRAS_BACIAS).astype('object')
+
+
+if __name__ == '__main__':
+    from camada_setores import carregar_atributos_municipios
+    tabela = gerar_tabela_codigos(carregar_atributos_municipios())
+    print(f"✅ {len(tabela)} municípios de referência salvos em {os.path.relpath(TABELA_CODIGOS_CSV, BASE_DIR)}")
@@ -0,0 +1,273 @@
+"""
+Mapas de calor pré-calculados (KDE) para os mapas Folium.
+
+O HeatMap do Leaflet recebia um ponto por município, com peso, e o navegador
+recalculava o kernel a cada pan/zoom: lento, e o resultado em escala municipal
+não diz muito (o 'calor' fica num ponto no centro de cada município). Aqui a
+densidade é calculada uma vez, em Python, a partir dos centroides dos setores
+censitários (peso = resíduos do setor, tiles_setores.estimativas_setores):
+
+1) para cada faixa de zoom, os pesos são acumulados numa grade EPSG:3857 com a
+   resolução de ~1 pixel no zoom máximo da faixa (limitada a MAX_LADO pixels e
+   a no mínimo LARGURA_BANDA / PIXELS_BANDA); faixas vizinhas com a mesma
+   resolução se fundem (faixas_efetivas, que só depende das faixas e da banda,
+   para o pipeline saber de antemão quais PNGs são gravados);
+2) a grade é convoluída com um núcleo gaussiano por FFT (scipy.fft, se
+   instalado; senão numpy.fft). A largura de banda é LARGURA_BANDA metros, ou
+   1,5 pixel se o pixel for maior;
+3) a densidade (t/ano/km²) vira um PNG indexado (paleta + transparência), com
+   a mesma escala de cores em todas as faixas.
+
+No mapa, cada camada de calor é um FeatureGroup com um L.imageOverlay por
+faixa, trocado no zoomend: a faixa mais grosseira vai embutida no HTML (data
+URI), as demais em <mapa>_dados/<nome>_z<min>-<max>.png. O navegador só
+desenha a imagem, sem recalcular nada.
+
+Uso:
+    x, y, pesos = centroides_ponderados(setores_3857, est['domestico_t_ano'])
+    adicionar_calor(m, 'outputs/mapa.html', 'calor_domestico', '🔵 Resíduos Domésticos',
+                    gerar_calor(x, y, pesos), GRADIENTE_DOMESTICO)
+"""
+import os
+import math
+import json
+import zlib
+import base64
+import struct
+import numpy as np
+import folium
+from tiles_setores import tamanho_tile, RAIO_TERRA
+from camadas_externas import pasta_dados
+
+try:
+    from scipy import fft as _fft
+    _tamanho_fft = _fft.next_fast_len
+except ImportError:
+    _fft = np.fft
+    _tamanho_fft = None
+
+# Faixas de zoom das imagens (acima de 10 o pixel já é menor que a banda / PIXELS_BANDA;
+# faixas que cairiam na mesma grade são fundidas por faixas_efetivas)
+FAIXAS_CALOR = [(0, 7), (8, 9), (10, 18)]
+MAX_LADO = 4096          # pixels no lado maior de cada imagem
+LARGURA_BANDA = 2000.0   # metros (desvio padrão do núcleo gaussiano)
+RAIO_NUCLEO = 4          # núcleo truncado em RAIO_NUCLEO larguras de banda
+QUANTIL_ESCALA = 0.995   # densidade que satura a paleta (faixa mais detalhada)
+PIXELS_BANDA = 8         # resolução mínima: largura de banda / PIXELS_BANDA
+OPACIDADE = 0.8
+
+# Mesmas paletas do HeatMap que as camadas substituem
+GRADIENTE_DOMESTICO = {0.0: '#d0d1e6', 0.5: '#74a9cf', 1.0: '#034e7b'}
+GRADIENTE_RECICLAVEL = {0.0: '#ffffcc', 0.5: '#feb24c', 1.0: '#e31a1c'}
+
+_JS_RUNTIME = """
+<script>
+window.CalorKDE = window.CalorKDE || function(mapa, grupo, niveis, opacidade) {
+    var atual = -1, overlay = null;
+    function faixa(z) {
+        for (var i = 0; i < niveis.length; i++) {
+            if (z >= niveis[i].zmin && z <= niveis[i].zmax) return i;
+        }
+        return z < niveis[0].zmin ? 0 : niveis.length - 1;
+    }
+    function atualizar() {
+        var i = faixa(mapa.getZoom());
+        if (i === atual) return;
+        atual = i;
+        var nova = L.imageOverlay(niveis[i].url, niveis[i].limites, {opacity: opacidade, interactive: false});
+        overlay = nova;
+        // a imagem anterior só sai quando a nova carregar (sem piscar)
+        nova.once('load', function() {
+            grupo.eachLayer(function(l) { if (l !== overlay) grupo.removeLayer(l); });
+        });
+        grupo.addLayer(nova);
+    }
+    mapa.on('zoomend', atualizar);
+    atualizar();
+};
+</script>
+"""
+
+
+def resolucao_zoom(zoom: int) -> float:
+    """Tamanho de 1 pixel (unidades EPSG:3857) no zoom dado."""
+    return tamanho_tile(zoom) / 256
+
+
+def centroides_ponderados(setores, pesos):
+    """(x, y, peso) dos centroides (EPSG:3857) dos setores com peso positivo."""
+    centros = setores.geometry.centroid
+    pesos = np.asarray(pesos, dtype=float)
+    validos = np.isfinite(pesos) & (pesos > 0) & ~centros.is_empty.to_numpy()
+    return centros.x.to_numpy()[validos], centros.y.to_numpy()[validos], pesos[validos]
+
+
+def _convoluir(grade: np.ndarray, nucleo: np.ndarray) -> np.ndarray:
+    """Convolução 'same' por FFT (o núcleo é ímpar e centrado)."""
+    forma = [a + b - 1 for a, b in zip(grade.shape, nucleo.shape)]
+    if _tamanho_fft is not None:
+        forma = [_tamanho_fft(n, True) for n in forma]
+    espectro = _fft.rfft2(grade, forma) * _fft.rfft2(nucleo, forma)
+    cheio = _fft.irfft2(espectro, forma)
+    r0, c0 = nucleo.shape[0] // 2, nucleo.shape[1] // 2
+    return np.maximum(cheio[r0:r0 + grade.shape[0], c0:c0 + grade.shape[1]], 0)
+
+
+def _nucleo(sigma_px: float) -> np.ndarray:
+    raio = max(1, math.ceil(RAIO_NUCLEO * sigma_px))
+    eixo = np.arange(-raio, raio + 1)
+    g = np.exp(-0.5 * (eixo / sigma_px) ** 2)
+    nucleo = np.outer(g, g)
+    return nucleo / nucleo.sum()
+
+
+def _escala(y) -> float:
+    """Unidades EPSG:3857 por metro de terreno na latitude média de y."""
+    return 1 / math.cos(math.atan(math.sinh(float(np.mean(y)) / RAIO_TERRA)))
+
+
+def densidade_kde(x, y, pesos, resolucao: float, largura: float = LARGURA_BANDA, limites=None):
+    """Densidade (peso/km²) numa grade EPSG:3857 com pixel 'resolucao'.
+
+    Retorna (grade, (xmin, ymin, xmax, ymax)); a linha 0 da grade é a de cima.
+    largura: banda em metros no terreno; vira unidades 3857 pela escala da latitude média.
+    """
+    sigma = max(largura * _escala(y), 1.5 * resolucao)
+    margem = RAIO_NUCLEO * sigma
+    xmin, ymin, xmax, ymax = limites or (x.min(), y.min(), x.max(), y.max())
+    x0 = math.floor((xmin - margem) / resolucao) * resolucao
+    y1 = math.ceil((ymax + margem) / resolucao) * resolucao
+    largura_px = math.ceil((xmax + margem - x0) / resolucao)
+    altura_px = math.ceil((y1 - (ymin - margem)) / resolucao)
+
+    col = np.clip(((x - x0) / resolucao).astype(np.int64), 0, largura_px - 1)
+    lin = np.clip(((y1 - y) / resolucao).astype(np.int64), 0, altura_px - 1)
+    grade = np.bincount(lin * largura_px + col, weights=pesos, minlength=altura_px * largura_px)
+    grade = _convoluir(grade.reshape(altura_px, largura_px), _nucleo(sigma / resolucao))
+
+    # peso por pixel -> peso por km² de terreno (área do pixel encolhe com cos² da latitude)
+    y_centro = y1 - (np.arange(altura_px) + 0.5) * resolucao
+    cos2 = np.cos(np.arctan(np.sinh(y_centro / RAIO_TERRA))) ** 2
+    grade *= 1e6 / (resolucao ** 2 * cos2[:, None])
+    return grade, (x0, y1 - altura_px * resolucao, x0 + largura_px * resolucao, y1)
+
+
+def faixas_efetivas(faixas=FAIXAS_CALOR, largura: float = LARGURA_BANDA):
+    """[(zmin, zmax, resolucao)] com as faixas vizinhas de mesma resolução fundidas.
+
+    A resolução é ~1 pixel no zoom máximo da faixa, mas não menor que
+    largura / PIXELS_BANDA em unidades 3857 (no terreno a banda só cresce com a
+    latitude). Não depende dos dados: pipeline.py deriva daqui os PNGs das tarefas.
+    """
+    efetivas = []
+    for zmin, zmax in faixas:
+        resolucao = max(resolucao_zoom(zmax), largura / PIXELS_BANDA)
+        if efetivas and resolucao == efetivas[-1][2]:  # mesma grade: só estende o zoom
+            efetivas[-1] = (efetivas[-1][0], zmax, resolucao)
+        else:
+            efetivas.append((zmin, zmax, resolucao))
+    return efetivas
+
+
+def _arquivo_faixa(nome: str, zmin: int, zmax: int) -> str:
+    return f'{nome}_z{zmin}-{zmax}.png'
+
+
+def arquivos_calor(nome: str, faixas=FAIXAS_CALOR, largura: float = LARGURA_BANDA):
+    """PNGs que adicionar_calor grava em <mapa>_dados/ para a camada 'nome' (a 1ª faixa vai embutida)."""
+    return [_arquivo_faixa(nome, zmin, zmax) for zmin, zmax, _ in faixas_efetivas(faixas, largura)[1:]]
+
+
+def gerar_calor(x, y, pesos, faixas=FAIXAS_CALOR, largura: float = LARGURA_BANDA):
+    """Lista [(zmin, zmax, grade, limites 3857)] da faixa mais grosseira à mais detalhada."""
+    extensao = max(x.max() - x.min(), y.max() - y.min())
+    # lado = extensão + margem do núcleo (2 * RAIO_NUCLEO * sigma) + arredondamento
+    margem_px = 2 * RAIO_NUCLEO * 1.5 + 2
+    minima = max((extensao + 2 * RAIO_NUCLEO * largura * _escala(y)) / (MAX_LADO - 2),
+                 extensao / (MAX_LADO - margem_px))
+    # pixel menor que 1/PIXELS_BANDA da banda não acrescenta detalhe à superfície suavizada
+    minima = max(minima, largura * _escala(y) / PIXELS_BANDA)
+    niveis = []
+    grades = {}
+    for zmin, zmax, resolucao in faixas_efetivas(faixas, largura):
+        resolucao = max(resolucao, minima)
+        # faixas levadas à mesma grade pelos limites acima reaproveitam a densidade
+        # (sem fundir: os nomes dos PNGs seguem faixas_efetivas)
+        if resolucao not in grades:
+            grades[resolucao] = densidade_kde(x, y, pesos, resolucao, largura)
+        niveis.append((zmin, zmax) + grades[resolucao])
+    return niveis
+
+
+def _paleta(gradiente: dict) -> np.ndarray:
+    """256 cores RGBA: índice 0 transparente, opacidade crescendo no começo da escala."""
+    paradas = sorted(gradiente.items())
+    pos = [p for p, _ in paradas]
+    rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for _, c in paradas], dtype=float)
+    t = np.linspace(0, 1, 256)
+    cores = np.column_stack([np.interp(t, pos, rgb[:, k]) for k in range(3)])
+    alfa = np.clip(t * 4, 0, 1) * 255
+    alfa[0] = 0
+    return np.column_stack([cores, alfa]).round().astype(np.uint8)
+
+
+def png_indexado(indices: np.ndarray, paleta: np.ndarray) -> bytes:
+    """PNG de 8 bits com paleta (PLTE + tRNS) a partir de uma grade de índices 0-255."""
+    def bloco(tipo: bytes, dados: bytes) -> bytes:
+        return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados))
+
+    altura, largura = indices.shape
+    linhas = np.zeros((altura, largura + 1), dtype=np.uint8)  # byte de filtro 0 por linha
+    linhas[:, 1:] = indices
+    return (b'\x89PNG\r\n\x1a\n'
+            + bloco(b'IHDR', struct.pack('>IIBBBBB', largura, altura, 8, 3, 0, 0, 0))
+            + bloco(b'PLTE', paleta[:, :3].tobytes())
+            + bloco(b'tRNS', paleta[:, 3].tobytes())
+            + bloco(b'IDAT', zlib.compress(linhas.tobytes(), 9))
+            + bloco(b'IEND', b''))
+
+
+def _latlng(limites):
+    """Cantos [[sul, oeste], [norte, leste]] de limites EPSG:3857."""
+    xmin, ymin, xmax, ymax = limites
+    lat = lambda v: math.degrees(math.atan(math.sinh(v / RAIO_TERRA)))
+    lon = lambda v: math.degrees(v / RAIO_TERRA)
+    return [[round(lat(ymin), 6), round(lon(xmin), 6)], [round(lat(ymax), 6), round(lon(xmax), 6)]]
+
+
+def adicionar_calor(m: folium.Map, html_path: str, nome: str, rotulo: str, niveis, gradiente: dict,
+                    show: bool = True, opacidade: float = OPACIDADE) -> float:
+    """Cria o FeatureGroup 'rotulo' com a pirâmide de imagens de 'niveis' (gerar_calor).
+
+    A escala de cores satura no quantil QUANTIL_ESCALA da faixa mais detalhada;
+    retorna esse valor (t/ano/km²) para a legenda.
+    """
+    mais_detalhada = niveis[-1][2]
+    positivos = mais_detalhada[mais_detalhada > 0]
+    vmax = float(np.quantile(positivos, QUANTIL_ESCALA)) if positivos.size else 1.0
+    paleta = _paleta(gradiente)
+    pasta, pasta_rel = pasta_dados(html_path)
+
+    fontes = []
+    for i, (zmin, zmax, grade, limites) in enumerate(niveis):
+        t = np.sqrt(np.clip(grade / vmax, 0, 1))  # raiz: realça as densidades baixas
+        indices = np.where(grade > vmax * 1e-4, np.maximum(1, np.rint(t * 255)), 0).astype(np.uint8)
+        png = png_indexado(indices, paleta)
+        if i == 0:
+            url = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+        else:
+            arquivo = _arquivo_faixa(nome, zmin, zmax)
+            with open(os.path.join(pasta, arquivo), 'wb') as f:
+                f.write(png)
+            url = f'{pasta_rel}/{arquivo}'
+        fontes.append({'zmin': zmin, 'zmax': zmax, 'url': url, 'limites': _latlng(limites)})
+
+    grupo = folium.FeatureGroup(name=rotulo, show=show).add_to(m)
+    if not getattr(m, '_runtime_calor', False):
+        m.get_root().html.add_child(folium.Element(_JS_RUNTIME))
+        m._runtime_calor = True
+    js = (f"<script>window.addEventListener('load', function() {{"
+          f"CalorKDE(window['{m.get_name()}'], window['{grupo.get_name()}'], {json.dumps(fontes)}, {opacidade});"
+          f"}});</script>")
+    m.get_root().html.add_child(folium.Element(js))
+    return vmax
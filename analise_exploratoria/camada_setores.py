@@ -0,0 +1,217 @@
+"""
+Carregamento compartilhado da camada de setores censitários (SC_setores_CD2022.gpkg).
+
+O GPKG completo (16.831 setores, todos os atributos) é lido UMA vez e convertido
+para GeoParquet em cache/. As execuções seguintes leem só as colunas pedidas
+diretamente do Parquet (leitura colunar), o que leva bem menos de 1 segundo.
+
+O cache é invalidado quando o GPKG muda:
+- mtime/tamanho iguais  -> cache reaproveitado sem recalcular hash
+- mtime/tamanho mudaram -> recalcula SHA-256; se o conteúdo for o mesmo, só
+  atualiza os metadados, senão regenera o GeoParquet
+
+Também mantém a camada derivada de municípios (setores dissolvidos por CD_MUN),
+persistida em cache/ e vinculada ao SHA-256 do GPKG de origem: o dissolve só é
+refeito quando SC_setores_CD2022.gpkg muda.
+
+No pipeline, a tarefa 'preparar_cache' (python camada_setores.py) monta esses
+caches antes das tarefas que os leem em paralelo.
+
+Uso:
+    from camada_setores import carregar_setores, carregar_municipios
+    gdf = carregar_setores(['CD_MUN', 'NM_MUN', 'geometry'])
+    muni = carregar_municipios()
+    atributos = carregar_atributos_municipios()  # sem geometria
+"""
+import os
+import json
+import hashlib
+import tempfile
+import pandas as pd
+import pyarrow.parquet as pq
+import geopandas as gpd
+from dissolucao import dissolver
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+SETORES_GPKG = os.path.join(BASE_DIR, 'SC_setores_CD2022.gpkg')
+
+# Atributos constantes dentro de um município (mantidos com 'first' no dissolve)
+COLUNAS_MUNICIPIO = ['CD_MUN', 'NM_MUN', 'CD_RGI', 'NM_RGI', 'CD_RGINT', 'NM_RGINT', 'CD_UF', 'NM_UF']
+
+
+def hash_arquivo(path: str, bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo (lido em blocos de 1 MB)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(bloco), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def gravar_atomico(destino: str, escrever):
+    """Chama escrever(tmp) num temporário exclusivo ao lado de destino e o move com os.replace.
+
+    Vários processos (tarefas do pipeline, ingestao_estados) podem reconstruir o
+    mesmo cache ao mesmo tempo: cada um escreve no seu temporário e quem
+    terminar por último substitui o arquivo inteiro, nunca um pela metade.
+    """
+    pasta = os.path.dirname(destino)
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pasta, prefix=os.path.basename(destino) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        escrever(tmp)
+        os.replace(tmp, destino)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _gravar_json(destino: str, dados: dict):
+    def escrever(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+    gravar_atomico(destino, escrever)
+
+
+def _caminhos_cache(gpkg: str):
+    nome = os.path.splitext(os.path.basename(gpkg))[0]
+    return (os.path.join(CACHE_DIR, f'{nome}.parquet'),
+            os.path.join(CACHE_DIR, f'{nome}.meta.json'))
+
+
+def assinatura_fonte(gpkg: str = SETORES_GPKG) -> str:
+    """Retorna o SHA-256 do GPKG, reaproveitando o valor salvo nos metadados
+    do cache quando mtime e tamanho não mudaram."""
+    _, meta_path = _caminhos_cache(gpkg)
+    st = os.stat(gpkg)
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    if meta.get('mtime_ns') == st.st_mtime_ns and meta.get('tamanho') == st.st_size and meta.get('sha256'):
+        return meta['sha256']
+    return hash_arquivo(gpkg)
+
+
+def _cache_valido(gpkg: str, parquet_path: str, meta_path: str) -> bool:
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    st = os.stat(gpkg)
+    if meta.get('mtime_ns') == st.st_mtime_ns and meta.get('tamanho') == st.st_size:
+        return True
+    # mtime mudou (cópia, checkout, touch): confere o conteúdo antes de descartar
+    if meta.get('sha256') == hash_arquivo(gpkg):
+        meta.update({'mtime_ns': st.st_mtime_ns, 'tamanho': st.st_size})
+        _gravar_json(meta_path, meta)
+        return True
+    return False
+
+
+def _reconstruir_cache(gpkg: str, parquet_path: str, meta_path: str):
+    gdf = gpd.read_file(gpkg)
+    gravar_atomico(parquet_path, lambda tmp: gdf.to_parquet(tmp, index=False))
+    st = os.stat(gpkg)
+    meta = {
+        'fonte': os.path.basename(gpkg),
+        'mtime_ns': st.st_mtime_ns,
+        'tamanho': st.st_size,
+        'sha256': hash_arquivo(gpkg),
+        'colunas': [c for c in gdf.columns],
+    }
+    _gravar_json(meta_path, meta)
+    return gdf
+
+
+def carregar_setores(colunas=None, gpkg: str = SETORES_GPKG) -> gpd.GeoDataFrame:
+    """Carrega os setores censitários com projeção de colunas.
+
+    colunas: lista de colunas desejadas (ex.: ['CD_MUN', 'NM_MUN', 'geometry']).
+             None carrega todas. A geometria é sempre incluída.
+    """
+    if not os.path.exists(gpkg):
+        raise FileNotFoundError(f"GeoPackage de setores não encontrado: {gpkg}")
+    parquet_path, meta_path = _caminhos_cache(gpkg)
+
+    if colunas is not None:
+        colunas = list(dict.fromkeys(list(colunas) + ['geometry']))
+
+    if _cache_valido(gpkg, parquet_path, meta_path):
+        return gpd.read_parquet(parquet_path, columns=colunas)
+
+    print(f"   ⏳ Gerando cache GeoParquet de {os.path.basename(gpkg)} (apenas na primeira execução)...")
+    gdf = _reconstruir_cache(gpkg, parquet_path, meta_path)
+    return gdf[colunas] if colunas is not None else gdf
+
+
+
+def _caminhos_municipios(gpkg: str):
+    nome = os.path.splitext(os.path.basename(gpkg))[0]
+    return (os.path.join(CACHE_DIR, f'{nome}_municipios.parquet'),
+            os.path.join(CACHE_DIR, f'{nome}_municipios.meta.json'))
+
+
+def _municipios_validos(meta_path: str, sha: str) -> bool:
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f).get('sha256_fonte') == sha
+
+
+def carregar_municipios(gpkg: str = SETORES_GPKG, workers=None) -> gpd.GeoDataFrame:
+    """Polígonos municipais (setores dissolvidos por CD_MUN), com cache persistente.
+
+    Retorna GeoDataFrame com 'CD_MUN_str' (código IBGE com 7 dígitos), os
+    atributos municipais disponíveis em COLUNAS_MUNICIPIO e a geometria, no CRS
+    original dos setores. O artefato em cache/ é identificado pelo SHA-256 do
+    GPKG de origem e só é reconstruído quando esse hash muda.
+
+    workers: processos usados no dissolve quando o cache precisa ser refeito
+             (None usa DISSOLVE_WORKERS; ver dissolucao.dissolver).
+    """
+    if not os.path.exists(gpkg):
+        raise FileNotFoundError(f"GeoPackage de setores não encontrado: {gpkg}")
+    muni_path, meta_path = _caminhos_municipios(gpkg)
+
+    sha = assinatura_fonte(gpkg)
+    if _municipios_validos(meta_path, sha) and os.path.exists(muni_path):
+        return gpd.read_parquet(muni_path)
+
+    print("   🔄 Dissolvendo setores por município (apenas quando o GPKG muda)...")
+    setores = carregar_setores(None, gpkg)
+    colunas = [c for c in COLUNAS_MUNICIPIO if c in setores.columns]
+    setores = setores[colunas + ['geometry']].copy()
+    setores['CD_MUN_str'] = setores['CD_MUN'].astype(str).str.zfill(7)
+    muni = dissolver(setores, by='CD_MUN_str', aggfunc='first', workers=workers).reset_index()
+
+    gravar_atomico(muni_path, lambda tmp: muni.to_parquet(tmp, index=False))
+    _gravar_json(meta_path, {'fonte': os.path.basename(gpkg), 'sha256_fonte': sha,
+                             'municipios': int(len(muni))})
+    return muni
+
+
+def carregar_atributos_municipios(gpkg: str = SETORES_GPKG) -> pd.DataFrame:
+    """Atributos municipais de carregar_municipios SEM a geometria (DataFrame comum).
+
+    Lê só as colunas de atributos do GeoParquet de municípios, então serve às
+    etapas que recalculam tabelas (parâmetros, limiares) sem tocar em polígonos.
+    """
+    muni_path, meta_path = _caminhos_municipios(gpkg)
+    if not (_municipios_validos(meta_path, assinatura_fonte(gpkg)) and os.path.exists(muni_path)):
+        carregar_municipios(gpkg)
+    colunas = [c for c in pq.read_schema(muni_path).names if c != 'geometry']
+    return pd.read_parquet(muni_path, columns=colunas)
+
+
+if __name__ == '__main__':
+    # Tarefa 'preparar_cache' do pipeline: conversão GPKG -> GeoParquet, dissolve
+    # municipal e população do IBGE feitos uma vez, antes das tarefas paralelas
+    from ibge_populacao import buscar_populacao
+    print("🗂️ Preparando caches compartilhados...")
+    print(f"   ✓ {len(carregar_setores(['CD_MUN'])):,} setores")
+    print(f"   ✓ {len(carregar_municipios()):,} municípios")
+    pop_df = buscar_populacao(uf='42')
+    print(f"   ✓ População de {len(pop_df) if pop_df is not None else 0} municípios")
@@ -0,0 +1,210 @@
+"""
+Camadas GeoJSON externas, baixadas só quando ligadas no LayerControl.
+
+Por padrão os mapas Folium embutem cada polígono como literal GeoJSON dentro do
+HTML, e nada aparece até o arquivo inteiro ser lido. No modo externo
+(MAPAS_EXTERNOS=1) cada camada vai para um arquivo ao lado do mapa
+(<mapa>_dados/<camada>.geojson, opcionalmente .geojson.gz) e o HTML leva só uma
+camada vazia. O navegador baixa o arquivo quando a camada está visível: na
+abertura, se ela começa ligada (show=True), ou no evento overlayadd do
+LayerControl. Camadas desligadas não custam nada na primeira pintura.
+
+O mesmo carregador serve às pirâmides de zoom (piramide.py): a fonte pode ser
+uma lista de níveis [{'zmin', 'zmax', 'url'}], com url None para o nível que já
+está embutido no HTML.
+
+As geometrias gravadas passam pela grade de quantizacao.py; com
+MAPAS_TOPOJSON=1 os arquivos saem em TopoJSON (.topojson, arcos compartilhados
+e coordenadas delta-codificadas), convertidos para GeoJSON no navegador.
+
+Arquivos .gz são descompactados no navegador (DecompressionStream) quando o
+servidor não envia Content-Encoding. Aberto via file:// o fetch costuma ser
+bloqueado; para o modo externo, sirva a pasta outputs/ por HTTP
+(python -m http.server).
+
+Uso:
+    grupo, camada = adicionar_camada_externa(m, gdf, 'outputs/mapa.html', 'limite_sc',
+                                             '🗺️ Limite de SC', estilo={'color': '#111'})
+"""
+import os
+import gzip
+import json
+import folium
+from quantizacao import quantizar_gdf, para_topojson
+
+# Dados iniciais das camadas externas (preenchidas no navegador)
+COLECAO_VAZIA = {'type': 'FeatureCollection', 'features': []}
+
+_JS_RUNTIME = """
+<script>
+window.CamadaExterna = window.CamadaExterna || (function() {
+    var cache = {};
+    // TopoJSON (quantizacao.para_topojson): arcos delta-codificados -> FeatureCollection
+    function topoParaGeo(topo) {
+        var t = topo.transform;
+        function posicao(p) { return [p[0] * t.scale[0] + t.translate[0], p[1] * t.scale[1] + t.translate[1]]; }
+        var arcos = topo.arcs.map(function(arco) {
+            var x = 0, y = 0;
+            return arco.map(function(d) { x += d[0]; y += d[1]; return posicao([x, y]); });
+        });
+        function anel(refs) {
+            var pontos = [];
+            refs.forEach(function(i, n) {
+                var a = i < 0 ? arcos[~i].slice().reverse() : arcos[i];
+                pontos = pontos.concat(n ? a.slice(1) : a);
+            });
+            return pontos;
+        }
+        var objeto = topo.objects[Object.keys(topo.objects)[0]];
+        return {type: 'FeatureCollection', features: objeto.geometries.filter(function(g) { return g.type; }).map(function(g) {
+            var coords = g.type === 'Point' ? posicao(g.coordinates)
+                : g.type === 'Polygon' ? g.arcs.map(anel)
+                : g.arcs.map(function(p) { return p.map(anel); });
+            return {type: 'Feature', properties: g.properties || {}, geometry: {type: g.type, coordinates: coords}};
+        })};
+    }
+    function baixar(url) {
+        if (!cache[url]) {
+            cache[url] = fetch(url).then(function(r) {
+                if (!r.ok) throw new Error(r.status + ' ' + url);
+                return r.arrayBuffer();
+            }).then(function(buf) {
+                var b = new Uint8Array(buf, 0, Math.min(2, buf.byteLength));
+                if (b[0] === 0x1f && b[1] === 0x8b) {  // gzip servido sem Content-Encoding
+                    var fluxo = new Blob([buf]).stream().pipeThrough(new DecompressionStream('gzip'));
+                    return new Response(fluxo).json();
+                }
+                return JSON.parse(new TextDecoder().decode(buf));
+            }).then(function(dados) {
+                return dados.type === 'Topology' ? topoParaGeo(dados) : dados;
+            });
+            cache[url].catch(function() { delete cache[url]; });
+        }
+        return cache[url];
+    }
+    return function(mapa, grupo, camada, fonte, opcoes) {
+        opcoes = opcoes || {};
+        var niveis = typeof fonte === 'string' ? [{zmin: 0, zmax: 99, url: fonte}] : fonte;
+        if (opcoes.filtro) {
+            var filtro = opcoes.filtro;
+            camada.options.filter = function(f) { return f.properties[filtro[0]] === filtro[1]; };
+        }
+        if (opcoes.estilo || opcoes.campo_cor) {
+            camada.options.style = function(f) {
+                var s = Object.assign({}, opcoes.estilo);
+                if (opcoes.campo_cor) s.fillColor = f.properties[opcoes.campo_cor];
+                return s;
+            };
+        }
+        var embutido = camada.toGeoJSON();
+        var carregado = -1;
+        niveis.forEach(function(n, i) {
+            if (!n.url && embutido.features.length) carregado = i;
+        });
+        function faixa(z) {
+            for (var i = 0; i < niveis.length; i++) {
+                if (z >= niveis[i].zmin && z <= niveis[i].zmax) return i;
+            }
+            return z < niveis[0].zmin ? 0 : niveis.length - 1;
+        }
+        function atualizar() {
+            if (!mapa.hasLayer(grupo)) return;  // desligada: não baixa nada
+            var i = faixa(mapa.getZoom());
+            if (i === carregado) return;
+            carregado = i;
+            var dados = niveis[i].url ? baixar(niveis[i].url) : Promise.resolve(embutido);
+            dados.then(function(dados) {
+                if (carregado !== i) return;
+                camada.clearLayers();
+                camada.addData(dados);
+                if (window.aplicarAtributos) window.aplicarAtributos(camada);
+            }).catch(function(e) {
+                carregado = -1;
+                console.warn('Camada não carregada:', e);
+            });
+        }
+        mapa.on('overlayadd', function(e) { if (e.layer === grupo) atualizar(); });
+        mapa.on('zoomend', atualizar);
+        atualizar();
+    };
+})();
+</script>
+"""
+
+
+def modo_externo() -> bool:
+    return os.environ.get('MAPAS_EXTERNOS', '').strip().lower() in ('1', 'true', 'sim', 'yes')
+
+
+def modo_topojson() -> bool:
+    return os.environ.get('MAPAS_TOPOJSON', '').strip().lower() in ('1', 'true', 'sim', 'yes')
+
+
+def pasta_dados(html_path: str):
+    """(pasta absoluta, nome relativo ao HTML) onde ficam os arquivos do mapa."""
+    pasta_rel = os.path.splitext(os.path.basename(html_path))[0] + '_dados'
+    pasta = os.path.join(os.path.dirname(os.path.abspath(html_path)), pasta_rel)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta, pasta_rel
+
+
+def salvar_geojson(dados, html_path: str, arquivo: str, comprimir: bool = False, topojson: bool = None) -> str:
+    """Grava GeoDataFrame ou dict GeoJSON em <mapa>_dados/arquivo; retorna a url relativa ao HTML.
+
+    GeoDataFrames saem com as coordenadas na grade de quantizacao.py e, com
+    topojson (padrão: MAPAS_TOPOJSON=1), como TopoJSON em <arquivo>.topojson.
+    """
+    pasta, pasta_rel = pasta_dados(html_path)
+    if hasattr(dados, 'geometry'):
+        dados = quantizar_gdf(dados)
+        if modo_topojson() if topojson is None else topojson:
+            arquivo = os.path.splitext(arquivo)[0] + '.topojson'
+            dados = para_topojson(dados, os.path.splitext(arquivo)[0])
+    if hasattr(dados, 'to_json'):
+        texto = dados.to_json(drop_id=True, ensure_ascii=False, separators=(',', ':'))
+    else:
+        texto = json.dumps(dados, ensure_ascii=False, separators=(',', ':'))
+    if comprimir:
+        arquivo += '.gz'
+        with gzip.open(os.path.join(pasta, arquivo), 'wt', encoding='utf-8', compresslevel=9) as f:
+            f.write(texto)
+    else:
+        with open(os.path.join(pasta, arquivo), 'w', encoding='utf-8') as f:
+            f.write(texto)
+    return f'{pasta_rel}/{arquivo}'
+
+
+def ligar_camada(m: folium.Map, grupo, camada: folium.GeoJson, fonte, filtro=None,
+                 estilo: dict = None, campo_cor: str = None):
+    """Faz a camada GeoJson buscar 'fonte' (url ou níveis de zoom) quando 'grupo' estiver visível.
+
+    filtro:    (campo, valor) para mostrar só parte das feições do arquivo
+    estilo:    estilo Leaflet fixo das feições baixadas
+    campo_cor: propriedade usada como fillColor de cada feição
+    """
+    if not getattr(m, '_runtime_camadas', False):
+        m.get_root().html.add_child(folium.Element(_JS_RUNTIME))
+        m._runtime_camadas = True
+    opcoes = {'filtro': filtro, 'estilo': estilo, 'campo_cor': campo_cor}
+    js = (f"<script>window.addEventListener('load', function() {{"
+          f"CamadaExterna(window['{m.get_name()}'], window['{grupo.get_name()}'], "
+          f"window['{camada.get_name()}'], {json.dumps(fonte)}, "
+          f"{json.dumps(opcoes, ensure_ascii=False)});"
+          f"}});</script>")
+    m.get_root().html.add_child(folium.Element(js))
+
+
+def adicionar_camada_externa(m: folium.Map, dados, html_path: str, nome: str, rotulo: str,
+                             show: bool = True, estilo: dict = None, campo_cor: str = None,
+                             tooltip=None, comprimir: bool = False):
+    """Grava 'dados' ao lado do HTML e cria FeatureGroup + GeoJson vazio que o baixa sob demanda.
+
+    Retorna (grupo, camada) para popups/atributos extras.
+    """
+    url = salvar_geojson(dados, html_path, f'{nome}.geojson', comprimir)
+    grupo = folium.FeatureGroup(name=rotulo, show=show)
+    camada = folium.GeoJson(COLECAO_VAZIA, tooltip=tooltip)
+    camada.add_to(grupo)
+    grupo.add_to(m)
+    ligar_camada(m, grupo, camada, url, estilo=estilo, campo_cor=campo_cor)
+    return grupo, camada
@@ -0,0 +1,118 @@
+"""
+Motor de cenários para os parâmetros de geração de resíduos.
+
+Em vez de editar 0.95 kg/hab/dia e 10% recicláveis nos scripts e rodar de novo
+todo o pipeline de geometrias, os cenários são avaliados só sobre o vetor de
+população municipal:
+
+- taxas (kg/hab/dia) e frações recicláveis viram arrays de cenários (pareados ou
+  em grade taxa x fração)
+- o cubo (cenário x município) sai de um único broadcast NumPy
+- os totais por bacia/RGI usam índices de grupo pré-calculados (ordem + início de
+  cada grupo) e np.add.reduceat, sem groupby do pandas por cenário
+
+Milhares de cenários x 295 municípios levam milissegundos.
+
+Uso:
+    from cenarios import indices_grupos, avaliar_cenarios, somar_por_grupo
+    grupos = indices_grupos(df['bacia'])
+    cubo = avaliar_cenarios(df['populacao'], taxas=[0.8, 0.95, 1.1], fracoes=[0.1, 0.2], grade=True)
+    por_bacia = somar_por_grupo(cubo['domestico_t_ano'], grupos)
+
+    python cenarios.py --taxas 0.8 0.95 1.1 --fracoes 0.10 0.20 --por bacia
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from parametros import GERACAO_KG_HAB_DIA, FRACAO_RECICLAVEL, DIAS_ANO
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUTS_DIR = os.path.join(BASE_DIR, 'outputs')
+MUNICIPIOS_CSV = os.path.join(OUTPUTS_DIR, 'analise_risco_municipios.csv')
+
+
+def indices_grupos(chaves) -> dict:
+    """Pré-calcula o agrupamento município -> grupo para reutilizar em todos os cenários.
+
+    Retorna dict com:
+    - 'rotulos': nomes dos grupos (ordenados)
+    - 'codigos': grupo de cada município (0..G-1)
+    - 'ordem':   permutação que deixa os municípios do mesmo grupo contíguos
+    - 'inicios': posição inicial de cada grupo em 'ordem' (para np.add.reduceat)
+    """
+    codigos, rotulos = pd.factorize(pd.Series(chaves).fillna('(sem grupo)'), sort=True)
+    ordem = np.argsort(codigos, kind='stable')
+    inicios = np.searchsorted(codigos[ordem], np.arange(len(rotulos)))
+    return {'rotulos': list(rotulos), 'codigos': codigos, 'ordem': ordem, 'inicios': inicios}
+
+
+def grade_cenarios(taxas, fracoes, grade: bool = False):
+    """Arrays (taxa, fração) por cenário: pareados elemento a elemento ou produto cartesiano."""
+    taxas = np.atleast_1d(np.asarray(taxas, dtype=float))
+    fracoes = np.atleast_1d(np.asarray(fracoes, dtype=float))
+    if grade:
+        taxas, fracoes = (a.ravel() for a in np.meshgrid(taxas, fracoes, indexing='ij'))
+    else:
+        taxas, fracoes = np.broadcast_arrays(taxas, fracoes)
+    return taxas, fracoes
+
+
+def avaliar_cenarios(populacao, taxas=GERACAO_KG_HAB_DIA, fracoes=FRACAO_RECICLAVEL,
+                     grade: bool = False) -> dict:
+    """Cubo (cenário x município) de resíduos para os parâmetros dados.
+
+    Retorna dict com 'taxa' e 'fracao' (S,) e 'domestico_t_ano' e
+    'reciclavel_t_ano' (S, M). População ausente conta como zero.
+    """
+    pop = np.nan_to_num(np.asarray(populacao, dtype=float))
+    taxas, fracoes = grade_cenarios(taxas, fracoes, grade)
+    domestico = taxas[:, None] * (pop[None, :] * (DIAS_ANO / 1000))
+    return {
+        'taxa': taxas,
+        'fracao': fracoes,
+        'domestico_t_ano': domestico,
+        'reciclavel_t_ano': domestico * fracoes[:, None],
+    }
+
+
+def somar_por_grupo(cubo: np.ndarray, grupos: dict) -> np.ndarray:
+    """Soma (cenário x município) -> (cenário x grupo) com os índices de indices_grupos."""
+    cubo = np.asarray(cubo)
+    if len(grupos['rotulos']) == 0:
+        return np.zeros(cubo.shape[:-1] + (0,), dtype=cubo.dtype)
+    return np.add.reduceat(cubo[..., grupos['ordem']], grupos['inicios'], axis=-1)
+
+
+def tabela_cenarios(df: pd.DataFrame, por: str, taxas, fracoes, grade: bool = False) -> pd.DataFrame:
+    """Tabela longa (cenário, grupo) com os totais de resíduos de cada cenário."""
+    grupos = indices_grupos(df[por])
+    cubo = avaliar_cenarios(df['populacao'], taxas, fracoes, grade)
+    n_cen, n_grp = len(cubo['taxa']), len(grupos['rotulos'])
+    return pd.DataFrame({
+        'cenario': np.repeat(np.arange(n_cen), n_grp),
+        'taxa_kg_hab_dia': np.repeat(cubo['taxa'], n_grp),
+        'fracao_reciclavel': np.repeat(cubo['fracao'], n_grp),
+        por: np.tile(grupos['rotulos'], n_cen),
+        'domestico_t_ano': somar_por_grupo(cubo['domestico_t_ano'], grupos).ravel(),
+        'reciclavel_t_ano': somar_por_grupo(cubo['reciclavel_t_ano'], grupos).ravel(),
+    })
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description="Avalia cenários de geração de resíduos sem reprocessar geometrias")
+    p.add_argument('--taxas', type=float, nargs='+', default=[GERACAO_KG_HAB_DIA], help="kg/hab/dia")
+    p.add_argument('--fracoes', type=float, nargs='+', default=[FRACAO_RECICLAVEL], help="fração reciclável")
+    p.add_argument('--grade', action='store_true', help="Todas as combinações taxa x fração")
+    p.add_argument('--por', default='bacia', help="Coluna de agrupamento (bacia, NM_RGI)")
+    p.add_argument('--entrada', default=MUNICIPIOS_CSV)
+    p.add_argument('--saida', default=None, help="CSV de saída (padrão: outputs/cenarios_por_<coluna>.csv)")
+    args = p.parse_args()
+
+    df = pd.read_csv(args.entrada)
+    if args.por not in df.columns:
+        raise SystemExit(f"Coluna '{args.por}' não existe em {args.entrada}")
+    tabela = tabela_cenarios(df, args.por, args.taxas, args.fracoes, args.grade)
+    saida = args.saida or os.path.join(OUTPUTS_DIR, f'cenarios_por_{args.por.lower()}.csv')
+    tabela.to_csv(saida, index=False, encoding='utf-8-sig')
+    print(f"📊 {tabela['cenario'].nunique()} cenários x {tabela[args.por].nunique()} grupos -> {saida}")
@@ -2,12 +2,13 @@
 Dashboard Interativo - Análise de Resíduos em Santa Catarina
 Gráficos interativos com Plotly para visualização de dados
 """
-import geopandas as gpd
+import os
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-import requests
+from ibge_populacao import buscar_populacao
+from parametros import adicionar_estimativas
 
 print("="*70)
 print("📊 CRIANDO DASHBOARD INTERATIVO DE ANÁLISE DE RESÍDUOS")
@@ -19,40 +20,16 @@ print("="*70)
 print("\n1️⃣ Carregando dados...")
 
 # Carregar CSVs existentes
-df_bacias = pd.read_csv(r'outputs\resumo_por_bacia.csv')
-df_regioes = pd.read_csv(r'outputs\resumo_por_regiao.csv')
-df_risco = pd.read_csv(r'outputs\analise_risco_municipios.csv')
-
-# Carregar setores para análise municipal completa
-gdf = gpd.read_file(r'SC_setores_CD2022.gpkg')
+df_bacias = pd.read_csv(os.path.join('outputs', 'resumo_por_bacia.csv'))
+df_regioes = pd.read_csv(os.path.join('outputs', 'resumo_por_regiao.csv'))
+df_risco = pd.read_csv(os.path.join('outputs', 'analise_risco_municipios.csv'))
 
 # Buscar população municipal APENAS DE SANTA CATARINA
 print("   Buscando população via API IBGE (apenas SC)...")
-try:
-    url = "https://servicodados.ibge.gov.br/api/v3/agregados/4714/periodos/2022/variaveis/93?localidades=N6[all]"
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-    rows = []
-    for item in data[0]['resultados']:
-        for loc in item['series']:
-            codigo = str(loc['localidade']['id']).zfill(7)
-            nome = loc['localidade']['nome']
-            pop = list(loc['serie'].values())[0] if loc['serie'] else None
-            # FILTRAR APENAS SANTA CATARINA (códigos começam com 42)
-            if pop and codigo.startswith('42'):
-                rows.append({
-                    'codigo_ibge': codigo,
-                    'municipio': nome,
-                    'populacao': float(pop)
-                })
-    pop_df = pd.DataFrame(rows)
-    pop_df['domestico_t_ano'] = pop_df['populacao'] * 0.95 * 365 / 1000
-    pop_df['reciclavel_t_ano'] = pop_df['domestico_t_ano'] * 0.10
+pop_df = buscar_populacao(uf='42')
+if pop_df is not None:
+    adicionar_estimativas(pop_df)
     print(f"   ✓ {len(pop_df)} municípios de SC carregados")
-except Exception as e:
-    print(f"   ⚠️ Erro: {e}")
-    pop_df = None
 
 # ============================================================================
 # 2. PREPARAR DADOS PARA GRÁFICOS
@@ -813,7 +790,7 @@ html_content = f"""
 """
 
 # Salvar HTML
-output_path = r'outputs\dashboard.html'
+output_path = os.path.join('outputs', 'dashboard.html')
 with open(output_path, 'w', encoding='utf-8') as f:
     f.write(html_content)
 
@@ -4,37 +4,23 @@ Versão LITE do mapa - apenas agregação municipal para GitHub Pages
 import os
 import geopandas as gpd
 import folium
-from folium.plugins import HeatMap
-import pandas as pd
-import requests
-
-# Buscar dados populacionais
-def fetch_population():
-    try:
-        url = "https://servicodados.ibge.gov.br/api/v3/agregados/4714/periodos/2022/variaveis/93?localidades=N6[all]"
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        rows = []
-        for item in data[0]['resultados']:
-            for loc in item['series']:
-                codigo = str(loc['localidade']['id']).zfill(7)
-                pop = list(loc['serie'].values())[0] if loc['serie'] else None
-                if pop:
-                    rows.append({'codigo_ibge': codigo, 'populacao': float(pop)})
-        return pd.DataFrame(rows)
-    except:
-        return None
+from camada_setores import carregar_setores
+from ibge_populacao import buscar_populacao
+from parametros import adicionar_estimativas
+from pontos_mapa import colecao_pontos, adicionar_pontos
+from popups import POPUP_MUNICIPIO
+from tiles_setores import SETORES_PMTILES, CORES_DENSIDADE, CamadaVetorial, ler_metadados, estimativas_setores
+from calor_kde import (gerar_calor, adicionar_calor, centroides_ponderados,
+                       GRADIENTE_DOMESTICO, GRADIENTE_RECICLAVEL)
 
 print("Carregando setores...")
-gdf = gpd.read_file(r'c:\Users\caetanoronan\OneDrive - UFSC\Área de Trabalho\Portifolio\analise_exploratoria\SC_setores_CD2022.gpkg')
+gdf = carregar_setores(['CD_MUN', 'NM_MUN', 'geometry'])
 
 print("Buscando população...")
-pop_df = fetch_population()
+pop_df = buscar_populacao(uf='42')
 
 if pop_df is not None:
-    pop_df['domestico_t_ano'] = pop_df['populacao'] * 0.95 * 365 / 1000
-    pop_df['reciclavel_t_ano'] = pop_df['domestico_t_ano'] * 0.10
+    adicionar_estimativas(pop_df)
     
     print("Agregando por município...")
     # Agregar sem dissolver (mais rápido)
@@ -52,43 +38,28 @@ if pop_df is not None:
     
     m = folium.Map(location=center, zoom_start=7, tiles='CartoDB positron')
     
-    # Heatmap doméstico
-    centroids = muni_wgs.copy()
-    centroids['centroid'] = centroids.geometry.centroid
-    
-    heat_dom = [[pt.y, pt.x, wt] for pt, wt in zip(centroids['centroid'], centroids['domestico_t_ano']) 
-                if pd.notna(wt) and wt > 0]
-    if heat_dom:
-        HeatMap(heat_dom, name='🔵 Resíduos Domésticos', radius=25, blur=30, 
-                gradient={0.0: '#d0d1e6', 0.5: '#74a9cf', 1.0: '#034e7b'}).add_to(m)
+    output_path = os.path.join('outputs', 'interactive_waste_map.html')
     
-    # Heatmap reciclável
-    heat_rec = [[pt.y, pt.x, wt] for pt, wt in zip(centroids['centroid'], centroids['reciclavel_t_ano']) 
-                if pd.notna(wt) and wt > 0]
-    if heat_rec:
-        HeatMap(heat_rec, name='🟡 Resíduos Recicláveis', radius=25, blur=30,
-                gradient={0.0: '#ffffcc', 0.5: '#feb24c', 1.0: '#e31a1c'}).add_to(m)
+    # Calor por setor censitário: densidade (KDE) pré-calculada em imagens por
+    # faixa de zoom (calor_kde.py), em vez do HeatMap com um ponto por município
+    print("Calculando mapas de calor por setor...")
+    setores = gdf.to_crs(3857)
+    est_setores = estimativas_setores(setores, pop_df)
+    for coluna, nome, rotulo, gradiente in [
+        ('domestico_t_ano', 'calor_domestico', '🔵 Resíduos Domésticos', GRADIENTE_DOMESTICO),
+        ('reciclavel_t_ano', 'calor_reciclavel', '🟡 Resíduos Recicláveis', GRADIENTE_RECICLAVEL),
+    ]:
+        x, y, pesos = centroides_ponderados(setores, est_setores[coluna])
+        if len(pesos):
+            adicionar_calor(m, output_path, nome, rotulo, gerar_calor(x, y, pesos), gradiente)
     
-    # Markers municipais (mais leve que polígonos)
-    for _, row in muni_wgs.iterrows():
-        centroid = row['geometry'].centroid
-        popup = f"""<div style="font-family: Arial; font-size: 13px; min-width: 200px;">
-        <h4 style="margin: 0 0 10px 0; color: #667eea;">{row.get('NM_MUN', 'N/A')}</h4>
-        <div style="background: #e3f2fd; padding: 5px; margin: 3px 0; border-left: 3px solid #034e7b;">
-        <b>🔵 Doméstico:</b> {row.get('domestico_t_ano', 0):,.0f} t/ano</div>
-        <div style="background: #fff3e0; padding: 5px; margin: 3px 0; border-left: 3px solid #e65100;">
-        <b>🟡 Reciclável:</b> {row.get('reciclavel_t_ano', 0):,.0f} t/ano</div>
-        </div>"""
-        
-        folium.CircleMarker(
-            location=[centroid.y, centroid.x],
-            radius=3,
-            color='#667eea',
-            fill=True,
-            fillColor='#667eea',
-            fillOpacity=0.6,
-            popup=folium.Popup(popup, max_width=300)
-        ).add_to(m)
+    # Markers municipais (mais leve que polígonos): coleção compacta + um template
+    # de popup para todos (popups.py), em vez de um CircleMarker com HTML por município
+    colecao = colecao_pontos(muni_wgs, ['NM_MUN', 'domestico_t_ano', 'reciclavel_t_ano'])
+    adicionar_pontos(m, 'municipios', colecao, [
+        {'grupo': m, 'campo': 'domestico_t_ano', 'raio': (3, 3),
+         'estilo': {'color': '#667eea', 'fill': True, 'fillColor': '#667eea', 'fillOpacity': 0.6}},
+    ], popup=POPUP_MUNICIPIO, max_width=300)
     
     # Legenda
     legend_html = '''
@@ -110,9 +81,25 @@ if pop_df is not None:
     '''.replace('{len(muni)}', str(len(muni)))
     m.get_root().html.add_child(folium.Element(legend_html))
     
+    # Setores censitários em vector tiles (python tiles_setores.py): o navegador
+    # baixa só os tiles visíveis do PMTiles, que fica ao lado do HTML
+    if os.path.exists(SETORES_PMTILES):
+        meta_tiles = ler_metadados(SETORES_PMTILES)
+        CamadaVetorial(os.path.basename(SETORES_PMTILES), meta_tiles).add_to(m)
+        limites = meta_tiles.get('classes_densidade', [])
+        faixas = [f'até {limites[0]:,.1f}'] + [f'{a:,.1f} – {b:,.1f}' for a, b in zip(limites, limites[1:])] + [f'acima de {limites[-1]:,.1f}'] if limites else []
+        itens = ''.join(f'<div><span style="display: inline-block; width: 14px; height: 10px; background: {cor}; margin-right: 6px;"></span>{faixa}</div>'
+                        for cor, faixa in zip(CORES_DENSIDADE, faixas))
+        m.get_root().html.add_child(folium.Element(f'''
+    <div style="position: fixed; bottom: 50px; left: 50px; background: white; border: 2px solid #333;
+                border-radius: 8px; padding: 10px; z-index: 9999; font-size: 11px;">
+        <b>🏘️ Setores - t/ano/km²</b>{itens}
+    </div>
+    '''))
+        print(f"   ✓ Camada de setores (vector tiles): {os.path.basename(SETORES_PMTILES)}")
+    
     folium.LayerControl(position='topleft').add_to(m)
     
-    output_path = r'c:\Users\caetanoronan\OneDrive - UFSC\Área de Trabalho\Portifolio\analise_exploratoria\outputs\interactive_waste_map.html'
     m.save(output_path)
     
     file_size = os.path.getsize(output_path) / (1024 * 1024)
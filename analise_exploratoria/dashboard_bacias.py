@@ -3,6 +3,7 @@ Dashboard Interativo - Análise de Resíduos por Bacias Hidrográficas de Santa
 Visualizações: Ranking, Distribuição, Per Capita, Risco e Comparações
 OTIMIZADO para MOBILE com ColorBrewer palettes
 """
+import os
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -28,9 +29,10 @@ def get_mobile_layout_config():
         )
     )
 
-# Carregar dados
-df_bacias = pd.read_csv(r'analise_exploratoria\outputs\resumo_por_bacia.csv')
-df_municipios = pd.read_csv(r'analise_exploratoria\outputs\analise_risco_municipios.csv')
+# Carregar dados (caminhos relativos a este arquivo: funciona a partir da raiz ou de analise_exploratoria/)
+OUTPUTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outputs')
+df_bacias = pd.read_csv(os.path.join(OUTPUTS_DIR, 'resumo_por_bacia.csv'))
+df_municipios = pd.read_csv(os.path.join(OUTPUTS_DIR, 'analise_risco_municipios.csv'))
 
 # Calcular métricas adicionais
 df_bacias['domestico_per_capita'] = (df_bacias['domestico_t_ano'] / df_bacias['populacao']) * 1000  # kg/hab/ano
@@ -1314,7 +1316,7 @@ html_content = f"""
 """
 
 # Salvar dashboard
-output_file = r'analise_exploratoria\outputs\dashboard_bacias.html'
+output_file = os.path.join(OUTPUTS_DIR, 'dashboard_bacias.html')
 with open(output_file, 'w', encoding='utf-8') as f:
     f.write(html_content)
 
@@ -0,0 +1,130 @@
+"""
+Dissolve rápido para camadas que formam uma cobertura (coverage) poligonal.
+
+Setores censitários, municípios e bacias formam coberturas: polígonos sem
+sobreposição que compartilham arestas idênticas. Nesse caso a união pode ser
+feita por coverage union (remoção das arestas compartilhadas), que é muito mais
+rápida que a união genérica (unary union) usada por GeoDataFrame.dissolve.
+
+dissolver() detecta se a camada é uma cobertura válida e escolhe o algoritmo:
+- cobertura válida   -> shapely.coverage_union_all
+- caso contrário     -> shapely.union_all (mesmo resultado do dissolve padrão)
+
+Os atributos são agregados como em GeoDataFrame.dissolve (groupby().agg()).
+
+Modo paralelo (workers > 1, ou variável de ambiente DISSOLVE_WORKERS): os grupos
+são particionados em lotes de tamanho equilibrado e unidos em um pool de
+processos. As geometrias trafegam como WKB (bytes), não como objetos shapely,
+e o resultado é remontado na ordem dos grupos, portanto é determinístico e
+idêntico ao modo serial. Onde existe fork (Linux/macOS) os processos são
+criados por fork; no Windows (spawn) o script chamador precisa do bloco
+if __name__ == '__main__'.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import geopandas as gpd
+import shapely
+
+
+def eh_cobertura_valida(geoms) -> bool:
+    """True se as geometrias formam uma cobertura poligonal válida
+    (sem sobreposições e com arestas compartilhadas coincidentes).
+
+    Requer shapely >= 2.1 (GEOS >= 3.12); em versões antigas retorna False,
+    o que força o uso da união genérica.
+    """
+    if not hasattr(shapely, 'coverage_is_valid'):
+        return False
+    arr = np.asarray(geoms, dtype=object)
+    arr = arr[~shapely.is_missing(arr) & ~shapely.is_empty(arr)]
+    if len(arr) == 0:
+        return False
+    if not np.all(np.isin(shapely.get_type_id(arr), (3, 6))):  # Polygon / MultiPolygon
+        return False
+    try:
+        return bool(shapely.coverage_is_valid(arr))
+    except shapely.errors.GEOSException:
+        return False
+
+
+def _uniao(geoms, cobertura: bool):
+    if cobertura:
+        return shapely.coverage_union_all(geoms)
+    return shapely.union_all(geoms)
+
+
+def _uniao_lote_wkb(tarefa):
+    """Executado no processo filho: recebe (cobertura, [wkb do grupo, ...]) e
+    devolve a união de cada grupo em WKB."""
+    cobertura, grupos = tarefa
+    return [shapely.to_wkb(_uniao(shapely.from_wkb(wkb), cobertura)) for wkb in grupos]
+
+
+def workers_padrao() -> int:
+    """Número de processos do dissolve (variável DISSOLVE_WORKERS; padrão 1 = serial)."""
+    try:
+        return max(1, int(os.environ.get('DISSOLVE_WORKERS', '1')))
+    except ValueError:
+        return 1
+
+
+def contexto_processos():
+    """Contexto de multiprocessing: fork quando disponível (não reexecuta o script
+    chamador nos filhos), spawn nos demais sistemas."""
+    metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+
+def _unir_grupos_paralelo(geoms, ordem, limites, cobertura: bool, workers: int):
+    wkb = shapely.to_wkb(geoms)
+    grupos = [wkb[ordem[ini:fim]] for ini, fim in zip(limites[:-1], limites[1:])]
+
+    # Lotes com número parecido de geometrias (~4 lotes por processo)
+    n_lotes = min(len(grupos), workers * 4)
+    acumulado = np.cumsum(np.diff(limites))
+    cortes = np.searchsorted(acumulado, np.linspace(0, acumulado[-1], n_lotes + 1)[1:-1], side='right')
+    fronteiras = [0] + sorted(set(int(c) for c in cortes if 0 < c < len(grupos))) + [len(grupos)]
+    tarefas = [(cobertura, grupos[a:b]) for a, b in zip(fronteiras[:-1], fronteiras[1:])]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_processos()) as pool:
+        resultados = pool.map(_uniao_lote_wkb, tarefas)
+        return [shapely.from_wkb(w) for lote in resultados for w in lote]
+
+
+def dissolver(gdf: gpd.GeoDataFrame, by=None, aggfunc='first', cobertura=None, workers=None) -> gpd.GeoDataFrame:
+    """Equivalente a gdf.dissolve(by=by, aggfunc=aggfunc), usando coverage union quando possível.
+
+    by:        coluna (ou lista de colunas) de agrupamento; None dissolve tudo em uma feição
+    aggfunc:   agregação dos atributos, como em GeoDataFrame.dissolve
+    cobertura: True/False força o algoritmo; None detecta automaticamente
+    workers:   processos para unir os grupos em paralelo; None usa DISSOLVE_WORKERS
+    """
+    geom_col = gdf.geometry.name
+    geoms = np.asarray(gdf.geometry.values, dtype=object)
+    if cobertura is None:
+        cobertura = eh_cobertura_valida(geoms)
+
+    atributos = gdf.drop(columns=geom_col)
+    if by is None:
+        # Uma única feição, como gdf.dissolve() sem 'by'
+        agrupador = atributos.groupby(np.zeros(len(gdf), dtype=int))
+    else:
+        agrupador = atributos.groupby(by, sort=True)
+    dados = agrupador.agg(aggfunc)
+
+    # ngroup() numera os grupos na mesma ordem do índice de 'dados' (-1 = chave nula)
+    codigos = agrupador.ngroup().to_numpy()
+    ordem = np.argsort(codigos, kind='stable')
+    limites = np.searchsorted(codigos[ordem], np.arange(len(dados) + 1))
+    workers = workers_padrao() if workers is None else max(1, int(workers))
+    if workers > 1 and len(dados) > 1:
+        partes = _unir_grupos_paralelo(geoms, ordem, limites, cobertura, workers)
+    else:
+        partes = [_uniao(geoms[ordem[ini:fim]], cobertura) for ini, fim in zip(limites[:-1], limites[1:])]
+
+    resultado = gpd.GeoDataFrame(dados, geometry=partes, crs=gdf.crs)
+    if by is None:
+        resultado = resultado.reset_index(drop=True)
+    return resultado
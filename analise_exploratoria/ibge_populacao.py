@@ -0,0 +1,147 @@
+"""
+Cliente único da API de agregados do IBGE (população do Censo 2022, agregado 4714)
+com cache em disco.
+
+- A consulta é restrita à UF (localidades=N6[N3[42]] para SC), em vez de baixar
+  os 5.570 municípios do Brasil e filtrar depois
+- Resposta guardada em cache/ibge/ com ETag e Last-Modified
+- Dentro do TTL o cache é usado sem nenhuma chamada HTTP; depois do TTL é feita
+  uma requisição condicional (If-None-Match / If-Modified-Since) e um 304 apenas
+  renova o cache
+- Modo offline (offline=True ou IBGE_OFFLINE=1): usa só o cache; sem rede, o
+  cache vencido também é aproveitado
+
+Uso:
+    from ibge_populacao import buscar_populacao
+    pop_df = buscar_populacao()          # SC (42)
+    pop_df = buscar_populacao(uf='41')   # PR
+"""
+import os
+import json
+import time
+import tempfile
+import requests
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'ibge')
+
+AGREGADOS_URL = "https://servicodados.ibge.gov.br/api/v3/agregados/4714/periodos/2022/variaveis/93"
+TTL_PADRAO_HORAS = 24 * 30  # Censo 2022 não muda com frequência
+TIMEOUT = 30
+
+_sessao = None
+
+
+def _obter_sessao() -> requests.Session:
+    """Sessão HTTP compartilhada por todas as chamadas do processo."""
+    global _sessao
+    if _sessao is None:
+        _sessao = requests.Session()
+        _sessao.headers.update({'Accept': 'application/json'})
+    return _sessao
+
+
+def modo_offline() -> bool:
+    return os.environ.get('IBGE_OFFLINE', '').strip().lower() in ('1', 'true', 'sim', 'yes')
+
+
+def _localidades(uf) -> str:
+    return f"N6[N3[{uf}]]" if uf else "N6[all]"
+
+
+def _caminho_cache(uf) -> str:
+    return os.path.join(CACHE_DIR, f"agregado_4714_{uf or 'BR'}.json")
+
+
+def _ler_cache(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gravar_cache(path, entrada):
+    # Temporário exclusivo: threads/processos que atualizam o mesmo cache não se atropelam
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _para_dataframe(data) -> pd.DataFrame:
+    rows = []
+    for item in data[0]['resultados']:
+        for loc in item['series']:
+            codigo = str(loc['localidade']['id']).zfill(7)
+            nome = loc['localidade']['nome']
+            pop = list(loc['serie'].values())[0] if loc['serie'] else None
+            if pop and pop not in ('-', '...', 'X'):
+                rows.append({'codigo_ibge': codigo, 'municipio': nome, 'populacao': float(pop)})
+    return pd.DataFrame(rows, columns=['codigo_ibge', 'municipio', 'populacao'])
+
+
+def obter_agregado(uf='42', ttl_horas: float = TTL_PADRAO_HORAS, offline=None):
+    """Retorna o JSON bruto do agregado 4714 para a UF, usando o cache quando possível.
+
+    Lança exceção se não houver rede nem cache.
+    """
+    offline = modo_offline() if offline is None else offline
+    path = _caminho_cache(uf)
+    cache = _ler_cache(path)
+
+    if cache is not None:
+        idade_h = (time.time() - cache.get('validado_em', 0)) / 3600
+        if offline or idade_h < ttl_horas:
+            return cache['dados']
+    elif offline:
+        raise RuntimeError(f"Modo offline e sem cache do IBGE para UF={uf or 'BR'} ({path})")
+
+    headers = {}
+    if cache is not None:
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+    try:
+        r = _obter_sessao().get(AGREGADOS_URL, params={'localidades': _localidades(uf)},
+                                headers=headers, timeout=TIMEOUT)
+        if r.status_code == 304 and cache is not None:
+            cache['validado_em'] = time.time()
+            _gravar_cache(path, cache)
+            return cache['dados']
+        r.raise_for_status()
+        dados = r.json()
+    except Exception as e:
+        if cache is not None:
+            print(f"   ⚠️ IBGE indisponível ({e}); usando cache de {time.strftime('%d/%m/%Y', time.localtime(cache.get('validado_em', 0)))}")
+            return cache['dados']
+        raise
+
+    _gravar_cache(path, {
+        'url': r.url,
+        'etag': r.headers.get('ETag'),
+        'last_modified': r.headers.get('Last-Modified'),
+        'validado_em': time.time(),
+        'dados': dados,
+    })
+    return dados
+
+
+def buscar_populacao(uf='42', ttl_horas: float = TTL_PADRAO_HORAS, offline=None):
+    """População municipal do Censo 2022 para a UF (código IBGE de 2 dígitos; None = Brasil).
+
+    Retorna DataFrame com 'codigo_ibge' (7 dígitos), 'municipio' e 'populacao',
+    ou None se os dados não puderem ser obtidos (mesmo contrato das antigas
+    funções fetch_population dos scripts).
+    """
+    try:
+        return _para_dataframe(obter_agregado(uf, ttl_horas=ttl_horas, offline=offline))
+    except Exception as e:
+        print(f"⚠️ Erro ao buscar população: {e}")
+        return None
@@ -0,0 +1,124 @@
+"""
+Faixas de incerteza (Monte Carlo) para as estimativas de resíduos por bacia/RGI.
+
+domestico_t_ano e reciclavel_t_ano usam coeficientes pontuais (parametros.py).
+Aqui os coeficientes são sorteados em lote:
+- taxa de geração (kg/hab/dia) e fração reciclável: um valor por sorteio,
+  distribuição triangular em torno do valor base
+- variação municipal: fator log-normal por município e sorteio
+
+Cada bloco de sorteios (float32, tamanho fixo) vira uma matriz (sorteios x
+municípios) que é somada por grupo com uma matriz esparsa município -> grupo
+(scipy.sparse; sem scipy, uma matriz indicadora densa). Só os totais por grupo
+(sorteios x grupos) ficam em memória, então 100 mil sorteios x 295 municípios
+cabem em poucos MB. Ao final saem os percentis de cada grupo.
+
+Uso:
+    python incerteza.py                      # outputs/incerteza_por_bacia.csv
+    python incerteza.py --por NM_RGI --sorteios 100000
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from parametros import GERACAO_KG_HAB_DIA, FRACAO_RECICLAVEL, DIAS_ANO
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUTS_DIR = os.path.join(BASE_DIR, 'outputs')
+MUNICIPIOS_CSV = os.path.join(OUTPUTS_DIR, 'analise_risco_municipios.csv')
+
+# (mínimo, moda, máximo) das distribuições triangulares e desvio do log-normal municipal
+DISTRIBUICOES_PADRAO = {
+    'taxa_kg_hab_dia': (0.75, GERACAO_KG_HAB_DIA, 1.20),
+    'fracao_reciclavel': (0.06, FRACAO_RECICLAVEL, 0.15),
+    'sigma_municipal': 0.15,
+}
+PERCENTIS_PADRAO = (5, 50, 95)
+TAMANHO_BLOCO = 8192
+
+
+def matriz_grupos(chaves):
+    """Matriz (municípios x grupos) com 1 na coluna do grupo de cada município, e os rótulos."""
+    codigos, rotulos = pd.factorize(pd.Series(chaves).fillna('(sem grupo)'), sort=True)
+    n, g = len(codigos), len(rotulos)
+    if sparse is not None:
+        matriz = sparse.csr_matrix((np.ones(n, dtype=np.float32), (np.arange(n), codigos)), shape=(n, g))
+    else:
+        matriz = np.zeros((n, g), dtype=np.float32)
+        matriz[np.arange(n), codigos] = 1
+    return matriz, list(rotulos)
+
+
+def _somar_grupos(bloco: np.ndarray, matriz) -> np.ndarray:
+    # (sorteios x municípios) @ (municípios x grupos); com scipy: (Mᵀ @ blocoᵀ)ᵀ
+    if sparse is not None and sparse.issparse(matriz):
+        return np.asarray(matriz.T @ bloco.T).T
+    return bloco @ matriz
+
+
+def simular(populacao, chaves, sorteios: int = 10000, distribuicoes=None,
+            tamanho_bloco: int = TAMANHO_BLOCO, semente: int = 42) -> dict:
+    """Sorteios Monte Carlo dos totais por grupo.
+
+    Retorna dict com 'rotulos' e as matrizes (sorteios x grupos) em float32
+    'domestico_t_ano' e 'reciclavel_t_ano'.
+    """
+    dist = dict(DISTRIBUICOES_PADRAO, **(distribuicoes or {}))
+    pop_t = (np.nan_to_num(np.asarray(populacao, dtype=np.float64)) * DIAS_ANO / 1000).astype(np.float32)
+    matriz, rotulos = matriz_grupos(chaves)
+    rng = np.random.default_rng(semente)
+
+    domestico = np.empty((sorteios, len(rotulos)), dtype=np.float32)
+    reciclavel = np.empty_like(domestico)
+    sigma = np.float32(dist['sigma_municipal'])
+    for ini in range(0, sorteios, tamanho_bloco):
+        n = min(tamanho_bloco, sorteios - ini)
+        taxa = rng.triangular(*dist['taxa_kg_hab_dia'], size=n).astype(np.float32)
+        fracao = rng.triangular(*dist['fracao_reciclavel'], size=n).astype(np.float32)
+        bloco = rng.standard_normal((n, len(pop_t)), dtype=np.float32)
+        # log-normal com média 1: exp(sigma*z - sigma²/2)
+        bloco *= sigma
+        bloco -= sigma * sigma / 2
+        np.exp(bloco, out=bloco)
+        bloco *= pop_t
+        bloco *= taxa[:, None]
+        totais = _somar_grupos(bloco, matriz)
+        domestico[ini:ini + n] = totais
+        reciclavel[ini:ini + n] = totais * fracao[:, None]
+    return {'rotulos': rotulos, 'domestico_t_ano': domestico, 'reciclavel_t_ano': reciclavel}
+
+
+def faixas(resultado: dict, percentis=PERCENTIS_PADRAO, coluna: str = 'grupo') -> pd.DataFrame:
+    """Percentis por grupo (ex.: domestico_t_ano_p5, _p50, _p95), mais a linha 'Total'."""
+    tabela = {coluna: resultado['rotulos'] + ['Total']}
+    for var in ('domestico_t_ano', 'reciclavel_t_ano'):
+        valores = resultado[var]
+        valores = np.column_stack([valores, valores.sum(axis=1, dtype=np.float64)])
+        for p, linha in zip(percentis, np.percentile(valores, percentis, axis=0)):
+            tabela[f'{var}_p{p:g}'] = linha
+    return pd.DataFrame(tabela)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description="Faixas de incerteza (Monte Carlo) das estimativas de resíduos")
+    p.add_argument('--por', default='bacia', help="Coluna de agrupamento (bacia, NM_RGI)")
+    p.add_argument('--sorteios', type=int, default=10000)
+    p.add_argument('--semente', type=int, default=42)
+    p.add_argument('--entrada', default=MUNICIPIOS_CSV)
+    p.add_argument('--saida', default=None, help="CSV de saída (padrão: outputs/incerteza_por_<coluna>.csv)")
+    args = p.parse_args()
+
+    df = pd.read_csv(args.entrada)
+    if args.por not in df.columns:
+        raise SystemExit(f"Coluna '{args.por}' não existe em {args.entrada}")
+    print(f"🎲 Monte Carlo: {args.sorteios:,} sorteios x {len(df)} municípios (por {args.por})...")
+    resultado = simular(df['populacao'], df[args.por], args.sorteios, semente=args.semente)
+    tabela = faixas(resultado, coluna=args.por)
+    saida = args.saida or os.path.join(OUTPUTS_DIR, f'incerteza_por_{args.por.lower()}.csv')
+    tabela.to_csv(saida, index=False, encoding='utf-8-sig')
+    print(f"✓ Faixas P5/P50/P95 salvas em: {saida}")
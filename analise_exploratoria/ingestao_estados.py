@@ -0,0 +1,94 @@
+"""
+Ingestão concorrente de vários estados (população IBGE + geometrias municipais).
+
+Para cada UF da lista:
+- a população (agregado 4714, cache em cache/ibge/) é buscada em um pool de threads,
+  aberto depois que os processos já foram criados
+- a camada de setores <UF>_setores_CD2022.gpkg é convertida/dissolvida em um pool
+  de processos (o resultado fica no cache GeoParquet de camada_setores e o
+  processo principal só lê o Parquet, sem serializar geometrias entre processos)
+
+Os estados são entregues à medida que ficam prontos, então PR + RS + SC levam
+aproximadamente o tempo do estado mais lento, e não a soma.
+
+Uso:
+    from ingestao_estados import carregar_estados
+    for uf, muni in carregar_estados(['PR', 'RS', 'SC']):
+        ...
+
+    python ingestao_estados.py PR RS SC
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from camada_setores import BASE_DIR, carregar_municipios
+from dissolucao import contexto_processos
+from ibge_populacao import buscar_populacao
+from parametros import adicionar_estimativas
+
+CODIGOS_UF = {
+    'RO': '11', 'AC': '12', 'AM': '13', 'RR': '14', 'PA': '15', 'AP': '16', 'TO': '17',
+    'MA': '21', 'PI': '22', 'CE': '23', 'RN': '24', 'PB': '25', 'PE': '26', 'AL': '27',
+    'SE': '28', 'BA': '29', 'MG': '31', 'ES': '32', 'RJ': '33', 'SP': '35', 'PR': '41',
+    'SC': '42', 'RS': '43', 'MS': '50', 'MT': '51', 'GO': '52', 'DF': '53',
+}
+
+
+def caminho_setores(uf: str) -> str:
+    """GeoPackage de setores do Censo 2022 da UF (mesmo padrão de SC_setores_CD2022.gpkg)."""
+    return os.path.join(BASE_DIR, f'{uf.upper()}_setores_CD2022.gpkg')
+
+
+def _preparar_municipios(gpkg: str) -> str:
+    """Executado no processo filho: garante o cache de setores e de municípios."""
+    carregar_municipios(gpkg, workers=1)
+    return gpkg
+
+
+def _montar_frame(uf, muni, pop_df):
+    muni = muni.merge(pop_df, left_on='CD_MUN_str', right_on='codigo_ibge', how='left')
+    adicionar_estimativas(muni)
+    muni['UF'] = uf
+    return muni
+
+
+def carregar_estados(ufs, workers=None):
+    """Gera (uf, GeoDataFrame municipal) para cada UF, na ordem em que ficam prontas.
+
+    O GeoDataFrame tem os polígonos municipais (camada_setores.carregar_municipios)
+    com 'populacao', 'domestico_t_ano' e 'reciclavel_t_ano'.
+    workers: processos para as camadas de setores (padrão: um por UF, até os núcleos).
+    """
+    ufs = list(dict.fromkeys(uf.upper() for uf in ufs))
+    desconhecidas = [uf for uf in ufs if uf not in CODIGOS_UF]
+    if desconhecidas:
+        raise ValueError(f"UF desconhecida: {', '.join(desconhecidas)}")
+    faltando = [caminho_setores(uf) for uf in ufs if not os.path.exists(caminho_setores(uf))]
+    if faltando:
+        raise FileNotFoundError("GeoPackage de setores não encontrado: " + ', '.join(faltando))
+
+    workers = workers or min(len(ufs), os.cpu_count() or 1)
+    # Com fork, o pool cria todos os processos no primeiro submit: as camadas vão
+    # antes de abrir as threads do IBGE, para nenhum filho nascer de um processo
+    # com requisição HTTP/SSL em andamento (risco de deadlock no filho)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_processos()) as processos:
+        futuros_geo = {processos.submit(_preparar_municipios, caminho_setores(uf)): uf for uf in ufs}
+
+        with ThreadPoolExecutor(max_workers=len(ufs)) as threads:
+            futuros_pop = {uf: threads.submit(buscar_populacao, CODIGOS_UF[uf]) for uf in ufs}
+
+            for futuro in as_completed(futuros_geo):
+                uf = futuros_geo[futuro]
+                futuro.result()
+                pop_df = futuros_pop[uf].result()
+                if pop_df is None:
+                    raise RuntimeError(f"Sem dados de população para {uf}")
+                yield uf, _montar_frame(uf, carregar_municipios(caminho_setores(uf)), pop_df)
+
+
+if __name__ == '__main__':
+    ufs = sys.argv[1:] or ['SC']
+    print(f"📥 Ingestão concorrente: {', '.join(ufs)}")
+    for uf, muni in carregar_estados(ufs):
+        print(f"   ✓ {uf}: {len(muni)} municípios | Pop: {muni['populacao'].sum():,.0f} | "
+              f"Dom: {muni['domestico_t_ano'].sum():,.0f} t/ano")
@@ -2,24 +2,39 @@
 Migra o mapa para usar polígonos oficiais de bacias (Ottobacias ANA) em SC.
 Fluxo:
 1) Carrega limites de SC a partir de SC_setores_CD2022.gpkg (dissolve)
-2) Baixa Ottobacias via ArcGIS REST (camadas prováveis 0..6) recortando pela bbox de SC
+2) Usa Ottobacias locais em data/ ou baixa via ArcGIS REST (paginado, com cache em data/) pela bbox de SC
 3) Faz clip por SC
 4) Gera polígonos de referência das 8 bacias (a partir de municípios por nome, igual ao pipeline anterior)
 5) Atribui cada ottobacia à bacia de referência por maior área de interseção
-6) Dissolve ottobacias por bacia e gera mapa Folium, reaproveitando estatísticas de outputs/resumo_por_bacia.csv
+6) Simplifica a cobertura de ottobacias preservando fronteiras compartilhadas (topologia.py),
+   dissolve por bacia e gera mapa Folium, reaproveitando estatísticas de outputs/resumo_por_bacia.csv
+
+Com --atributos, apenas regrava as estatísticas no mapa já gerado (sem geometrias).
 
 Observação: Se o endpoint da ANA estiver indisponível, o script aborta com instruções.
 """
 import os
 import io
+import sys
 import json
 import math
-import requests
+import numpy as np
 import pandas as pd
+import shapely
 import geopandas as gpd
 from shapely.geometry import box
 import folium
 from folium import plugins
+from camada_setores import carregar_municipios
+from dissolucao import dissolver
+from topologia import simplificar_cobertura
+from piramide import gerar_piramide, salvar_niveis, adicionar_piramide
+from camadas_externas import modo_externo, adicionar_camada_externa, COLECAO_VAZIA
+from ana_ottobacias import baixar_ottobacias
+from bacias import classificar_bacias
+from atributos_mapa import embutir_atributos, atualizar_html
+from quantizacao import quantizar, quantizar_gdf
+from popups import COLUNAS_BACIA, POPUP_BACIA, POPUP_BACIA_SEM_DADOS, com_per_capita
 
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, 'data')
@@ -32,9 +47,10 @@ OUT_MAP = os.path.join(BASE_DIR, 'outputs', 'mapa_bacias_hidrograficas.html')
 SUPPORTED_EXTS = ('.gpkg', '.geojson', '.json', '.shp', '.zip', '.fgb')
 
 def load_sc_boundary():
-    gdf = gpd.read_file(SETORES_GPKG)
+    # União dos municípios (já dissolvidos a partir dos setores) = limite do estado
+    gdf = carregar_municipios(SETORES_GPKG)[['geometry']]
     sc = gdf.to_crs(4674) if gdf.crs is None else gdf
-    sc_union = sc.dissolve().to_crs(4326)
+    sc_union = dissolver(sc).to_crs(4326)
     return sc_union.geometry.iloc[0]
 
 def bbox_from_geom(geom):
@@ -42,34 +58,12 @@ def bbox_from_geom(geom):
     return minx, miny, maxx, maxy
 
 def fetch_ottobacias_geojson(bbox):
-    # Tenta múltiplas camadas possíveis
-    base = 'https://geoservicos.ana.gov.br/arcgis/rest/services/BASES/OTTOBACIAS/MapServer'
-    params_common = {
-        'where': '1=1',
-        'outFields': '*',
-        'f': 'geojson',
-        'geometryType': 'esriGeometryEnvelope',
-        'inSR': 4326,
-        'spatialRel': 'esriSpatialRelIntersects',
-        'returnGeometry': 'true',
-    }
-    minx, miny, maxx, maxy = bbox
-    geometry = json.dumps({'xmin': minx, 'ymin': miny, 'xmax': maxx, 'ymax': maxy, 'spatialReference': {'wkid': 4326}})
-
-    last_err = None
-    for layer in range(0, 7):
-        url = f"{base}/{layer}/query"
-        params = dict(params_common)
-        params['geometry'] = geometry
-        try:
-            r = requests.get(url, params=params, timeout=60)
-            r.raise_for_status()
-            if 'FeatureCollection' in r.text and 'features' in r.text:
-                return r.json()
-        except Exception as e:
-            last_err = e
-            continue
-    raise RuntimeError(f"Falha ao obter Ottobacias via ArcGIS REST: {last_err}")
+    """Baixa as Ottobacias via ArcGIS REST (paginado e em paralelo, ver ana_ottobacias)
+    e retorna o GeoJSON. O arquivo fica salvo em data/, então as próximas execuções
+    usam o caminho local (find_local_otto_file)."""
+    path = baixar_ottobacias(bbox)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
 
 def find_local_otto_file():
     """Procura um arquivo de ottobacias na pasta data/.
@@ -117,58 +111,46 @@ def geojson_to_gdf(geojson_obj):
 
 def build_bacias_ref_from_municipios():
     # Usa setores para dissolver por município, em seguida atribui bacia por nome
-    gdf = gpd.read_file(SETORES_GPKG)
-    gdf['CD_MUN_str'] = gdf['CD_MUN'].astype(str).str.zfill(7)
-    muni = gdf.dissolve(by='CD_MUN_str', aggfunc='first').reset_index()
-
-    bacias_sc = {
-        'Bacia do Itajaí': ['Blumenau', 'Itajaí', 'Rio do Sul', 'Brusque', 'Ibirama'],
-        'Bacia do Tubarão': ['Tubarão', 'Criciúma', 'Araranguá', 'Içara'],
-        'Bacia do Uruguai': ['Chapecó', 'Concórdia', 'Joaçaba', 'Xanxerê', 'São Miguel do Oeste'],
-        'Bacia Litorânea Norte': ['Joinville', 'São Francisco do Sul', 'Araquari'],
-        'Bacia Litorânea Central': ['Florianópolis', 'São José', 'Palhoça', 'Biguaçu'],
-        'Bacia do Rio do Peixe': ['Videira', 'Caçador', 'Curitibanos'],
-        'Bacia do Canoas': ['Lages', 'São Joaquim', 'Campos Novos'],
-        'Outras Bacias': []
-    }
-    def atribuir_bacia(nome_mun: str) -> str:
-        if not isinstance(nome_mun, str):
-            return 'Outras Bacias'
-        for bacia, municipios in bacias_sc.items():
-            for mun in municipios:
-                if mun.lower() in nome_mun.lower():
-                    return bacia
-        return 'Outras Bacias'
+    muni = carregar_municipios(SETORES_GPKG)
 
     if 'NM_MUN' not in muni.columns:
         raise KeyError("NM_MUN não encontrado no SC_setores_CD2022.gpkg")
-    muni['bacia'] = muni['NM_MUN'].apply(atribuir_bacia)
-    bacias_ref = muni.dissolve(by='bacia', aggfunc='sum').reset_index().to_crs(4326)
+    muni['bacia'] = classificar_bacias(muni['NM_MUN'], muni['CD_MUN_str'])
+    bacias_ref = dissolver(muni, by='bacia', aggfunc='sum').reset_index().to_crs(4326)
     return bacias_ref
 
 def assign_ottobacia_to_bacia(otto: gpd.GeoDataFrame, ref: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
-    # Usa interseção de área para atribuir a bacia com maior sobreposição
-    otto = otto.to_crs(3857)
-    ref_ = ref.to_crs(3857)
-    assigned = []
-    for idx, row in otto.iterrows():
-        geom = row.geometry
-        best_bacia = None
-        best_area = 0.0
-        for _, r in ref_.iterrows():
-            inter = geom.intersection(r.geometry)
-            if inter.is_empty:
-                continue
-            area = inter.area
-            if area > best_area:
-                best_area = area
-                best_bacia = r['bacia']
-        assigned.append(best_bacia or 'Outras Bacias')
-    otto_assigned = otto.to_crs(4326).copy()
+    """Atribui a cada ottobacia a bacia de referência com maior área de interseção.
+
+    Vetorizado: o STRtree das bacias de referência filtra os pares candidatos
+    (bbox + intersects), as áreas de interseção são calculadas em lote e o
+    groupby/idxmax escolhe a maior sobreposição por ottobacia. Empates ficam com
+    a bacia que aparece primeiro em 'ref'; sem sobreposição -> 'Outras Bacias'.
+    """
+    otto_m = otto.to_crs(3857)
+    ref_m = ref.to_crs(3857)
+    otto_geoms = otto_m.geometry.values
+    ref_geoms = ref_m.geometry.values
+
+    tree = shapely.STRtree(ref_geoms)
+    idx_otto, idx_ref = tree.query(otto_geoms, predicate='intersects')
+    areas = shapely.area(shapely.intersection(otto_geoms[idx_otto], ref_geoms[idx_ref]))
+
+    pares = pd.DataFrame({'otto': idx_otto, 'ref': idx_ref, 'area': areas})
+    pares = pares[pares['area'] > 0].sort_values(['otto', 'ref'], kind='stable')
+    melhor = pares.loc[pares.groupby('otto')['area'].idxmax()]
+
+    assigned = np.full(len(otto_m), 'Outras Bacias', dtype=object)
+    assigned[melhor['otto'].to_numpy()] = ref_m['bacia'].to_numpy()[melhor['ref'].to_numpy()]
+
+    otto_assigned = otto_m.to_crs(4326).copy()
     otto_assigned['bacia'] = assigned
     return otto_assigned
 
-def build_map_from_official(bacias_official: gpd.GeoDataFrame, resumo: pd.DataFrame, otto_assigned: gpd.GeoDataFrame, sc_geom):
+def build_map_from_official(bacias_official: gpd.GeoDataFrame, resumo: pd.DataFrame, otto_assigned: gpd.GeoDataFrame, sc_geom,
+                            niveis=None):
+    """niveis: pirâmide de piramide.gerar_piramide; o primeiro nível substitui bacias_official
+    no HTML e os demais são gravados ao lado do mapa e carregados conforme o zoom."""
     # Cores ColorBrewer Set2 (8 cores qualitativas, colorblind-safe)
     # Fonte: https://colorbrewer2.org/#type=qualitative&scheme=Set2&n=8
     cores_bacias = {
@@ -181,6 +163,19 @@ def build_map_from_official(bacias_official: gpd.GeoDataFrame, resumo: pd.DataFr
         'Bacia do Canoas': '#e5c494',        # Bege-dourado
         'Outras Bacias': '#b3b3b3'           # Cinza neutro
     }
+    # Modo externo (MAPAS_EXTERNOS=1): nenhuma geometria no HTML, camadas baixadas quando visíveis
+    externo = modo_externo() and bool(niveis)
+    urls_niveis = None
+    if niveis:
+        for _, _, nivel in niveis:
+            nivel['cor'] = nivel['bacia'].map(cores_bacias).fillna('#999999')
+        bacias_official = niveis[0][2]
+        urls_niveis = salvar_niveis(niveis, OUT_MAP, 'bacias', ['bacia', 'cor'], embutir_primeiro=not externo)
+    else:
+        bacias_official = quantizar_gdf(bacias_official)
+    # Coordenadas na grade de quantizacao.py (os níveis da pirâmide já saem nela)
+    sc_geom = quantizar([sc_geom])[0]
+
     center = [bacias_official.geometry.centroid.y.mean(), bacias_official.geometry.centroid.x.mean()]
     m = folium.Map(location=center, zoom_start=7, tiles='CartoDB positron', min_zoom=6, max_zoom=13, max_bounds=True)
 
@@ -227,48 +222,53 @@ def build_map_from_official(bacias_official: gpd.GeoDataFrame, resumo: pd.DataFr
     ).add_to(m)
 
     # Borda do estado (camada base)
-    fg_limites = folium.FeatureGroup(name='🗺️ Limite de SC', show=True)
-    try:
-        folium.GeoJson(sc_geom, style_function=lambda f: {
-            'fillColor': 'transparent', 'color': '#111', 'weight': 3, 'dashArray': '6,4', 'fillOpacity': 0
-        }).add_to(fg_limites)
-    except Exception:
-        pass
-    fg_limites.add_to(m)
+    estilo_limite = {'fillColor': 'transparent', 'color': '#111', 'weight': 3, 'dashArray': '6,4', 'fillOpacity': 0}
+    if externo:
+        adicionar_camada_externa(m, {'type': 'Feature', 'properties': {}, 'geometry': shapely.geometry.mapping(sc_geom)},
+                                 OUT_MAP, 'limite_sc', '🗺️ Limite de SC', estilo=estilo_limite)
+    else:
+        fg_limites = folium.FeatureGroup(name='🗺️ Limite de SC', show=True)
+        try:
+            folium.GeoJson(sc_geom, style_function=lambda f: estilo_limite).add_to(fg_limites)
+        except Exception:
+            pass
+        fg_limites.add_to(m)
 
     # Criar FeatureGroup INDIVIDUAL para cada bacia (permite ligar/desligar separadamente)
+    # As feições levam só 'bacia' e 'cor'; as estatísticas vão no bloco de atributos
+    # (atributos_mapa), que pode ser atualizado sem regerar o mapa
     bacias_layers = {}
+    camadas_bacias = []
     
     for _, row in bacias_official.iterrows():
         bacia = row['bacia']
         cor = cores_bacias.get(bacia, '#999999')
-        stats = resumo.loc[resumo['bacia'] == bacia].iloc[0] if (resumo['bacia'] == bacia).any() else None
         
         # Criar FeatureGroup específico para esta bacia
         fg_bacia = folium.FeatureGroup(name=f'🌊 {bacia}', show=True)
-        
-        popup_html = f"""
-        <div style="font-family: Arial; font-size: 13px; min-width: 280px; max-width: 320px;">
-            <h3 style="margin: 0 0 10px 0; padding-bottom: 6px; border-bottom: 3px solid {cor}; color: {cor}; font-size: 16px;">
-                🌊 {bacia}
-            </h3>
-            {f'<div style="background: #e3f2fd; padding: 8px; margin: 6px 0; border-left: 4px solid #1976d2; border-radius: 3px;"><strong style="font-size: 12px;">👥 População Total:</strong><br><span style="font-size: 16px; font-weight: bold; color: #1976d2;">{stats.populacao:,.0f} habitantes</span></div>' if stats is not None else ''}
-            {f'<div style="background: #e8f5e9; padding: 8px; margin: 6px 0; border-left: 4px solid #388e3c; border-radius: 3px;"><strong style="font-size: 12px;">🗑️ Resíduos Domésticos:</strong><br><span style="font-size: 16px; font-weight: bold; color: #388e3c;">{stats.domestico_t_ano:,.0f} t/ano</span></div>' if stats is not None else ''}
-            {f'<div style="background: #fff3e0; padding: 8px; margin: 6px 0; border-left: 4px solid #f57c00; border-radius: 3px;"><strong style="font-size: 12px;">♻️ Resíduos Recicláveis:</strong><br><span style="font-size: 16px; font-weight: bold; color: #f57c00;">{stats.reciclavel_t_ano:,.0f} t/ano</span></div>' if stats is not None else ''}
-        </div>
-        """
-        gj = folium.GeoJson(
-            row['geometry'],
-            style_function=lambda f, cor=cor: {'fillColor': cor, 'color': '#222222', 'weight': 2, 'fillOpacity': 0.6},
-            tooltip=folium.Tooltip(bacia, sticky=False)
-        )
+        feature = {'type': 'Feature', 'geometry': shapely.geometry.mapping(row['geometry']),
+                   'properties': {'bacia': bacia, 'cor': cor}}
+        estilo = {'fillColor': cor, 'color': '#222222', 'weight': 2, 'fillOpacity': 0.6}
+        if externo:
+            gj = folium.GeoJson(COLECAO_VAZIA, tooltip=folium.Tooltip(bacia, sticky=False))
+        else:
+            gj = folium.GeoJson(
+                feature,
+                style_function=lambda f, estilo=estilo: estilo,
+                tooltip=folium.Tooltip(bacia, sticky=False)
+            )
         gj.add_to(fg_bacia)
-        folium.Popup(popup_html, max_width=400).add_to(gj)
+        camadas_bacias.append(gj)
+        if urls_niveis:
+            adicionar_piramide(m, gj, urls_niveis, filtro=('bacia', bacia), grupo=fg_bacia, estilo=estilo)
         
         # Adicionar ao mapa
         fg_bacia.add_to(m)
         bacias_layers[bacia] = fg_bacia
 
+    embutir_atributos(m, 'bacias', camadas_bacias, com_per_capita(resumo), 'bacia', COLUNAS_BACIA,
+                      POPUP_BACIA, POPUP_BACIA_SEM_DADOS)
+
     # Legenda responsiva e SEMPRE VISÍVEL (ajustada para não sobrepor atribuição CartoDB)
     legend_html = '''
     <style>
@@ -415,7 +415,18 @@ def build_map_from_official(bacias_official: gpd.GeoDataFrame, resumo: pd.DataFr
 
     m.save(OUT_MAP)
 
+def atualizar_atributos():
+    """Só os números mudaram (resumo_por_bacia.csv): regrava o bloco de atributos do mapa."""
+    resumo = pd.read_csv(RESUMO_CSV)
+    if not os.path.exists(OUT_MAP) or not atualizar_html(OUT_MAP, 'bacias', com_per_capita(resumo), 'bacia', COLUNAS_BACIA):
+        raise SystemExit(f'Mapa sem bloco de atributos, rode o script completo: {OUT_MAP}')
+    print(f'✅ Atributos do mapa atualizados: {OUT_MAP}')
+
 if __name__ == '__main__':
+    if '--atributos' in sys.argv:
+        atualizar_atributos()
+        sys.exit(0)
+
     print('🔎 Preparando limites de SC...')
     sc_geom = load_sc_boundary()
     bbox = bbox_from_geom(sc_geom)
@@ -452,28 +463,22 @@ if __name__ == '__main__':
     for b, c in counts.items():
         print(f" - {b}: {c} unidades")
 
+    # Simplificação TOPOLÓGICA: cada fronteira compartilhada é simplificada uma única vez
+    # (topologia.simplificar_cobertura), então ottobacias e bacias continuam sem frestas
+    # nem sobreposições. As macro-bacias saem do dissolve da cobertura original e viram
+    # uma pirâmide por faixa de zoom (piramide.py): o nível z6-7 (~1km) vai no HTML e
+    # é o exportado em GPKG; os mais detalhados são baixados pelo mapa ao dar zoom.
+    otto_3857 = otto_assigned.to_crs(3857)
+
     print('🧩 Dissolvendo Ottobacias por bacia...')
-    bacias_official = otto_assigned.dissolve(by='bacia', aggfunc='sum').reset_index()
-    
-    # Simplificação AGRESSIVA para reduzir peso do HTML drasticamente
-    # Tolerância de 1000m (1km) - suficiente para visualização em escala estadual
-    try:
-        bo_3857 = bacias_official.to_crs(3857)
-        bo_3857['geometry'] = bo_3857.geometry.simplify(1000, preserve_topology=True)  # 1km
-        bacias_official = bo_3857.to_crs(4326)
-        print(f'   ✓ Geometrias macro-bacias simplificadas (tolerância 1km)')
-    except Exception:
-        # Se algo falhar, ao menos garanta 4326 para o mapa
-        bacias_official = bacias_official.to_crs(4326)
-    
-    # Simplificar MUITO as ottobacias individuais também
-    try:
-        otto_3857 = otto_assigned.to_crs(3857)
-        otto_3857['geometry'] = otto_3857.geometry.simplify(500, preserve_topology=True)  # 500m
-        otto_assigned = otto_3857.to_crs(4326)
-        print(f'   ✓ Geometrias ottobacias simplificadas (tolerância 500m)')
-    except Exception:
-        otto_assigned = otto_assigned.to_crs(4326)
+    bo_3857 = dissolver(otto_3857, by='bacia', aggfunc='sum').reset_index()
+    niveis = gerar_piramide(bo_3857)
+    bacias_official = niveis[0][2]
+    print('   ✓ Pirâmide de zoom das macro-bacias: ' + ', '.join(f'z{a}-{b}' for a, b, _ in niveis))
+
+    otto_3857['geometry'] = simplificar_cobertura(otto_3857.geometry.values, 500)
+    otto_assigned = otto_3857.to_crs(4326)
+    print(f'   ✓ Geometrias ottobacias simplificadas (tolerância 500m, fronteiras compartilhadas)')
 
     print('📊 Lendo estatísticas por bacia...')
     resumo = pd.read_csv(RESUMO_CSV)
@@ -489,6 +494,6 @@ if __name__ == '__main__':
         print(f'⚠️ Falha ao exportar GPKG: {e}')
 
     print('🖼️ Gerando mapa com camadas (macro e ottobacias)...')
-    build_map_from_official(bacias_official, resumo, otto_assigned, sc_geom)
+    build_map_from_official(bacias_official, resumo, otto_assigned, sc_geom, niveis)
 
     print(f'✅ Mapa atualizado com bacias oficiais! Arquivo: {OUT_MAP}')
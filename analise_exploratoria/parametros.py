@@ -0,0 +1,26 @@
+"""
+Parâmetros de geração de resíduos usados por todos os scripts.
+
+Antes os valores 0.95 kg/hab/dia e 10% recicláveis estavam repetidos em cada
+script; agora ficam aqui (e são o cenário base do motor de cenários em
+cenarios.py).
+"""
+
+# Geração per capita de resíduos domésticos (kg/hab/dia)
+GERACAO_KG_HAB_DIA = 0.95
+# Fração reciclável do resíduo doméstico
+FRACAO_RECICLAVEL = 0.10
+DIAS_ANO = 365
+
+
+def domestico_t_ano(populacao, taxa_kg_hab_dia=GERACAO_KG_HAB_DIA):
+    """Resíduo doméstico anual (t/ano) a partir da população (escalar, array ou Series)."""
+    return populacao * taxa_kg_hab_dia * DIAS_ANO / 1000
+
+
+def adicionar_estimativas(df, coluna_pop='populacao', taxa_kg_hab_dia=GERACAO_KG_HAB_DIA,
+                          fracao_reciclavel=FRACAO_RECICLAVEL):
+    """Acrescenta 'domestico_t_ano' e 'reciclavel_t_ano' ao DataFrame (in place) e o retorna."""
+    df['domestico_t_ano'] = domestico_t_ano(df[coluna_pop], taxa_kg_hab_dia)
+    df['reciclavel_t_ano'] = df['domestico_t_ano'] * fracao_reciclavel
+    return df
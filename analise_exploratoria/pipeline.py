@@ -0,0 +1,345 @@
+"""
+Executor do pipeline de análise (DAG de scripts com cache por hash de conteúdo).
+
+Cada tarefa declara o script, as entradas (arquivos lidos, inclusive os módulos
+compartilhados que o script importa) e as saídas. O executor:
+1) monta o grafo: uma tarefa depende de outra quando lê uma saída dela
+2) calcula a chave da tarefa = SHA-256 do script + conteúdo de todas as entradas
+3) se a chave não mudou e as saídas estão intactas, pula a tarefa; se as saídas
+   foram apagadas/alteradas mas a chave já foi construída antes, restaura as
+   saídas de cache/artefatos/<chave>/ sem rodar o script
+4) roda em paralelo as tarefas independentes (mapas x dashboards)
+
+Assim, alterar apenas dashboard_bacias.py reconstrói só dashboard_bacias.html.
+
+Entradas tabulares (coeficientes, limiares, resumos) podem ser declaradas à
+parte em 'parametros', com um comando 'atualizar'. A chave fica dividida em
+geometria (script + entradas) e atributos (parametros): se só os atributos
+mudaram e as saídas anteriores estão intactas, roda o comando 'atualizar', que
+recalcula as tabelas e regrava só o bloco de atributos dos mapas
+(atributos_mapa.py), em segundos, em vez do script completo.
+
+Uso (a partir de analise_exploratoria/):
+    python pipeline.py                    # tudo
+    python pipeline.py dashboard_bacias   # alvo + dependências
+    python pipeline.py --listar
+    python pipeline.py --forcar --workers 4
+    python pipeline.py --publicar         # tudo + publicacao.py ao final
+
+A publicação (publicacao.py: .gz/.br e orçamento de tamanho dos HTML da raiz
+do repositório e de docs/) não é uma tarefa do DAG: esses HTML são cópias
+feitas à mão a partir de outputs/, que nenhuma tarefa produz. --publicar a
+roda depois que o pipeline termina.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from calor_kde import arquivos_calor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+ESTADO_JSON = os.path.join(CACHE_DIR, 'pipeline_estado.json')
+ARTEFATOS_DIR = os.path.join(CACHE_DIR, 'artefatos')
+
+SETORES = 'SC_setores_CD2022.gpkg'
+# Caches de camada_setores montados por 'preparar_cache': as tarefas de geometria os
+# declaram como entrada e só começam depois dele, sem reconstruções concorrentes
+# (só os Parquet; os .meta.json mudam quando o GPKG é tocado sem mudar de conteúdo)
+CACHE_SETORES = ['cache/SC_setores_CD2022.parquet', 'cache/SC_setores_CD2022_municipios.parquet']
+MODULOS_GEO = ['camada_setores.py', 'dissolucao.py', 'topologia.py', 'quantizacao.py']
+MODULOS_IBGE = ['ibge_populacao.py']
+MODULOS_BACIAS = ['bacias.py', 'config/bacias_municipios.csv']
+MODULOS_PARAMETROS = ['parametros.py']
+MODULOS_RISCO = ['risco.py', 'config/risco.json']
+MODULOS_POPUPS = ['popups.py', 'atributos_mapa.py', 'pontos_mapa.py', 'risco.py']
+MODULOS_CALOR = ['calor_kde.py', 'camadas_externas.py']
+
+
+def imagens_calor(pasta):
+    """PNGs das faixas de zoom não embutidas (calor_kde.arquivos_calor) das duas camadas de calor."""
+    return [f'{pasta}/{arquivo}'
+            for nome in ('calor_domestico', 'calor_reciclavel') for arquivo in arquivos_calor(nome)]
+
+
+# Caminhos relativos a analise_exploratoria/ (os scripts rodam com cwd nesta pasta)
+TAREFAS = {
+    'preparar_cache': {
+        'script': 'camada_setores.py',
+        'entradas': [SETORES, 'camada_setores.py', 'dissolucao.py'] + MODULOS_IBGE,
+        'saidas': CACHE_SETORES + ['cache/SC_setores_CD2022.meta.json',
+                                   'cache/SC_setores_CD2022_municipios.meta.json'],
+    },
+    'bacias': {
+        'script': 'analise_bacias_hidrograficas.py',
+        'entradas': [SETORES] + CACHE_SETORES + MODULOS_GEO + MODULOS_IBGE + MODULOS_BACIAS + MODULOS_POPUPS,
+        'parametros': ['atributos.py'] + MODULOS_PARAMETROS + MODULOS_RISCO,
+        'atualizar': ['atributos.py'],
+        'saidas': ['outputs/resumo_por_bacia.csv', 'outputs/analise_risco_municipios.csv',
+                   'outputs/mapa_bacias_municipios.html'],
+    },
+    'regioes': {
+        'script': 'analise_por_regiao.py',
+        'entradas': [SETORES] + CACHE_SETORES + ['tiles_setores.py'] + MODULOS_CALOR
+                    + MODULOS_GEO + MODULOS_IBGE + MODULOS_PARAMETROS + MODULOS_POPUPS,
+        'saidas': ['outputs/mapa_regioes.html', 'outputs/resumo_por_regiao.csv']
+                  + imagens_calor('outputs/mapa_regioes_dados'),
+    },
+    'tiles_setores': {
+        'script': 'tiles_setores.py',
+        'entradas': [SETORES] + CACHE_SETORES + ['piramide.py', 'camadas_externas.py']
+                    + MODULOS_GEO + MODULOS_IBGE + MODULOS_PARAMETROS,
+        'saidas': ['outputs/setores_residuos.pmtiles'],
+    },
+    'mapa_lite': {
+        'script': 'criar_mapa_lite.py',
+        'entradas': [SETORES] + CACHE_SETORES + ['tiles_setores.py', 'outputs/setores_residuos.pmtiles']
+                    + MODULOS_CALOR + MODULOS_GEO + MODULOS_IBGE + MODULOS_PARAMETROS + MODULOS_POPUPS,
+        'saidas': ['outputs/interactive_waste_map.html'] + imagens_calor('outputs/interactive_waste_map_dados'),
+    },
+    'mapa_pontos': {
+        'script': 'criar_mapa_pontos.py',
+        'entradas': [SETORES] + CACHE_SETORES + MODULOS_GEO + MODULOS_IBGE + MODULOS_PARAMETROS + MODULOS_POPUPS,
+        'saidas': ['outputs/interactive_points_map.html'],
+    },
+    'mapa_bacias_ana': {
+        'script': 'migrar_bacias_ana.py',
+        'entradas': [SETORES] + CACHE_SETORES + ['ana_ottobacias.py', 'piramide.py', 'camadas_externas.py']
+                    + MODULOS_GEO + MODULOS_BACIAS + MODULOS_POPUPS,
+        'parametros': ['outputs/resumo_por_bacia.csv'],
+        'atualizar': ['migrar_bacias_ana.py', '--atributos'],
+        'saidas': ['outputs/mapa_bacias_hidrograficas.html', 'outputs/bacias_oficiais_ana_macro.gpkg',
+                   'outputs/ottobacias_sc_atribuida.gpkg',
+                   'outputs/mapa_bacias_hidrograficas_dados/bacias_z8-9.geojson',
+                   'outputs/mapa_bacias_hidrograficas_dados/bacias_z10-11.geojson',
+                   'outputs/mapa_bacias_hidrograficas_dados/bacias_z12-13.geojson'],
+    },
+    'incerteza': {
+        'script': 'incerteza.py',
+        'entradas': ['outputs/analise_risco_municipios.csv'] + MODULOS_PARAMETROS,
+        'saidas': ['outputs/incerteza_por_bacia.csv'],
+    },
+    'dashboard': {
+        'script': 'criar_dashboard.py',
+        'entradas': ['outputs/resumo_por_bacia.csv', 'outputs/resumo_por_regiao.csv',
+                     'outputs/analise_risco_municipios.csv'] + MODULOS_IBGE + MODULOS_PARAMETROS,
+        'saidas': ['outputs/dashboard.html'],
+    },
+    'dashboard_bacias': {
+        'script': 'dashboard_bacias.py',
+        'entradas': ['outputs/resumo_por_bacia.csv', 'outputs/analise_risco_municipios.csv'],
+        'saidas': ['outputs/dashboard_bacias.html'],
+    },
+}
+
+
+def hash_arquivo(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _abs(rel: str) -> str:
+    return os.path.join(BASE_DIR, *rel.split('/'))
+
+
+def dependencias(tarefas=TAREFAS) -> dict:
+    """Para cada tarefa, o conjunto de tarefas que produzem alguma de suas entradas."""
+    produtor = {}
+    for nome, t in tarefas.items():
+        for saida in t['saidas']:
+            if saida in produtor:
+                raise ValueError(f"Saída '{saida}' declarada por '{produtor[saida]}' e '{nome}'")
+            produtor[saida] = nome
+    return {nome: {produtor[e] for e in t['entradas'] + t.get('parametros', [])
+                   if e in produtor and produtor[e] != nome}
+            for nome, t in tarefas.items()}
+
+
+def selecionar(alvos, deps) -> list:
+    """Alvos + todas as dependências (fecho transitivo), em ordem topológica."""
+    ordem, visitando, visitados = [], set(), set()
+
+    def visitar(n):
+        if n in visitados:
+            return
+        if n in visitando:
+            raise ValueError(f"Ciclo no pipeline envolvendo '{n}'")
+        visitando.add(n)
+        for d in sorted(deps[n]):
+            visitar(d)
+        visitando.discard(n)
+        visitados.add(n)
+        ordem.append(n)
+
+    for alvo in alvos:
+        if alvo not in deps:
+            raise KeyError(f"Tarefa desconhecida: {alvo} (disponíveis: {', '.join(deps)})")
+        visitar(alvo)
+    return ordem
+
+
+def _hash_arquivos(nome: str, arquivos) -> str:
+    h = hashlib.sha256(nome.encode())
+    for rel in arquivos:
+        path = _abs(rel)
+        h.update(rel.encode())
+        h.update((hash_arquivo(path) if os.path.exists(path) else 'ausente').encode())
+    return h.hexdigest()
+
+
+def chaves_tarefa(nome: str, tarefas=TAREFAS) -> tuple:
+    """(geometria, atributos): hash do script + entradas e hash dos parâmetros tabulares
+    (arquivo ausente entra como 'ausente')."""
+    t = tarefas[nome]
+    return (_hash_arquivos(nome, [t['script']] + sorted(t['entradas'])),
+            _hash_arquivos(nome, sorted(t.get('parametros', []))))
+
+
+def chave_tarefa(nome: str, tarefas=TAREFAS) -> str:
+    """Chave completa da tarefa (geometria + atributos), usada no estado e nos artefatos."""
+    return hashlib.sha256(''.join(chaves_tarefa(nome, tarefas)).encode()).hexdigest()
+
+
+def _carregar_estado() -> dict:
+    if os.path.exists(ESTADO_JSON):
+        with open(ESTADO_JSON, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _salvar_estado(estado):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = ESTADO_JSON + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, ESTADO_JSON)
+
+
+def _saidas_intactas(registro: dict) -> bool:
+    for rel, sha in registro.get('saidas', {}).items():
+        path = _abs(rel)
+        if not os.path.exists(path) or hash_arquivo(path) != sha:
+            return False
+    return True
+
+
+def _restaurar_artefatos(nome, chave, tarefas=TAREFAS) -> bool:
+    pasta = os.path.join(ARTEFATOS_DIR, chave)
+    arquivos = [os.path.join(pasta, rel.replace('/', '__')) for rel in tarefas[nome]['saidas']]
+    if not all(os.path.exists(a) for a in arquivos):
+        return False
+    for rel, origem in zip(tarefas[nome]['saidas'], arquivos):
+        os.makedirs(os.path.dirname(_abs(rel)), exist_ok=True)
+        shutil.copy2(origem, _abs(rel))
+    return True
+
+
+def _guardar_artefatos(nome, chave, tarefas=TAREFAS) -> dict:
+    pasta = os.path.join(ARTEFATOS_DIR, chave)
+    os.makedirs(pasta, exist_ok=True)
+    hashes = {}
+    for rel in tarefas[nome]['saidas']:
+        path = _abs(rel)
+        if not os.path.exists(path):
+            raise RuntimeError(f"Tarefa '{nome}' não gerou a saída declarada: {rel}")
+        shutil.copy2(path, os.path.join(pasta, rel.replace('/', '__')))
+        hashes[rel] = hash_arquivo(path)
+    return hashes
+
+
+def _executar_script(nome, tarefas=TAREFAS, comando=None):
+    comando = comando or [tarefas[nome]['script']]
+    inicio = time.time()
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')  # scripts imprimem emojis
+    proc = subprocess.run([sys.executable] + list(comando), cwd=BASE_DIR, capture_output=True, text=True,
+                          encoding='utf-8', errors='replace', env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Tarefa '{nome}' ({' '.join(comando)}) falhou:\n{proc.stdout[-2000:]}\n{proc.stderr[-4000:]}")
+    return time.time() - inicio
+
+
+def executar(alvos=None, forcar: bool = False, workers: int = None, tarefas=TAREFAS) -> dict:
+    """Executa as tarefas pedidas (None = todas) e retorna
+    {tarefa: 'executada'|'atualizada'|'pulada'|'restaurada'}."""
+    deps = dependencias(tarefas)
+    ordem = selecionar(alvos or list(tarefas), deps)
+    estado = _carregar_estado()
+    resultado = {}
+    pendentes = {n: set(deps[n]) & set(ordem) for n in ordem}
+    em_execucao = {}
+
+    def decidir_e_rodar(nome):
+        # A chave é calculada só quando as dependências terminaram (entradas já atualizadas)
+        chaves = chaves_tarefa(nome, tarefas)
+        chave = chave_tarefa(nome, tarefas)
+        registro = estado.get(nome, {})
+        if not forcar and registro.get('chave') == chave and _saidas_intactas(registro):
+            return nome, chave, chaves, 'pulada', None
+        if not forcar and _restaurar_artefatos(nome, chave, tarefas):
+            return nome, chave, chaves, 'restaurada', None
+        # Geometria igual à última construção: só recalcula atributos sobre as saídas existentes
+        if (not forcar and tarefas[nome].get('atualizar') and registro.get('chave_geometria') == chaves[0]
+                and _saidas_intactas(registro)):
+            duracao = _executar_script(nome, tarefas, tarefas[nome]['atualizar'])
+            return nome, chave, chaves, 'atualizada', duracao
+        duracao = _executar_script(nome, tarefas)
+        return nome, chave, chaves, 'executada', duracao
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        while pendentes or em_execucao:
+            prontas = [n for n, d in pendentes.items() if not d]
+            for n in prontas:
+                del pendentes[n]
+                em_execucao[pool.submit(decidir_e_rodar, n)] = n
+            if not em_execucao:
+                raise RuntimeError("Pipeline travado: dependências não resolvidas")
+            feitos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                nome = em_execucao.pop(futuro)
+                _, chave, chaves, status, duracao = futuro.result()
+                if status != 'pulada':
+                    saidas = _guardar_artefatos(nome, chave, tarefas) if status in ('executada', 'atualizada') else \
+                        {rel: hash_arquivo(_abs(rel)) for rel in tarefas[nome]['saidas']}
+                    estado[nome] = {'chave': chave, 'chave_geometria': chaves[0],
+                                    'chave_atributos': chaves[1], 'saidas': saidas}
+                    _salvar_estado(estado)
+                resultado[nome] = status
+                extra = f" ({duracao:.1f}s)" if duracao is not None else ''
+                simbolo = {'executada': '✓', 'atualizada': '✎', 'restaurada': '↺'}.get(status, '·')
+                print(f"   {simbolo} {nome}: {status}{extra}")
+                for d in pendentes.values():
+                    d.discard(nome)
+    return resultado
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description="Executa o pipeline de análise de resíduos (DAG com cache por hash)")
+    p.add_argument('alvos', nargs='*', help="Tarefas a construir (padrão: todas)")
+    p.add_argument('--forcar', action='store_true', help="Ignora o cache e reexecuta as tarefas selecionadas")
+    p.add_argument('--workers', type=int, default=None, help="Tarefas simultâneas (padrão: núcleos da CPU)")
+    p.add_argument('--listar', action='store_true', help="Lista as tarefas e dependências")
+    p.add_argument('--publicar', action='store_true',
+                   help="Ao final, comprime os HTML publicados e confere o orçamento (publicacao.py)")
+    args = p.parse_args()
+
+    if args.listar:
+        deps = dependencias()
+        for nome in selecionar(list(TAREFAS), deps):
+            print(f"{nome:18} <- {', '.join(sorted(deps[nome])) or '-'}  [{TAREFAS[nome]['script']}]")
+        sys.exit(0)
+
+    print("🔧 Executando pipeline...")
+    executar(args.alvos or None, forcar=args.forcar, workers=args.workers)
+    print("✅ Pipeline concluído")
+
+    if args.publicar:
+        print("\n📦 Publicação (pós-build)...")
+        sys.exit(subprocess.run([sys.executable, 'publicacao.py'], cwd=BASE_DIR).returncode)
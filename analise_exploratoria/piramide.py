@@ -0,0 +1,99 @@
+"""
+Pirâmide de geometrias por faixa de zoom para os mapas Folium.
+
+Em vez de embutir uma única resolução para todos os zooms (1 km nas bacias,
+resolução total em atualizar_mapa_zoom.py), as geometrias são simplificadas uma
+vez por faixa de zoom, com tolerância de ~1 pixel no zoom máximo da faixa
+(Web Mercator). A simplificação usa topologia.simplificar_cobertura, então cada
+nível continua sem frestas entre polígonos vizinhos.
+
+No HTML vai só o nível mais grosseiro. Os demais ficam em arquivos .geojson ao
+lado do mapa (<mapa>_dados/<camada>_z<min>-<max>.geojson) e são baixados pelo
+navegador quando o zoom entra na faixa correspondente (evento zoomend), com
+cache por URL (carregador de camadas_externas.py). Aberto via file:// (sem
+servidor) o fetch pode ser bloqueado; o mapa continua com o nível embutido.
+
+Uso:
+    niveis = gerar_piramide(bacias_gdf)                       # [(zmin, zmax, gdf 4326), ...]
+    urls = salvar_niveis(niveis, 'outputs/mapa.html', 'bacias')
+    gj = folium.GeoJson(niveis[0][2], ...).add_to(m)
+    adicionar_piramide(m, gj, urls, filtro=('bacia', 'Bacia do Itajaí'))
+"""
+import math
+import folium
+import shapely
+from topologia import simplificar_cobertura
+from quantizacao import quantizar_gdf
+from camadas_externas import salvar_geojson, ligar_camada
+
+# Faixas de zoom (os mapas limitam o zoom entre 6 e 13)
+FAIXAS_PADRAO = [(6, 7), (8, 9), (10, 11), (12, 13)]
+LATITUDE_REFERENCIA = -27.5  # SC
+
+
+def tolerancia_zoom(zoom: int, latitude: float = LATITUDE_REFERENCIA) -> float:
+    """Tamanho de 1 pixel (metros, EPSG:3857) no zoom dado."""
+    return 156543.03392 * math.cos(math.radians(latitude)) / (2 ** zoom)
+
+
+def remover_buracos(geoms, area_minima: float):
+    """Remove anéis internos menores que area_minima (frestas abaixo de 1 pixel)."""
+    def limpar(poligono):
+        internos = [anel for anel in poligono.interiors if shapely.Polygon(anel).area >= area_minima]
+        return shapely.Polygon(poligono.exterior, internos)
+
+    resultado = []
+    for geom in geoms:
+        if geom is None or geom.is_empty or shapely.get_num_interior_rings(shapely.get_parts(geom)).sum() == 0:
+            resultado.append(geom)
+        elif geom.geom_type == 'Polygon':
+            resultado.append(limpar(geom))
+        else:
+            resultado.append(shapely.MultiPolygon([limpar(p) for p in geom.geoms]))
+    return resultado
+
+
+def gerar_piramide(gdf, faixas=FAIXAS_PADRAO, pixels: float = 1.0):
+    """Lista [(zmin, zmax, GeoDataFrame EPSG:4326)] do nível mais grosseiro ao mais detalhado.
+
+    gdf deve formar uma cobertura (bacias, municípios); a tolerância de cada
+    faixa é 'pixels' pixels no zoom máximo da faixa, e buracos menores que um
+    pixel quadrado (frestas do recorte) são descartados. As coordenadas saem na
+    grade de quantizacao.py (1e-5°).
+    """
+    base = gdf.to_crs(3857)
+    niveis = []
+    for zmin, zmax in faixas:
+        nivel = base.copy()
+        tolerancia = tolerancia_zoom(zmax) * pixels
+        nivel['geometry'] = remover_buracos(simplificar_cobertura(base.geometry.values, tolerancia), tolerancia ** 2)
+        niveis.append((zmin, zmax, quantizar_gdf(nivel.to_crs(4326))))
+    return niveis
+
+
+def salvar_niveis(niveis, html_path: str, nome: str, colunas=None, embutir_primeiro: bool = True):
+    """Grava os níveis ao lado do HTML (exceto o primeiro, se ele vai embutido).
+
+    Retorna a lista de níveis para adicionar_piramide: [{'zmin', 'zmax', 'url'}],
+    com url relativa ao HTML (None para o nível embutido).
+    """
+    urls = []
+    for i, (zmin, zmax, gdf) in enumerate(niveis):
+        if i == 0 and embutir_primeiro:
+            urls.append({'zmin': zmin, 'zmax': zmax, 'url': None})
+            continue
+        dados = gdf[list(colunas) + ['geometry']] if colunas is not None else gdf
+        url = salvar_geojson(dados, html_path, f'{nome}_z{zmin}-{zmax}.geojson')
+        urls.append({'zmin': zmin, 'zmax': zmax, 'url': url})
+    return urls
+
+
+def adicionar_piramide(m: folium.Map, camada: folium.GeoJson, niveis, filtro=None, grupo=None, estilo=None):
+    """Liga a camada GeoJson aos níveis de salvar_niveis (troca de geometria no zoomend).
+
+    filtro: (campo, valor) quando a camada mostra só parte das feições dos
+    arquivos (ex.: uma FeatureGroup por bacia). grupo: FeatureGroup da camada
+    no LayerControl; desligado, nenhum nível é baixado. estilo: necessário
+    quando a camada começa vazia (modo externo, camadas_externas.py).
+    """
+    ligar_camada(m, grupo or camada, camada, niveis, filtro=filtro, estilo=estilo)
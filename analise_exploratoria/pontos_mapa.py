@@ -0,0 +1,97 @@
+"""
+Camadas de pontos dirigidas por dados para os mapas Folium.
+
+Em vez de um folium.CircleMarker por ponto e por camada, cada um com sua cópia
+do HTML do popup, os pontos vão UMA vez no HTML como FeatureCollection
+compacta (só coordenadas e propriedades):
+
+    <script type="application/json" data-pontos="municipios">{...}</script>
+
+No navegador, cada camada (ex.: doméstico, reciclável) cria seus círculos a
+partir dessa coleção: o raio sai da propriedade da camada (escala linear entre
+raio mínimo e máximo) e o popup é montado na abertura a partir de um template
+único com marcadores {campo} / {campo:n0} (popups.py).
+O contêiner de cada camada pode ser um FeatureGroup ou um MarkerCluster.
+
+Uso:
+    colecao = colecao_pontos(muni_wgs, ['NM_MUN', 'domestico_t_ano'])
+    adicionar_pontos(m, 'municipios', colecao,
+                     [{'grupo': cluster, 'campo': 'domestico_t_ano', 'estilo': {'color': '#034e7b'}}],
+                     popup='<b>{NM_MUN}</b><br>{domestico_t_ano:n0} t/ano')
+"""
+import folium
+import shapely
+from atributos_mapa import json_html
+from popups import adicionar_template_js
+from quantizacao import quantizar
+
+RAIO_PADRAO = (4, 16)
+
+_JS_PONTOS = """
+<script>
+window.addEventListener('load', function() {
+    var dados = JSON.parse(document.querySelector('script[data-pontos="%(nome)s"]').textContent);
+    var cfg = %(cfg)s;
+    cfg.camadas.forEach(function(c) {
+        var valores = dados.features.map(function(f) { return +f.properties[c.campo] || 0; });
+        var vmin = Math.min.apply(null, valores), vmax = Math.max.apply(null, valores);
+        function raio(v) {
+            if (vmax <= 0 || vmax === vmin) return c.raio[0];
+            return c.raio[0] + (v - vmin) / (vmax - vmin) * (c.raio[1] - c.raio[0]);
+        }
+        var camada = L.geoJSON(dados, {
+            pointToLayer: function(f, latlng) {
+                var estilo = Object.assign({radius: raio(+f.properties[c.campo] || 0)}, c.estilo);
+                if (c.campo_cor) estilo.color = estilo.fillColor = f.properties[c.campo_cor];
+                return L.circleMarker(latlng, estilo);
+            },
+            onEachFeature: function(f, l) {
+                l.bindPopup(function() { return renderTemplate(cfg.popup, f.properties); }, {maxWidth: cfg.max_width});
+            }
+        });
+        window[c.grupo].addLayer(camada);
+    });
+});
+</script>
+"""
+
+
+def colecao_pontos(gdf, colunas, casas: int = 0) -> dict:
+    """FeatureCollection de pontos (centroides, EPSG:4326, na grade de quantizacao.py) só com as colunas pedidas.
+
+    Valores numéricos são arredondados para 'casas' decimais; NaN vira null.
+    """
+    centros = gdf.geometry.centroid
+    validos = centros.notna() & ~centros.is_empty
+    xs, ys = shapely.get_coordinates(quantizar(centros[validos].values)).T.tolist()
+    dados = gdf.loc[validos, list(colunas)].copy()
+    for col in dados.select_dtypes('number').columns:
+        dados[col] = dados[col].round(casas).astype('Int64') if casas == 0 else dados[col].round(casas)
+    dados = dados.astype(object).where(dados.notna(), None)
+    features = [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [x, y]}, 'properties': props}
+        for x, y, props in zip(xs, ys, dados.to_dict(orient='records'))
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def adicionar_pontos(m: folium.Map, nome: str, colecao: dict, camadas, popup: str, max_width: int = 320):
+    """Embute a coleção uma vez e cria, no navegador, uma camada de círculos por item de 'camadas'.
+
+    camadas: [{'grupo': FeatureGroup/MarkerCluster já no mapa, 'campo': propriedade do raio,
+               'raio': (mín, máx), 'estilo': opções do L.circleMarker,
+               'campo_cor': propriedade com a cor de cada ponto (opcional)}]
+    """
+    adicionar_template_js(m)
+    cfg = {
+        'popup': popup,
+        'max_width': max_width,
+        'camadas': [{'grupo': c['grupo'].get_name(), 'campo': c['campo'],
+                     'raio': list(c.get('raio', RAIO_PADRAO)), 'estilo': c.get('estilo', {}),
+                     'campo_cor': c.get('campo_cor')}
+                    for c in camadas],
+    }
+    bloco = f'<script type="application/json" data-pontos="{nome}">{json_html(colecao)}</script>'
+    m.get_root().html.add_child(folium.Element(bloco))
+    js = _JS_PONTOS % {'nome': nome, 'cfg': json_html(cfg)}
+    m.get_root().html.add_child(folium.Element(js))
@@ -0,0 +1,97 @@
+"""
+Popups dos mapas montados no navegador a partir de templates.
+
+Antes cada script gerava, em Python, uma f-string de HTML com estilos inline
+para cada feição (município, bacia...), e o mesmo CSS se repetia centenas de
+vezes no HTML final. Agora:
+
+- o CSS dos popups (classes .pp-*) entra UMA vez por página;
+- cada camada leva UM template com marcadores {campo} / {campo:n0}
+  (número com separador de milhar e 0 casas), preenchido por
+  window.renderTemplate(template, propriedades) quando o popup abre;
+- os valores vão numa tabela compacta de propriedades: o bloco de
+  atributos (atributos_mapa.embutir_atributos) ou a coleção de pontos
+  (pontos_mapa.adicionar_pontos).
+
+Os templates usados por mais de um mapa ficam aqui (bacias, municípios).
+
+Uso:
+    embutir_atributos(m, 'bacias', [camada], com_per_capita(resumo), 'bacia', COLUNAS_BACIA,
+                      POPUP_BACIA, POPUP_BACIA_SEM_DADOS)
+"""
+import folium
+import pandas as pd
+from risco import calcular_indicadores
+
+_CSS = """
+<style>
+.pp { font-family: Arial; font-size: 13px; min-width: 220px; max-width: 340px; }
+.pp h3 { margin: 0 0 10px 0; padding-bottom: 6px; border-bottom: 3px solid; font-size: 16px; }
+.pp h4 { margin: 0 0 10px 0; padding-bottom: 5px; border-bottom: 2px solid; color: #667eea; }
+.pp-bloco { padding: 8px; margin: 6px 0; border-left: 4px solid; border-radius: 3px; }
+.pp-bloco strong { font-size: 12px; }
+.pp-bloco span { display: block; font-size: 16px; font-weight: bold; }
+.pp-linha { padding: 6px; margin: 3px 0; border-left: 3px solid; }
+.pp-cinza { padding: 6px; margin: 3px 0; background: #f5f5f5; border-radius: 4px; }
+.pp-pop { background: #e3f2fd; border-color: #1976d2; color: #1976d2; }
+.pp-dom { background: #e8f5e9; border-color: #388e3c; color: #388e3c; }
+.pp-rec { background: #fff3e0; border-color: #f57c00; color: #f57c00; }
+.pp-pc { background: #f3e5f5; }
+.pp-azul { background: #e3f2fd; border-color: #034e7b; }
+.pp-laranja { background: #fff3e0; border-color: #e65100; }
+.pp-bloco strong, .pp-linha b { color: #333; }
+</style>
+"""
+
+# Preenche templates {campo} / {campo:n0}; compartilhado por atributos_mapa e pontos_mapa
+_JS_TEMPLATE = """
+<script>
+window.renderTemplate = window.renderTemplate || (function() {
+    function fmt(v, casas) {
+        if (v === null || v === undefined || isNaN(v)) return '-';
+        return Number(v).toLocaleString('en-US', {minimumFractionDigits: casas, maximumFractionDigits: casas});
+    }
+    return function(tpl, p) {
+        return tpl.replace(/\\{(\\w+)(?::n(\\d))?\\}/g, function(_, k, c) {
+            var v = p[k];
+            if (c !== undefined) return fmt(v, +c);
+            return (v === null || v === undefined) ? '' : v;
+        });
+    };
+})();
+</script>
+"""
+
+# Macro-bacias: {bacia} e {cor} vêm da feição, o resto de resumo_por_bacia.csv
+COLUNAS_BACIA = ['populacao', 'domestico_t_ano', 'reciclavel_t_ano', 'per_capita_kg_hab_ano']
+POPUP_BACIA_SEM_DADOS = """<div class="pp"><h3 style="color: {cor}; border-color: {cor};">🌊 {bacia}</h3></div>"""
+POPUP_BACIA = POPUP_BACIA_SEM_DADOS.replace('</h3>', """</h3>
+<div class="pp-bloco pp-pop"><strong>👥 População Total:</strong><span>{populacao:n0} habitantes</span></div>
+<div class="pp-bloco pp-dom"><strong>🗑️ Resíduos Domésticos:</strong><span>{domestico_t_ano:n0} t/ano</span></div>
+<div class="pp-bloco pp-rec"><strong>♻️ Resíduos Recicláveis:</strong><span>{reciclavel_t_ano:n0} t/ano</span></div>
+<div class="pp-bloco pp-pc" style="border-color: {cor}; color: {cor};"><strong>📊 Per Capita:</strong><span>{per_capita_kg_hab_ano:n1} kg/hab/ano</span></div>""")
+
+# Pontos municipais (centroides): NM_MUN, domestico_t_ano, reciclavel_t_ano
+POPUP_MUNICIPIO = """<div class="pp"><h4>{NM_MUN}</h4>
+<div class="pp-linha pp-azul"><b>🔵 Doméstico:</b> {domestico_t_ano:n0} t/ano</div>
+<div class="pp-linha pp-laranja"><b>🟡 Reciclável:</b> {reciclavel_t_ano:n0} t/ano</div></div>"""
+
+# Município com região (RGI): também NM_RGI, populacao e cor
+POPUP_MUNICIPIO_REGIAO = """<div class="pp"><h4 style="color: #333; border-color: {cor};">📍 {NM_MUN}</h4>
+<div class="pp-cinza"><b style="color: {cor};">🗺️ Região:</b> {NM_RGI}</div>
+<div class="pp-linha pp-azul"><b>🔵 Doméstico:</b> {domestico_t_ano:n0} t/ano</div>
+<div class="pp-linha pp-laranja"><b>🟡 Reciclável:</b> {reciclavel_t_ano:n0} t/ano</div>
+<div class="pp-cinza"><b>👥 População:</b> {populacao:n0} hab</div></div>"""
+
+
+def adicionar_template_js(m: folium.Map):
+    """Inclui (uma vez) o CSS dos popups e window.renderTemplate(template, propriedades) no mapa."""
+    if not getattr(m, '_runtime_template', False):
+        m.get_root().header.add_child(folium.Element(_CSS))
+        m.get_root().html.add_child(folium.Element(_JS_TEMPLATE))
+        m._runtime_template = True
+
+
+def com_per_capita(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia de df com per_capita_kg_hab_ano (kg/hab/ano), usada no popup das bacias."""
+    return df.assign(per_capita_kg_hab_ano=calcular_indicadores(df)['per_capita_kg_hab_ano'])
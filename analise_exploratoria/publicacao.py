@@ -0,0 +1,258 @@
+"""
+Etapa pós-build dos arquivos publicados (GitHub Pages): compressão e orçamento de tamanho.
+
+Para cada HTML publicado (index.html, docs/*.html, mapa_residuos_PR/RS.html...):
+
+1) grava as variantes pré-comprimidas ao lado (<arquivo>.gz e, com o pacote
+   brotli instalado, <arquivo>.br), para servidores que entregam o arquivo
+   comprimido direto (gzip_static / brotli_static);
+2) decompõe o arquivo em componentes e mede os bytes de cada um:
+   - camada:  objetos Folium (geo_json_..., marker_cluster_...), agrupados pela
+              camada do LayerControl a que pertencem (popups, tooltips e
+              filhos contam na camada mãe)
+   - grafico: JSON de cada gráfico Plotly (var chartN = {...} / Plotly.newPlot)
+   - dados:   blocos <script type="application/json" data-...> (atributos, pontos)
+   - script / css / imagem: scripts e estilos inline, imagens data: URI
+   - html:    o restante (marcação)
+   e grava tudo em outputs/tamanho_artefatos.csv;
+3) compara bruto/gzip/brotli com o orçamento de config/orcamento_publicacao.json
+   e termina com erro (código 1) se algum arquivo estourar.
+
+Uso:
+    python publicacao.py                 # comprime, relata e confere o orçamento
+    python publicacao.py --sem-orcamento # só comprime e relata
+    python pipeline.py --publicar        # depois do pipeline (não é tarefa do DAG)
+"""
+import os
+import re
+import sys
+import glob
+import gzip
+import json
+import fnmatch
+import argparse
+from collections import defaultdict
+import pandas as pd
+from camada_setores import gravar_atomico
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BASE_DIR)
+ORCAMENTO_JSON = os.path.join(BASE_DIR, 'config', 'orcamento_publicacao.json')
+RELATORIO_CSV = os.path.join(BASE_DIR, 'outputs', 'tamanho_artefatos.csv')
+
+# Relativos à raiz do repositório (o que vai para o GitHub Pages)
+PADROES_PUBLICADOS = ['*.html', 'docs/*.html']
+ORCAMENTO_PADRAO = {'padrao': {'bruto_kb': 2048, 'gzip_kb': 512}, 'arquivos': {}}
+COMPONENTES_NO_TERMINAL = 5
+
+_IDENT = r'[a-z_]+_[0-9a-f]{32}'
+_RE_IDENT = re.compile(rf'\b({_IDENT})\b')
+_RE_BLOCO = re.compile(r'<(script|style)\b([^>]*)>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+_RE_DATA_URI = re.compile(r'data:image/[\w.+-]+;base64,[A-Za-z0-9+/=]+')
+_RE_ROTULO = re.compile(rf'"((?:[^"\\]|\\.)*)"\s*:\s*({_IDENT})')
+_RE_PLOTLY = re.compile(r'Plotly\.newPlot\(\s*[\'"]([^\'"]+)[\'"]\s*,\s*(\w+)?')
+_RE_VAR = re.compile(r'^\s*var\s+(\w+)\s*=')
+# filho.addTo(pai) / pai.bindPopup(filho) / pai.bindTooltip(filho) / pai.setContent(filho) / pai.addLayer(filho)
+_RE_FILHO_PAI = re.compile(rf'\b({_IDENT})\.addTo\(({_IDENT})\)')
+_RE_PAI_FILHO = re.compile(rf'\b({_IDENT})\.(?:bindPopup|bindTooltip|setContent|addLayer)\(({_IDENT})\)')
+
+
+def artefatos_publicados(raiz: str = REPO_DIR, padroes=PADROES_PUBLICADOS) -> list:
+    """Caminhos relativos (com '/') dos HTML publicados, sem repetição."""
+    achados = set()
+    for padrao in padroes:
+        for path in glob.glob(os.path.join(raiz, padrao)):
+            achados.add(os.path.relpath(path, raiz).replace(os.sep, '/'))
+    return sorted(achados)
+
+
+def comprimir(path: str) -> dict:
+    """Grava path.gz (e path.br, com brotli) se estiverem ausentes ou mais antigos; retorna os tamanhos."""
+    with open(path, 'rb') as f:
+        dados = f.read()
+    tamanhos = {'bruto': len(dados)}
+    variantes = [('gzip', '.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append(('brotli', '.br', lambda d: brotli.compress(d, quality=11)))
+    for nome, sufixo, funcao in variantes:
+        destino = path + sufixo
+        if not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(path):
+            comprimido = funcao(dados)
+
+            def escrever(tmp):
+                with open(tmp, 'wb') as f:
+                    f.write(comprimido)
+            gravar_atomico(destino, escrever)
+        tamanhos[nome] = os.path.getsize(destino)
+    return tamanhos
+
+
+def _rotulos_camadas(html: str) -> dict:
+    """{identificador Folium: nome da camada} a partir dos overlays do LayerControl."""
+    rotulos = {}
+    for texto, ident in _RE_ROTULO.findall(html):
+        try:
+            rotulos[ident] = json.loads(f'"{texto}"')
+        except json.JSONDecodeError:
+            rotulos[ident] = texto
+    return rotulos
+
+
+def _pais(html: str) -> dict:
+    pais = {}
+    for filho, pai in _RE_FILHO_PAI.findall(html):
+        pais.setdefault(filho, pai)
+    for pai, filho in _RE_PAI_FILHO.findall(html):
+        pais.setdefault(filho, pai)
+    return pais
+
+
+def _camada(ident: str, pais: dict, rotulos: dict) -> str:
+    """Nome da camada do LayerControl que contém ident.
+
+    Sem camada nomeada, o tipo do ancestral logo abaixo do mapa (ex.: todos os
+    circle_marker soltos no mapa, com seus popups, somam em 'circle_marker').
+    """
+    atual, topo, vistos = ident, ident, set()
+    while atual and atual not in vistos:
+        if atual in rotulos:
+            return rotulos[atual]
+        if not atual.startswith('map_'):
+            topo = atual
+        vistos.add(atual)
+        atual = pais.get(atual)
+    return topo.rsplit('_', 1)[0]
+
+
+def _componentes_script(corpo: str, pais: dict, rotulos: dict, graficos: dict, acumular):
+    """Atribui cada linha do script ao objeto Folium / gráfico do comando em curso."""
+    atual = None
+    for linha in corpo.splitlines(keepends=True):
+        n = len(linha.encode('utf-8'))
+        plot = _RE_PLOTLY.search(linha)
+        var = _RE_VAR.match(linha)
+        ident = _RE_IDENT.search(linha)
+        if plot:
+            atual = ('grafico', plot.group(1))
+        elif var and var.group(1) in graficos:
+            atual = ('grafico', graficos[var.group(1)])
+        elif ident:
+            atual = ('camada', _camada(ident.group(1), pais, rotulos))
+        elif var:
+            atual = None
+        acumular(atual or ('script', 'inline'), n)
+
+
+def decompor(html: str) -> dict:
+    """{(tipo, componente): bytes} de um HTML gerado por Folium/Plotly; a soma é o tamanho do arquivo."""
+    partes = defaultdict(int)
+
+    def acumular(chave, n):
+        partes[chave] += n
+
+    rotulos, pais = _rotulos_camadas(html), _pais(html)
+    # var chartN = {...}; Plotly.newPlot('chartN', chartN.data, ...)
+    graficos = {var: div for div, var in _RE_PLOTLY.findall(html) if var}
+    fim = 0
+    for bloco in _RE_BLOCO.finditer(html):
+        _marcacao(html[fim:bloco.start()], acumular)
+        tag, atributos, corpo = bloco.group(1).lower(), bloco.group(2), bloco.group(3)
+        abertura = len(html[bloco.start():bloco.start(3)].encode('utf-8')) + len(f'</{tag}>')
+        if tag == 'style':
+            acumular(('css', 'inline'), abertura + len(corpo.encode('utf-8')))
+        elif 'application/json' in atributos:
+            nome = re.search(r'data-([\w-]+)="([^"]*)"', atributos)
+            acumular(('dados', f'{nome.group(1)}={nome.group(2)}' if nome else 'json'),
+                     abertura + len(corpo.encode('utf-8')))
+        else:
+            acumular(('script', 'inline'), abertura)
+            _componentes_script(corpo, pais, rotulos, graficos, acumular)
+        fim = bloco.end()
+    _marcacao(html[fim:], acumular)
+    return dict(partes)
+
+
+def _marcacao(trecho: str, acumular):
+    imagens = sum(len(m.group(0)) for m in _RE_DATA_URI.finditer(trecho))
+    if imagens:
+        acumular(('imagem', 'data URI'), imagens)
+    acumular(('html', 'marcação'), len(trecho.encode('utf-8')) - imagens)
+
+
+def carregar_orcamento(path: str = ORCAMENTO_JSON) -> dict:
+    """Orçamento padrão do código sobreposto pelo JSON, se existir."""
+    orcamento = json.loads(json.dumps(ORCAMENTO_PADRAO))
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            arquivo = json.load(f)
+        orcamento['padrao'].update(arquivo.get('padrao', {}))
+        orcamento['arquivos'].update(arquivo.get('arquivos', {}))
+    return orcamento
+
+
+def limites(rel: str, orcamento: dict) -> dict:
+    """Limites (KB) do arquivo: padrão + padrões glob de 'arquivos' que casam, na ordem do JSON."""
+    resultado = dict(orcamento['padrao'])
+    for padrao, valores in orcamento['arquivos'].items():
+        if fnmatch.fnmatch(rel, padrao):
+            resultado.update(valores)
+    return resultado
+
+
+def estouros(rel: str, tamanhos: dict, orcamento: dict) -> list:
+    problemas = []
+    for chave, limite_kb in limites(rel, orcamento).items():
+        medida = chave.removesuffix('_kb')
+        if limite_kb is not None and medida in tamanhos and tamanhos[medida] > limite_kb * 1024:
+            problemas.append(f'{rel}: {medida} {tamanhos[medida] / 1024:,.0f} KB > {limite_kb:,} KB')
+    return problemas
+
+
+def publicar(raiz: str = REPO_DIR, conferir_orcamento: bool = True, relatorio: str = RELATORIO_CSV) -> list:
+    """Comprime, relata e confere o orçamento de todos os artefatos; retorna os estouros."""
+    orcamento = carregar_orcamento()
+    linhas, problemas = [], []
+    if brotli is None:
+        print("⚠️ Pacote brotli não instalado: gerando só as variantes .gz (pip install brotli)")
+    for rel in artefatos_publicados(raiz):
+        path = os.path.join(raiz, *rel.split('/'))
+        tamanhos = comprimir(path)
+        with open(path, encoding='utf-8', errors='replace') as f:
+            partes = decompor(f.read())
+        compactado = ' | '.join(f'{k} {v / 1024:,.0f} KB' for k, v in tamanhos.items())
+        print(f"📦 {rel}: {compactado}")
+        for (tipo, componente), n in sorted(partes.items(), key=lambda x: -x[1])[:COMPONENTES_NO_TERMINAL]:
+            print(f"     {n / 1024:>9,.1f} KB  {tipo:8} {componente}")
+        linhas += [{'artefato': rel, 'tipo': tipo, 'componente': componente, 'bytes': n}
+                   for (tipo, componente), n in partes.items()]
+        linhas += [{'artefato': rel, 'tipo': 'arquivo', 'componente': medida, 'bytes': n}
+                   for medida, n in tamanhos.items()]
+        if conferir_orcamento:
+            problemas += estouros(rel, tamanhos, orcamento)
+
+    if relatorio:
+        os.makedirs(os.path.dirname(relatorio), exist_ok=True)
+        tabela = pd.DataFrame(linhas, columns=['artefato', 'tipo', 'componente', 'bytes'])
+        tabela.sort_values(['artefato', 'bytes'], ascending=[True, False]).to_csv(
+            relatorio, index=False, encoding='utf-8-sig')
+        print(f"📊 Decomposição por componente: {os.path.relpath(relatorio, BASE_DIR)}")
+    return problemas
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description="Comprime os HTML publicados e confere o orçamento de tamanho")
+    p.add_argument('--sem-orcamento', action='store_true', help="Não falha quando um arquivo estoura o orçamento")
+    args = p.parse_args()
+
+    problemas = publicar(conferir_orcamento=not args.sem_orcamento)
+    if problemas:
+        print("❌ Orçamento de tamanho estourado:")
+        for problema in problemas:
+            print(f"   • {problema}")
+        sys.exit(1)
+    print("✅ Artefatos comprimidos e dentro do orçamento")
@@ -0,0 +1,140 @@
+"""
+Quantização das coordenadas emitidas nos mapas (GeoJSON e TopoJSON).
+
+O Folium grava as coordenadas com a precisão total do float64 (15-17 dígitos),
+muito além do que um mapa estadual precisa. Aqui as geometrias são encaixadas
+numa grade (padrão 1e-5°, ~1 m) com shapely.set_precision antes de irem para o
+HTML ou para os arquivos ao lado dele: cada coordenada passa a ter no máximo 5
+casas decimais e vértices repetidos no mesmo ponto da grade são eliminados.
+
+Os vértices de uma fronteira compartilhada caem no mesmo ponto da grade dos
+dois lados, então uma cobertura (bacias, municípios) continua sem frestas;
+validar_topologia confere isso (e geometrias válidas, não vazias, com área
+preservada) e quantizar_gdf recusa a grade se algo se perder.
+
+Opcionalmente a camada vira TopoJSON (para_topojson): fronteiras compartilhadas
+guardadas uma única vez como arcos (topologia.extrair_arcos) e coordenadas
+inteiras na grade, codificadas por diferença (delta) ao vértice anterior. O
+carregador de camadas_externas.py decodifica no navegador.
+
+Uso:
+    bacias = quantizar_gdf(bacias_gdf)                     # EPSG:4326, grade 1e-5°
+    topo = para_topojson(bacias, 'bacias', ['bacia', 'cor'])
+"""
+import math
+import numpy as np
+import pandas as pd
+import shapely
+from dissolucao import eh_cobertura_valida
+from topologia import extrair_arcos
+
+GRADE_PADRAO = 1e-5  # graus (~1,1 m no equador)
+TOLERANCIA_AREA = 1e-3  # variação relativa de área aceita por feição
+
+
+def casas_decimais(grade: float = GRADE_PADRAO) -> int:
+    """Casas decimais que representam exatamente a grade (1e-5 -> 5)."""
+    return max(0, math.ceil(-math.log10(grade) - 1e-9))
+
+
+def quantizar(geoms, grade: float = GRADE_PADRAO) -> np.ndarray:
+    """Encaixa as coordenadas na grade (saída sempre válida, ver shapely.set_precision)."""
+    arr = np.asarray(geoms, dtype=object)
+    return shapely.set_precision(arr, grade)
+
+
+def validar_topologia(originais, quantizadas, grade: float = GRADE_PADRAO) -> list:
+    """Problemas introduzidos pela quantização (lista vazia = topologia preservada).
+
+    Confere por feição: geometria válida, não vazia e área (polígonos) dentro
+    de TOLERANCIA_AREA; e, se as originais formavam uma cobertura válida, que a
+    quantizada continue sendo uma.
+    """
+    orig = np.asarray(originais, dtype=object)
+    quant = np.asarray(quantizadas, dtype=object)
+    problemas = []
+    presentes = ~shapely.is_missing(orig) & ~shapely.is_empty(orig)
+    for i in np.flatnonzero(presentes & (shapely.is_missing(quant) | shapely.is_empty(quant))):
+        problemas.append(f'feição {i}: some na grade {grade:g}')
+    for i in np.flatnonzero(presentes & ~shapely.is_missing(quant) & ~shapely.is_valid(quant)):
+        problemas.append(f'feição {i}: geometria inválida')
+    area = shapely.area(orig)
+    variacao = np.abs(shapely.area(quant) - area) / np.where(area > 0, area, 1)
+    for i in np.flatnonzero(presentes & (area > 0) & (variacao > TOLERANCIA_AREA)):
+        problemas.append(f'feição {i}: área muda {variacao[i]:.2%}')
+    if not problemas and eh_cobertura_valida(orig) and not eh_cobertura_valida(quant):
+        problemas.append('a cobertura deixa de ser válida (frestas ou sobreposições)')
+    return problemas
+
+
+def quantizar_gdf(gdf, grade: float = GRADE_PADRAO):
+    """Cópia de gdf em EPSG:4326 com as geometrias na grade; ValueError se a topologia não sobreviver."""
+    gdf = gdf.to_crs(4326) if gdf.crs is not None and gdf.crs.to_epsg() != 4326 else gdf
+    geoms = quantizar(gdf.geometry.values, grade)
+    problemas = validar_topologia(gdf.geometry.values, geoms, grade)
+    if problemas:
+        raise ValueError(f'Grade {grade:g} altera a topologia: ' + '; '.join(problemas[:5]))
+    out = gdf.copy()
+    out['geometry'] = geoms
+    return out
+
+
+def _delta(coords: np.ndarray) -> list:
+    """Coordenadas inteiras da grade -> primeira posição + diferenças (TopoJSON delta encoding)."""
+    return np.diff(coords, axis=0, prepend=[[0, 0]]).tolist()
+
+
+def _propriedades(gdf, colunas):
+    if colunas is None:
+        colunas = [c for c in gdf.columns if c != gdf.geometry.name]
+    dados = pd.DataFrame(gdf[list(colunas)])
+    return dados.astype(object).where(dados.notna(), None).to_dict(orient='records')
+
+
+def para_topojson(gdf, nome: str, colunas=None, grade: float = GRADE_PADRAO) -> dict:
+    """Topology com um objeto 'nome' (GeometryCollection) a partir de gdf em EPSG:4326.
+
+    Polígonos viram referências a arcos compartilhados (índice negativo ~i =
+    arco i invertido); pontos levam a posição inteira na grade. Outras
+    geometrias não são suportadas (ValueError).
+    """
+    geoms = quantizar(gdf.geometry.values, grade)
+    tipos = set(shapely.get_type_id(geoms[~shapely.is_missing(geoms)]).tolist())
+    if not tipos <= {0, 3, 6}:
+        raise ValueError('para_topojson aceita só Point, Polygon e MultiPolygon')
+    x0, y0 = (shapely.total_bounds(geoms)[:2] if len(geoms) else (0.0, 0.0))
+
+    def na_grade(xy):
+        return np.rint((np.asarray(xy) - [x0, y0]) / grade).astype(np.int64)
+
+    # arcos compartilhados das partes poligonais (na grade, vértices coincidem exatamente)
+    poligonos = {}
+    arcos = []
+    topologia = extrair_arcos(geoms)
+    if topologia is not None:
+        aneis, ids_arcos, _, referencias, xy = topologia
+        xy_grade = na_grade(xy)
+        arcos = [_delta(xy_grade[ids]) for ids in ids_arcos]
+        for (i, j, _, _), refs in zip(aneis, referencias):
+            anel = [~a if invertido else a for a, invertido in refs]
+            poligonos.setdefault(i, {}).setdefault(j, []).append(anel)
+
+    geometrias = []
+    for i, (geom, props) in enumerate(zip(geoms, _propriedades(gdf, colunas))):
+        if geom is None or geom.is_empty:
+            g = {'type': None}
+        elif geom.geom_type == 'Point':
+            g = {'type': 'Point', 'coordinates': na_grade(shapely.get_coordinates(geom))[0].tolist()}
+        elif geom.geom_type == 'Polygon':
+            g = {'type': 'Polygon', 'arcs': poligonos[i][0]}
+        else:
+            g = {'type': 'MultiPolygon', 'arcs': [aneis_p for _, aneis_p in sorted(poligonos[i].items())]}
+        g['properties'] = props
+        geometrias.append(g)
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [grade, grade], 'translate': [float(x0), float(y0)]},
+        'objects': {nome: {'type': 'GeometryCollection', 'geometries': geometrias}},
+        'arcs': arcos,
+    }
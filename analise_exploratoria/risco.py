@@ -0,0 +1,86 @@
+"""
+Classificação de risco de contaminação por colunas inteiras (sem apply linha a linha).
+
+Cada indicador tem limites crescentes; um valor cai na classe i quando
+limites[i-1] < valor <= limites[i] (mesma regra dos if/elif anteriores:
+>200k CRÍTICO, >100k ALTO, >50k MÉDIO, senão BAIXO). A classificação é um
+np.searchsorted sobre a coluna, devolvida como Categorical ordenado, e a cor é
+uma consulta na tabela de cores da categoria.
+
+Limites, rótulos e cores vêm de config/risco.json (se existir) e podem ser
+alterados sem tocar no código. Indicadores disponíveis:
+- domestico_t_ano:        volume absoluto (t/ano)
+- per_capita_kg_hab_ano:  domestico_t_ano / populacao * 1000
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RISCO_JSON = os.path.join(BASE_DIR, 'config', 'risco.json')
+
+ROTULOS_PADRAO = ['BAIXO', 'MÉDIO', 'ALTO', 'CRÍTICO']
+CORES_PADRAO = {'BAIXO': '#388e3c', 'MÉDIO': '#fbc02d', 'ALTO': '#f57c00', 'CRÍTICO': '#d32f2f'}
+CONFIG_PADRAO = {
+    'indicador_padrao': 'domestico_t_ano',
+    'indicadores': {
+        'domestico_t_ano': {'limites': [50000, 100000, 200000]},
+        'per_capita_kg_hab_ano': {'limites': [300, 400, 500]},
+    },
+    'rotulos': ROTULOS_PADRAO,
+    'cores': CORES_PADRAO,
+}
+
+
+def carregar_config(path: str = RISCO_JSON) -> dict:
+    """Configuração de risco: padrão do código sobreposto pelo JSON, se existir."""
+    config = json.loads(json.dumps(CONFIG_PADRAO))
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            arquivo = json.load(f)
+        config['indicadores'].update(arquivo.get('indicadores', {}))
+        for chave in ('indicador_padrao', 'rotulos', 'cores'):
+            if chave in arquivo:
+                config[chave] = arquivo[chave]
+    for nome, ind in config['indicadores'].items():
+        if len(ind['limites']) != len(config['rotulos']) - 1:
+            raise ValueError(f"Indicador '{nome}': {len(config['rotulos'])} rótulos exigem "
+                             f"{len(config['rotulos']) - 1} limites")
+        if list(ind['limites']) != sorted(ind['limites']):
+            raise ValueError(f"Indicador '{nome}': limites devem ser crescentes")
+    return config
+
+
+def calcular_indicadores(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas de indicadores derivados (per capita) calculadas de forma vetorizada."""
+    out = pd.DataFrame(index=df.index)
+    out['domestico_t_ano'] = df['domestico_t_ano']
+    if 'populacao' in df.columns:
+        pop = df['populacao'].where(df['populacao'] > 0)
+        out['per_capita_kg_hab_ano'] = df['domestico_t_ano'] / pop * 1000
+    return out
+
+
+def classificar_risco(df: pd.DataFrame, indicador: str = None, config: dict = None):
+    """Retorna (risco, cor) para todas as linhas de df.
+
+    risco: Series Categorical ordenada com os rótulos da configuração
+    cor:   Series com a cor hexadecimal de cada classe
+    Valores ausentes caem na classe mais baixa (como na regra if/elif original).
+    """
+    config = config or carregar_config()
+    indicador = indicador or config['indicador_padrao']
+    if indicador not in config['indicadores']:
+        raise KeyError(f"Indicador de risco desconhecido: {indicador}")
+
+    valores = calcular_indicadores(df)[indicador].to_numpy(dtype=float)
+    limites = np.asarray(config['indicadores'][indicador]['limites'], dtype=float)
+    classes = np.searchsorted(limites, np.nan_to_num(valores, nan=-np.inf), side='left')
+
+    rotulos = list(config['rotulos'])
+    risco = pd.Series(pd.Categorical.from_codes(classes, categories=rotulos, ordered=True),
+                      index=df.index, name='risco')
+    cores = np.array([config['cores'].get(r, '#999999') for r in rotulos], dtype=object)
+    cor = pd.Series(cores[classes], index=df.index, name='cor_risco')
+    return risco, cor
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos de analise_exploratoria se importam pelo nome (os scripts rodam nesta pasta)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,118 @@
+"""
+Download paginado e retomável de ana_ottobacias.py contra um servidor HTTP local
+que imita a API REST do ArcGIS (metadados da camada, returnCountOnly e páginas
+por resultOffset/resultRecordCount, limitadas a um maxRecordCount pequeno).
+"""
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+import ana_ottobacias
+
+TOTAL = 10
+MAX_REGISTROS = 3
+BBOX = (-53.8, -29.4, -48.3, -25.9)
+
+
+def _feicao(oid):
+    x, y = -50 + oid * 0.01, -27
+    return {'type': 'Feature', 'properties': {'OBJECTID': oid},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[x, y], [x + 0.01, y], [x, y + 0.01], [x, y]]]}}
+
+
+class _ArcGIS(BaseHTTPRequestHandler):
+    consultas = []  # (camada, offset, quantidade) das páginas pedidas
+    metadados = []  # camadas cujos metadados foram pedidos
+    trava = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        partes = url.path.strip('/').split('/')  # MapServer/<camada>[/query]
+        if len(partes) == 2:
+            with self.trava:
+                self.metadados.append(int(partes[1]))
+            resposta = {'geometryType': 'esriGeometryPolygon', 'maxRecordCount': MAX_REGISTROS,
+                        'objectIdField': 'OBJECTID'}
+        elif params.get('returnCountOnly') == 'true':
+            resposta = {'count': TOTAL}
+        else:
+            offset, quantidade = int(params['resultOffset']), int(params['resultRecordCount'])
+            if quantidade > MAX_REGISTROS:
+                resposta = {'error': {'code': 400, 'message': 'resultRecordCount > maxRecordCount'}}
+            else:
+                with self.trava:
+                    self.consultas.append((int(partes[1]), offset, quantidade))
+                fim = min(offset + quantidade, TOTAL)
+                resposta = {'type': 'FeatureCollection', 'features': [_feicao(i) for i in range(offset, fim)]}
+        corpo = json.dumps(resposta).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    _ArcGIS.consultas.clear()
+    _ArcGIS.metadados.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _ArcGIS)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/MapServer'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def paginas(tmp_path, monkeypatch):
+    pasta = tmp_path / 'paginas'
+    monkeypatch.setattr(ana_ottobacias, 'PAGINAS_DIR', str(pasta))
+    return pasta
+
+
+def _oids(saida):
+    with open(saida, encoding='utf-8') as f:
+        return [feicao['properties']['OBJECTID'] for feicao in json.load(f)['features']]
+
+
+def test_baixa_todas_as_paginas(servidor, paginas, tmp_path):
+    saida = str(tmp_path / 'ottobacias.geojson')
+    ana_ottobacias.baixar_ottobacias(BBOX, base_url=servidor, workers=3, saida=saida)
+
+    assert sorted(_ArcGIS.consultas) == [(0, 0, 3), (0, 3, 3), (0, 6, 3), (0, 9, 3)]
+    assert _oids(saida) == list(range(TOTAL))
+    with open(paginas / 'manifesto.json', encoding='utf-8') as f:
+        manifesto = json.load(f)
+    assert manifesto['camada_info'] == {'camada': 0, 'total': TOTAL, 'max_registros': MAX_REGISTROS,
+                                        'campo_id': 'OBJECTID'}
+    assert manifesto['tamanho_pagina'] == MAX_REGISTROS
+    assert not [n for n in os.listdir(paginas) + os.listdir(tmp_path) if n.endswith('.tmp')]
+
+
+def test_retomada_baixa_so_a_pagina_que_falta(servidor, paginas, tmp_path):
+    saida = str(tmp_path / 'ottobacias.geojson')
+    ana_ottobacias.baixar_ottobacias(BBOX, base_url=servidor, workers=3, saida=saida)
+    os.remove(paginas / 'pagina_00000003.geojson')
+    _ArcGIS.consultas.clear()
+    _ArcGIS.metadados.clear()
+
+    ana_ottobacias.baixar_ottobacias(BBOX, base_url=servidor, workers=3, saida=saida)
+
+    assert _ArcGIS.consultas == [(0, 3, 3)]
+    assert _ArcGIS.metadados == []  # camada reaproveitada do manifesto
+    assert _oids(saida) == list(range(TOTAL))
+
+
+def test_tamanho_de_pagina_limitado_ao_servico(servidor, paginas, tmp_path):
+    saida = str(tmp_path / 'ottobacias.geojson')
+    ana_ottobacias.baixar_ottobacias(BBOX, base_url=servidor, workers=2, tamanho_pagina=100, saida=saida)
+    assert {q for _, _, q in _ArcGIS.consultas} == {MAX_REGISTROS}
+    assert _oids(saida) == list(range(TOTAL))
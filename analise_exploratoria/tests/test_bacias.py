@@ -0,0 +1,57 @@
+"""
+Classificação de municípios em bacias (bacias.py): código IBGE exato primeiro,
+nome normalizado exato como alternativa.
+"""
+import pandas as pd
+import pytest
+from bacias import (BACIAS_SC, OUTRAS_BACIAS, carregar_tabela_codigos, classificar_bacias,
+                    gerar_tabela_codigos)
+
+SAO_JOSE, SAO_JOSE_DO_CEDRO = '4216602', '4216701'
+
+
+def test_tabela_de_codigos_cobre_bacias_sc():
+    tabela = carregar_tabela_codigos()
+    referencias = [m for municipios in BACIAS_SC.values() for m in municipios]
+    assert len(tabela) == len(referencias)
+    assert set(tabela.values()) == set(BACIAS_SC)
+    assert all(len(c) == 7 and c.startswith('42') for c in tabela)
+
+
+def test_sao_jose_nao_captura_sao_jose_do_cedro():
+    bacias = classificar_bacias(['São José', 'São José do Cedro'], [int(SAO_JOSE), int(SAO_JOSE_DO_CEDRO)])
+    assert bacias.tolist() == ['Bacia Litorânea Central', OUTRAS_BACIAS]
+
+
+def test_codigo_tem_precedencia_sobre_o_nome():
+    # nome fora do padrão (abreviado), mas o código resolve; código como float/texto também
+    bacias = classificar_bacias(['S. José', 'Sao Jose - SC'], [float(SAO_JOSE), SAO_JOSE])
+    assert bacias.tolist() == ['Bacia Litorânea Central'] * 2
+
+
+def test_nome_quando_o_codigo_nao_esta_na_tabela():
+    nomes = ['Blumenau - SC', 'CHAPECÓ', 'São José do Cedro']
+    assert classificar_bacias(nomes, ['4299999', None, SAO_JOSE_DO_CEDRO]).tolist() == \
+        ['Bacia do Itajaí', 'Bacia do Uruguai', OUTRAS_BACIAS]
+    assert classificar_bacias(nomes).tolist() == ['Bacia do Itajaí', 'Bacia do Uruguai', OUTRAS_BACIAS]
+
+
+def test_gerar_tabela_codigos(tmp_path):
+    municipios = pd.DataFrame({'CD_MUN': [4216602, 4216701, 4202404],
+                               'NM_MUN': ['São José', 'São José do Cedro', 'Blumenau']})
+    bacias = {'Litoral': ['São José'], 'Vale': ['Blumenau']}
+    path = tmp_path / 'bacias_municipios.csv'
+    gerar_tabela_codigos(municipios, bacias, str(path))
+
+    tabela = carregar_tabela_codigos(str(path))
+    assert tabela == {SAO_JOSE: 'Litoral', '4202404': 'Vale'}
+    assert classificar_bacias(municipios['NM_MUN'], municipios['CD_MUN'], tabela, bacias=bacias).tolist() == \
+        ['Litoral', OUTRAS_BACIAS, 'Vale']
+
+
+@pytest.mark.parametrize('nomes', [['Blumenau'], ['Blumenau', 'Blumenau']], ids=['ausente', 'ambiguo'])
+def test_gerar_tabela_codigos_falha_sem_codigo_unico(nomes):
+    municipios = pd.DataFrame({'CD_MUN': [4216602 + i for i in range(len(nomes))], 'NM_MUN': nomes})
+    with pytest.raises(ValueError):
+        gerar_tabela_codigos(municipios, {'Litoral': ['São José']} if len(nomes) == 1 else {'Vale': ['Blumenau']},
+                             path=None)
@@ -0,0 +1,65 @@
+"""
+dissolucao.dissolver: coverage union dá as mesmas geometrias que a união genérica
+(GeoDataFrame.dissolve) numa cobertura válida, e entradas sobrepostas caem na
+união genérica.
+"""
+import geopandas as gpd
+import pytest
+import shapely
+import dissolucao
+from dissolucao import dissolver, eh_cobertura_valida
+
+pytestmark = pytest.mark.skipif(not hasattr(shapely, 'coverage_is_valid'),
+                                reason='coverage union requer shapely >= 2.1')
+
+
+@pytest.fixture
+def cobertura():
+    # Grade 4x4 de quadrados (arestas compartilhadas idênticas) em 3 grupos, um deles em duas partes
+    quadrados = [shapely.box(x, y, x + 1, y + 1) for y in range(4) for x in range(4)]
+    grupos = ['a' if x < 2 else ('b' if y < 2 else 'c') for y in range(4) for x in range(4)]
+    grupos[15] = 'a'  # canto (3, 3): 'a' vira MultiPolygon
+    return gpd.GeoDataFrame({'grupo': grupos, 'n': range(16)}, geometry=quadrados, crs='EPSG:3857')
+
+
+@pytest.fixture
+def algoritmos(monkeypatch):
+    usados = []
+    original = dissolucao._uniao
+
+    def registrar(geoms, cobertura):
+        usados.append(cobertura)
+        return original(geoms, cobertura)
+    monkeypatch.setattr(dissolucao, '_uniao', registrar)
+    return usados
+
+
+def _conferir(resultado, esperado):
+    assert list(resultado.index) == list(esperado.index)
+    for grupo in esperado.index:
+        assert resultado.geometry[grupo].equals(esperado.geometry[grupo]), grupo
+    assert resultado.drop(columns='geometry').equals(esperado.drop(columns='geometry'))
+
+
+def test_cobertura_igual_a_uniao_generica(cobertura, algoritmos):
+    assert eh_cobertura_valida(cobertura.geometry.values)
+    rapido = dissolver(cobertura, by='grupo', workers=1)
+    assert set(algoritmos) == {True}
+    _conferir(rapido, cobertura.dissolve(by='grupo'))
+    _conferir(rapido, dissolver(cobertura, by='grupo', cobertura=False, workers=1))
+    assert rapido.geometry['a'].geom_type == 'MultiPolygon'
+
+
+def test_sobreposicao_usa_uniao_generica(cobertura, algoritmos):
+    sobreposta = cobertura.copy()
+    sobreposta.loc[0, 'geometry'] = shapely.box(0, 0, 1.5, 1.5)  # invade os vizinhos
+    assert not eh_cobertura_valida(sobreposta.geometry.values)
+    resultado = dissolver(sobreposta, by='grupo', workers=1)
+    assert set(algoritmos) == {False}
+    _conferir(resultado, sobreposta.dissolve(by='grupo'))
+
+
+def test_paralelo_igual_ao_serial(cobertura):
+    _conferir(dissolver(cobertura, by='grupo', workers=2), dissolver(cobertura, by='grupo', workers=1))
+    tudo = dissolver(cobertura, workers=1)
+    assert len(tudo) == 1 and tudo.geometry[0].equals(shapely.box(0, 0, 4, 4))
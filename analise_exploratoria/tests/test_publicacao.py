@@ -0,0 +1,112 @@
+"""
+publicacao.py: decomposição do HTML por componente (a soma fecha com o tamanho
+do arquivo), precedência dos padrões do orçamento e variantes comprimidas.
+"""
+import gzip
+import json
+import os
+import pytest
+from publicacao import carregar_orcamento, comprimir, decompor, estouros, limites
+
+
+def _id(prefixo, n):
+    return f'{prefixo}_{n:032x}'
+
+
+MAPA, GRUPO, GEOJSON, POPUP, MARCADOR, CONTROLE = (
+    _id('map', 1), _id('feature_group', 2), _id('geo_json', 3), _id('popup', 4),
+    _id('circle_marker', 5), _id('layer_control', 6))
+IMAGEM = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+JSON_ATRIBUTOS = '{"chave": "bacia", "registros": {"Bacia do Itajaí": {"populacao": 1000}}}'
+GRAFICO = 'var chart1 = {"data": [{"x": [1, 2, 3], "y": [4, 5, 6], "type": "bar"}], "layout": {}};\n'
+
+HTML = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>#{MAPA} {{ height: 100%; }}</style>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+</head>
+<body>
+<div class="folium-map" id="{MAPA}"></div>
+<img src="{IMAGEM}">
+<script type="application/json" data-atributos="bacias">{JSON_ATRIBUTOS}</script>
+<script>
+    var {MAPA} = L.map("{MAPA}", {{center: [-27.5, -50.5], zoom: 7}});
+    var {GRUPO} = L.featureGroup({{}});
+    var {GEOJSON} = L.geoJson(null, {{}});
+    {GEOJSON}.addData({{"type": "FeatureCollection", "features": [{{"type": "Feature", "properties": {{"bacia": "Bacia do Itajaí"}}, "geometry": null}}]}});
+    {GEOJSON}.addTo({GRUPO});
+    var {POPUP} = L.popup({{"maxWidth": 400}});
+    {GEOJSON}.bindPopup({POPUP});
+    {GRUPO}.addTo({MAPA});
+    var {MARCADOR} = L.circleMarker([-27.0, -49.0], {{"radius": 5}}).addTo({MAPA});
+    var {CONTROLE} = {{base_layers: {{}}, overlays: {{"\\ud83c\\udf0a Bacias": {GRUPO}}}}};
+</script>
+<script>
+{GRAFICO}Plotly.newPlot('chart1', chart1.data, chart1.layout);
+</script>
+</body>
+</html>
+"""
+
+
+def test_decompor_soma_o_tamanho_do_arquivo():
+    partes = decompor(HTML)
+    assert sum(partes.values()) == len(HTML.encode('utf-8'))
+
+
+def test_decompor_componentes():
+    partes = decompor(HTML)
+    abertura = '<script type="application/json" data-atributos="bacias">'
+    assert partes[('dados', 'atributos=bacias')] == len((abertura + JSON_ATRIBUTOS + '</script>').encode('utf-8'))
+    assert partes[('imagem', 'data URI')] == len(IMAGEM)
+    assert partes[('grafico', 'chart1')] >= len(GRAFICO)
+    # geo_json, seu popup e o grupo somam na camada do LayerControl; o marcador solto, no seu tipo
+    inicios = (f'var {GRUPO}', f'var {GEOJSON}', GEOJSON, f'var {POPUP}', GRUPO)
+    linhas = [l for l in HTML.splitlines(keepends=True) if l.strip().startswith(inicios)]
+    assert len(linhas) == 7
+    assert partes[('camada', '🌊 Bacias')] == sum(len(l.encode('utf-8')) for l in linhas)
+    assert ('camada', 'circle_marker') in partes
+    assert not any(tipo == 'camada' and nome.startswith(('geo_json', 'popup', 'feature_group'))
+                   for tipo, nome in partes)
+    assert {tipo for tipo, _ in partes} == {'html', 'css', 'script', 'dados', 'imagem', 'camada', 'grafico'}
+
+
+@pytest.fixture
+def orcamento(tmp_path):
+    path = tmp_path / 'orcamento.json'
+    path.write_text(json.dumps({
+        'padrao': {'gzip_kb': 100},
+        'arquivos': {
+            '*.html': {'gzip_kb': 80},
+            'docs/*.html': {'gzip_kb': 40, 'bruto_kb': None},
+            'docs/mapa_*.html': {'gzip_kb': 400},
+        },
+    }), encoding='utf-8')
+    return carregar_orcamento(str(path))
+
+
+def test_limites_padroes_posteriores_prevalecem(orcamento):
+    assert orcamento['padrao'] == {'bruto_kb': 2048, 'gzip_kb': 100}  # padrão do código sobreposto pelo JSON
+    assert limites('index.html', orcamento) == {'bruto_kb': 2048, 'gzip_kb': 80}
+    assert limites('docs/dashboard.html', orcamento) == {'bruto_kb': None, 'gzip_kb': 40}
+    assert limites('docs/mapa_regioes.html', orcamento) == {'bruto_kb': None, 'gzip_kb': 400}
+    assert limites('relatorio.pdf', orcamento) == {'bruto_kb': 2048, 'gzip_kb': 100}
+
+
+def test_estouros(orcamento):
+    grande = {'bruto': 3000 * 1024, 'gzip': 60 * 1024}
+    assert estouros('docs/dashboard.html', grande, orcamento) == ['docs/dashboard.html: gzip 60 KB > 40 KB']
+    assert estouros('index.html', grande, orcamento) == ['index.html: bruto 3,000 KB > 2,048 KB']
+    assert estouros('docs/mapa_regioes.html', grande, orcamento) == []
+
+
+def test_comprimir(tmp_path):
+    path = tmp_path / 'index.html'
+    path.write_text(HTML, encoding='utf-8')
+    tamanhos = comprimir(str(path))
+    assert gzip.decompress((tmp_path / 'index.html.gz').read_bytes()).decode('utf-8') == HTML
+    assert tamanhos['bruto'] == len(HTML.encode('utf-8'))
+    assert tamanhos['gzip'] == os.path.getsize(tmp_path / 'index.html.gz')
+    assert not [n for n in os.listdir(tmp_path) if n.endswith('.tmp')]
@@ -0,0 +1,296 @@
+"""
+Testes de ida e volta do codificador MVT e do gravador PMTiles v3 de tiles_setores.py.
+
+Um byte errado nesses formatos só aparece como mapa em branco no navegador,
+então os tiles e o arquivo são lidos de volta aqui por decodificadores mínimos
+escritos a partir das especificações (Mapbox Vector Tile 2.1 e PMTiles v3) e,
+quando instalados, pelas implementações de referência (mapbox_vector_tile,
+pmtiles).
+"""
+import gzip
+import random
+import struct
+import numpy as np
+import pytest
+import shapely
+from tiles_setores import (EXTENT, _aneis_tile, _diretorios, codificar_tile, escrever_pmtiles, tile_id)
+
+
+# ===== Decodificadores mínimos =====
+
+def _ler_varint(buf, i):
+    n = deslocamento = 0
+    while True:
+        b = buf[i]
+        i += 1
+        n |= (b & 0x7f) << deslocamento
+        deslocamento += 7
+        if b < 0x80:
+            return n, i
+
+
+def _campos(buf):
+    """(campo, tipo, valor) de uma mensagem protobuf."""
+    i = 0
+    while i < len(buf):
+        chave, i = _ler_varint(buf, i)
+        campo, tipo = chave >> 3, chave & 7
+        if tipo == 0:
+            valor, i = _ler_varint(buf, i)
+        elif tipo == 1:
+            valor, i = buf[i:i + 8], i + 8
+        elif tipo == 2:
+            n, i = _ler_varint(buf, i)
+            valor, i = buf[i:i + n], i + n
+        else:
+            raise ValueError(f'tipo protobuf inesperado: {tipo}')
+        yield campo, tipo, valor
+
+
+def _varints(buf):
+    valores, i = [], 0
+    while i < len(buf):
+        v, i = _ler_varint(buf, i)
+        valores.append(v)
+    return valores
+
+
+def _dezigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _geometria(comandos):
+    """Comandos MVT -> lista de anéis [(x, y), ...] (sem repetir o primeiro vértice)."""
+    aneis, cursor, i = [], [0, 0], 0
+    while i < len(comandos):
+        cmd, n = comandos[i] & 7, comandos[i] >> 3
+        i += 1
+        if cmd == 7:
+            assert n == 1
+            continue
+        assert cmd in (1, 2)
+        if cmd == 1:
+            assert n == 1
+            aneis.append([])
+        for _ in range(n):
+            cursor = [cursor[0] + _dezigzag(comandos[i]), cursor[1] + _dezigzag(comandos[i + 1])]
+            aneis[-1].append(tuple(cursor))
+            i += 2
+    return aneis
+
+
+def _valor(buf):
+    (campo, _, v), = _campos(buf)
+    if campo == 1:
+        return bytes(v).decode('utf-8')
+    if campo == 3:
+        return struct.unpack('<d', v)[0]
+    if campo == 6:
+        return _dezigzag(v)
+    raise ValueError(f'campo de valor inesperado: {campo}')
+
+
+def decodificar_tile(dados):
+    camadas = {}
+    for campo, _, camada in _campos(dados):
+        assert campo == 3
+        info = {'feicoes': [], 'chaves': [], 'valores': []}
+        feicoes = []
+        for c, _, v in _campos(camada):
+            if c == 1:
+                info['nome'] = bytes(v).decode('utf-8')
+            elif c == 2:
+                feicoes.append({k: v2 for k, _, v2 in _campos(v)})
+            elif c == 3:
+                info['chaves'].append(bytes(v).decode('utf-8'))
+            elif c == 4:
+                info['valores'].append(_valor(v))
+            elif c == 5:
+                info['extent'] = v
+            elif c == 15:
+                info['versao'] = v
+        for f in feicoes:
+            tags = _varints(f[2])
+            props = {info['chaves'][k]: info['valores'][v] for k, v in zip(tags[::2], tags[1::2])}
+            info['feicoes'].append((f[1], f[3], props, _geometria(_varints(f[4]))))
+        camadas[info['nome']] = info
+    return camadas
+
+
+def _area(anel):
+    a = np.asarray(anel)
+    return np.sum(a[:, 0] * np.roll(a[:, 1], -1) - np.roll(a[:, 0], -1) * a[:, 1]) / 2
+
+
+def _entradas_diretorio(comprimido):
+    buf = gzip.decompress(comprimido)
+    valores = _varints(buf)
+    n = valores[0]
+    ids = np.cumsum(valores[1:1 + n]).tolist()
+    runs = valores[1 + n:1 + 2 * n]
+    tamanhos = valores[1 + 2 * n:1 + 3 * n]
+    offsets = []
+    for i, o in enumerate(valores[1 + 3 * n:1 + 4 * n]):
+        offsets.append(offsets[-1] + tamanhos[i - 1] if o == 0 else o - 1)
+    return list(zip(ids, offsets, tamanhos, runs))
+
+
+def _buscar(raiz, folhas, tid):
+    """(offset, length) do tile tid nos diretórios (raiz + folhas), ou None."""
+    entradas = _entradas_diretorio(raiz)
+    while True:
+        candidatas = [e for e in entradas if e[0] <= tid]
+        if not candidatas:
+            return None
+        e = candidatas[-1]
+        if e[3] == 0:  # folha
+            entradas = _entradas_diretorio(folhas[e[1]:e[1] + e[2]])
+            continue
+        return (e[1], e[2]) if tid < e[0] + e[3] else None
+
+
+# ===== MVT =====
+
+@pytest.fixture
+def poligono_com_furo():
+    return shapely.Polygon([(0, 0), (100, 0), (100, 100), (0, 100)], [[(25, 25), (25, 75), (75, 75), (75, 25)]])
+
+
+def test_aneis_tile_orientacao_da_especificacao(poligono_com_furo):
+    # Anel externo com área positiva e furo negativa, em coordenadas do tile (y para baixo)
+    externo, furo = _aneis_tile(poligono_com_furo, 0.0, 100.0, 10.0)
+    assert _area(externo) > 0
+    assert _area(furo) < 0
+    assert sorted(map(tuple, externo.tolist())) == [(0, 0), (0, 1000), (1000, 0), (1000, 1000)]
+
+
+def test_tile_ida_e_volta(poligono_com_furo):
+    aneis = _aneis_tile(poligono_com_furo, 0.0, 100.0, 10.0)
+    outro = _aneis_tile(shapely.box(110, 10, 120, 20), 0.0, 100.0, 10.0)
+    feicoes = [
+        (7, {'nome': 'Setor Á', 'pop': 1234, 'saldo': -5, 'dens': 12.5, 'vazio': None}, aneis),
+        (300, {'nome': 'Setor Á', 'pop': 7, 'dens': float('nan')}, outro),
+    ]
+    camada = decodificar_tile(codificar_tile(feicoes, nome='setores'))['setores']
+
+    assert camada['versao'] == 2
+    assert camada['extent'] == EXTENT
+    assert camada['valores'].count('Setor Á') == 1  # valores repetidos vão uma vez na tabela
+    (id1, tipo1, props1, geom1), (id2, tipo2, props2, geom2) = camada['feicoes']
+    assert (id1, tipo1, id2, tipo2) == (7, 3, 300, 3)
+    assert props1 == {'nome': 'Setor Á', 'pop': 1234, 'saldo': -5, 'dens': 12.5}
+    assert props2 == {'nome': 'Setor Á', 'pop': 7}
+    assert geom1 == [list(map(tuple, a.tolist())) for a in aneis]
+    assert geom2 == [list(map(tuple, a.tolist())) for a in outro]
+
+
+def test_tile_confere_com_mapbox_vector_tile(poligono_com_furo):
+    mvt = pytest.importorskip('mapbox_vector_tile')
+    aneis = _aneis_tile(poligono_com_furo, 0.0, 100.0, 10.0)
+    dados = codificar_tile([(7, {'nome': 'Setor', 'pop': 1234, 'dens': 12.5}, aneis)], nome='setores')
+    camada = mvt.decode(dados, default_options={'y_coord_down': True})['setores']
+    assert camada['extent'] == EXTENT
+    feicao, = camada['features']
+    assert feicao['id'] == 7
+    assert feicao['properties'] == {'nome': 'Setor', 'pop': 1234, 'dens': 12.5}
+    assert feicao['geometry']['type'] == 'Polygon'
+    recebidos = [[tuple(p) for p in anel[:-1]] for anel in feicao['geometry']['coordinates']]
+    assert recebidos == [list(map(tuple, a.tolist())) for a in aneis]
+
+
+# ===== PMTiles =====
+
+# Valores de referência do TileID (curva de Hilbert por zoom, especificação PMTiles v3)
+TILE_IDS = {
+    (0, 0, 0): 0,
+    (1, 0, 0): 1, (1, 0, 1): 2, (1, 1, 1): 3, (1, 1, 0): 4,
+    (2, 0, 0): 5, (2, 3, 3): 15,
+    (3, 0, 0): 21, (3, 0, 7): 42, (3, 7, 7): 63, (3, 7, 0): 84,
+    (12, 3423, 1763): 19078479,
+}
+
+
+@pytest.mark.parametrize('zxy, esperado', TILE_IDS.items())
+def test_tile_id_valores_de_referencia(zxy, esperado):
+    assert tile_id(*zxy) == esperado
+
+
+def test_tile_id_cobre_z0_a_z3_sem_repeticao():
+    ids = [tile_id(z, x, y) for z in range(4) for x in range(1 << z) for y in range(1 << z)]
+    assert sorted(ids) == list(range(85))
+
+
+@pytest.fixture
+def arquivo_pmtiles(tmp_path):
+    tiles = {
+        (0, 0, 0): b'A',
+        (1, 0, 0): b'XX', (1, 0, 1): b'XX',  # tile_ids 1 e 2: mesma entrada com run_length 2
+        (1, 1, 1): b'YYY',
+        (1, 1, 0): b'XX',                    # conteúdo repetido, não contíguo: nova entrada, mesmo offset
+    }
+    path = tmp_path / 'teste.pmtiles'
+    escrever_pmtiles(str(path), tiles, {'name': 'teste'}, (-53.8, -29.4, -48.3, -25.9))
+    return path, tiles
+
+
+def test_pmtiles_cabecalho(arquivo_pmtiles):
+    path, _ = arquivo_pmtiles
+    dados = path.read_bytes()
+    q = lambda pos: struct.unpack_from('<Q', dados, pos)[0]
+    i32 = lambda pos: struct.unpack_from('<i', dados, pos)[0]
+
+    assert dados[:7] == b'PMTiles' and dados[7] == 3
+    assert q(8) == 127                         # diretório raiz logo após o cabeçalho
+    assert q(24) == q(8) + q(16)               # metadados
+    assert q(40) == q(24) + q(32)              # folhas (vazias aqui)
+    assert q(48) == 0
+    assert q(56) == q(40) + q(48)              # dados dos tiles
+    assert q(56) + q(64) == len(dados)
+    assert (q(72), q(80), q(88)) == (5, 4, 3)  # tiles endereçados, entradas, conteúdos
+    assert tuple(dados[96:102]) == (1, 2, 2, 1, 0, 1)  # clustered, gzip, gzip, MVT, zoom 0-1
+    assert (i32(102), i32(106), i32(110), i32(114)) == (-538000000, -294000000, -483000000, -259000000)
+    assert dados[118] == 0
+    assert b'"teste"' in gzip.decompress(dados[q(24):q(24) + q(32)])
+
+
+def test_pmtiles_busca_no_diretorio(arquivo_pmtiles):
+    path, tiles = arquivo_pmtiles
+    dados = path.read_bytes()
+    raiz_ini, raiz_len, dados_ini = (struct.unpack_from('<Q', dados, p)[0] for p in (8, 16, 56))
+    raiz = dados[raiz_ini:raiz_ini + raiz_len]
+
+    assert _entradas_diretorio(raiz) == [(0, 0, 1, 1), (1, 1, 2, 2), (3, 3, 3, 1), (4, 1, 2, 1)]
+    for zxy, conteudo in tiles.items():
+        offset, tamanho = _buscar(raiz, b'', tile_id(*zxy))
+        assert dados[dados_ini + offset:dados_ini + offset + tamanho] == conteudo
+    assert _buscar(raiz, b'', tile_id(2, 0, 0)) is None
+
+
+def test_pmtiles_diretorios_folha():
+    # Entradas demais para a raiz: folhas, com a raiz ainda nos primeiros 16 KB
+    rng = random.Random(0)
+    entradas, offset = [], 0
+    for tid in range(0, 120000, 2):
+        tamanho = rng.randint(1, 1 << 20)
+        entradas.append((tid, offset, tamanho, 1))
+        offset += tamanho
+    raiz, folhas = _diretorios(entradas)
+    assert folhas
+    assert len(raiz) <= 16384 - 127
+    for tid, off, tamanho, _ in rng.sample(entradas, 200):
+        assert _buscar(raiz, folhas, tid) == (off, tamanho)
+    assert _buscar(raiz, folhas, 1) is None
+
+
+def test_pmtiles_confere_com_leitor_de_referencia(arquivo_pmtiles):
+    pytest.importorskip('pmtiles')
+    from pmtiles.reader import Reader, MmapSource
+    path, tiles = arquivo_pmtiles
+    with open(path, 'rb') as f:
+        leitor = Reader(MmapSource(f))
+        cabecalho = leitor.header()
+        assert (cabecalho['min_zoom'], cabecalho['max_zoom']) == (0, 1)
+        assert leitor.metadata()['name'] == 'teste'
+        for (z, x, y), conteudo in tiles.items():
+            assert leitor.get(z, x, y) == conteudo
+        assert leitor.get(2, 0, 0) is None
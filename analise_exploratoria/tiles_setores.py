@@ -0,0 +1,558 @@
+"""
+Exportação da camada de setores censitários (com estimativas de resíduos) em
+vector tiles, num único arquivo estático.
+
+Os 16.831 setores não cabem num mapa como GeoJSON, por isso os mapas ficavam na
+escala municipal (um marcador ou o 'first' polígono por município). Aqui os
+setores são cortados em tiles MVT (Mapbox Vector Tile, extent 4096) por nível
+de zoom e gravados em:
+
+- PMTiles v3 (padrão): um arquivo só, lido por HTTP Range requests; funciona no
+  GitHub Pages e o navegador baixa só os tiles visíveis (protomaps-leaflet)
+- MBTiles (--formato mbtiles): SQLite, para servidores de tiles
+
+Cada setor leva o total municipal de resíduos (parametros.py) repartido pela
+população do setor, quando o GPKG tiver essa coluna, ou pela área. A densidade
+(t/ano/km²) é o atributo do coroplético.
+
+Em cada zoom a camada é simplificada com tolerância de ~1 pixel preservando as
+fronteiras (topologia.simplificar_cobertura); os tiles são gerados por um pool
+de processos (cada worker recebe as geometrias uma vez, no initializer), com
+tiles idênticos gravados uma única vez.
+
+Uso:
+    python tiles_setores.py                        # outputs/setores_residuos.pmtiles
+    python tiles_setores.py --formato mbtiles --zoom 8 13 --workers 4
+
+No mapa (Folium):
+    meta = ler_metadados('outputs/setores_residuos.pmtiles')
+    CamadaVetorial('setores_residuos.pmtiles', meta).add_to(m)
+"""
+import os
+import math
+import gzip
+import json
+import struct
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import shapely
+from jinja2 import Template
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from dissolucao import contexto_processos
+from piramide import tolerancia_zoom
+from topologia import simplificar_cobertura
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUTS_DIR = os.path.join(BASE_DIR, 'outputs')
+SETORES_PMTILES = os.path.join(OUTPUTS_DIR, 'setores_residuos.pmtiles')
+
+CAMADA = 'setores'
+EXTENT = 4096
+BUFFER = 64            # margem do recorte de cada tile (unidades do extent)
+ZOOM_PADRAO = (8, 14)  # acima do zoom máximo o mapa amplia os tiles do último nível
+TILES_POR_LOTE = 256
+COLUNAS_POPULACAO = ['v0001', 'V0001', 'populacao']  # população do setor, se existir no GPKG
+# Classes do coroplético: quantis da densidade e paleta YlOrRd (ColorBrewer)
+QUANTIS = [0.2, 0.4, 0.6, 0.8]
+CORES_DENSIDADE = ['#ffffb2', '#fecc5c', '#fd8d3c', '#f03b20', '#bd0026']
+
+ORIGEM_3857 = 20037508.342789244
+RAIO_TERRA = 6378137.0
+
+PROTOMAPS_JS = 'https://unpkg.com/protomaps-leaflet@5.0.0/dist/protomaps-leaflet.js'
+
+
+# ===== Estimativas por setor =====
+
+def estimativas_setores(setores, pop_df: pd.DataFrame, coluna_pop: str = None) -> pd.DataFrame:
+    """Reparte as estimativas municipais entre os setores (GeoDataFrame em EPSG:3857).
+
+    Peso de cada setor: população (coluna_pop) ou, sem ela, área. Retorna
+    domestico_t_ano, reciclavel_t_ano e densidade_t_km2 alinhados aos setores.
+    """
+    from parametros import adicionar_estimativas
+
+    # área real a partir da área Web Mercator (escala 1/cos² da latitude)
+    lat = np.arctan(np.sinh(setores.geometry.centroid.y.to_numpy() / RAIO_TERRA))
+    area_km2 = pd.Series(setores.geometry.area.to_numpy() * np.cos(lat) ** 2 / 1e6, index=setores.index)
+
+    cd_mun = setores['CD_MUN'].astype(str).str.zfill(7)
+    peso = setores[coluna_pop].astype(float).fillna(0) if coluna_pop else area_km2
+    total = peso.groupby(cd_mun).transform('sum')
+    parcela = (peso / total.where(total > 0)).fillna(0)
+
+    muni = adicionar_estimativas(pop_df[['codigo_ibge', 'populacao']].copy()).set_index('codigo_ibge')
+    resultado = pd.DataFrame(index=setores.index)
+    for col in ('domestico_t_ano', 'reciclavel_t_ano'):
+        resultado[col] = cd_mun.map(muni[col]) * parcela
+    resultado['densidade_t_km2'] = resultado['domestico_t_ano'] / area_km2.where(area_km2 > 0)
+    return resultado
+
+
+# ===== Codificação MVT (protobuf) =====
+
+def _varint(n: int, buf: bytearray):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) if n >= 0 else (-n << 1) - 1
+
+
+def _campo_varint(campo: int, valor: int, buf: bytearray):
+    _varint(campo << 3, buf)
+    _varint(valor, buf)
+
+
+def _campo_bytes(campo: int, dados: bytes, buf: bytearray):
+    _varint((campo << 3) | 2, buf)
+    _varint(len(dados), buf)
+    buf += dados
+
+
+def _compactado(valores) -> bytes:
+    buf = bytearray()
+    for v in valores:
+        _varint(int(v), buf)
+    return bytes(buf)
+
+
+def _geometria_mvt(aneis) -> list:
+    """Comandos MoveTo/LineTo/ClosePath com deltas em zigzag (cursor contínuo entre anéis)."""
+    comandos = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for anel in aneis:
+        deltas = np.diff(np.vstack([cursor, anel]), axis=0)
+        zz = ((deltas << 1) ^ (deltas >> 63)).tolist()
+        comandos += [(1 << 3) | 1, *zz[0], ((len(anel) - 1) << 3) | 2]
+        for par in zz[1:]:
+            comandos += par
+        comandos.append((1 << 3) | 7)
+        cursor = anel[-1]
+    return comandos
+
+
+def _aneis_tile(geom, x0: float, y0: float, escala: float) -> list:
+    """Anéis do polígono em coordenadas inteiras do tile (y para baixo), com a
+    orientação da especificação MVT: externo com área positiva, furos negativa."""
+    aneis = []
+    partes = shapely.get_parts(geom)
+    for poligono in partes[shapely.get_type_id(partes) == 3]:
+        for k, anel in enumerate(shapely.get_rings(poligono)):
+            c = shapely.get_coordinates(anel)[:-1]
+            t = np.rint(np.column_stack(((c[:, 0] - x0) * escala, (y0 - c[:, 1]) * escala))).astype(np.int64)
+            t = t[np.any(t != np.roll(t, 1, axis=0), axis=1)]  # vértices repetidos após o arredondamento
+            area = np.sum(t[:, 0] * np.roll(t[:, 1], -1) - np.roll(t[:, 0], -1) * t[:, 1]) if len(t) >= 3 else 0
+            if area == 0:
+                if k == 0:
+                    break  # anel externo degenerado: descarta o polígono inteiro
+                continue
+            if (area > 0) != (k == 0):
+                t = t[::-1]
+            aneis.append(t)
+    return aneis
+
+
+def _valor_mvt(v):
+    if isinstance(v, str):
+        return ('s', v)
+    if isinstance(v, (int, np.integer)):
+        return ('i', int(v))
+    return ('d', float(v))
+
+
+def codificar_tile(feicoes, nome: str = CAMADA, extent: int = EXTENT) -> bytes:
+    """Tile MVT com uma camada; feicoes = [(id, {propriedade: valor}, anéis do tile)]."""
+    chaves, valores = {}, {}
+    camada = bytearray()
+    _campo_varint(15, 2, camada)  # version
+    _campo_bytes(1, nome.encode('utf-8'), camada)
+    for fid, props, aneis in feicoes:
+        tags = []
+        for k, v in props.items():
+            if v is None or (isinstance(v, float) and math.isnan(v)):
+                continue
+            tags += [chaves.setdefault(k, len(chaves)), valores.setdefault(_valor_mvt(v), len(valores))]
+        feicao = bytearray()
+        _campo_varint(1, fid, feicao)
+        _campo_bytes(2, _compactado(tags), feicao)
+        _campo_varint(3, 3, feicao)  # POLYGON
+        _campo_bytes(4, _compactado(_geometria_mvt(aneis)), feicao)
+        _campo_bytes(2, bytes(feicao), camada)
+    for k in chaves:
+        _campo_bytes(3, k.encode('utf-8'), camada)
+    for tipo, v in valores:
+        valor = bytearray()
+        if tipo == 's':
+            _campo_bytes(1, v.encode('utf-8'), valor)
+        elif tipo == 'i':
+            _campo_varint(6, _zigzag(v), valor)  # sint_value
+        else:
+            valor.append((3 << 3) | 1)  # double_value
+            valor += struct.pack('<d', v)
+        _campo_bytes(4, bytes(valor), camada)
+    _campo_varint(5, extent, camada)
+    tile = bytearray()
+    _campo_bytes(3, bytes(camada), tile)
+    return bytes(tile)
+
+
+# ===== Grade de tiles =====
+
+def tamanho_tile(z: int) -> float:
+    return 2 * ORIGEM_3857 / (1 << z)
+
+
+def limites_tile(z: int, x: int, y: int):
+    t = tamanho_tile(z)
+    x0, y0 = -ORIGEM_3857 + x * t, ORIGEM_3857 - y * t
+    return x0, y0 - t, x0 + t, y0
+
+
+def tiles_ocupados(geoms, z: int):
+    """(x, y) dos tiles do zoom z que tocam alguma geometria (EPSG:3857)."""
+    t = tamanho_tile(z)
+    minx, miny, maxx, maxy = shapely.total_bounds(geoms)
+    n = (1 << z) - 1
+    xs = np.arange(max(0, int((minx + ORIGEM_3857) // t)), min(n, int((maxx + ORIGEM_3857) // t)) + 1)
+    ys = np.arange(max(0, int((ORIGEM_3857 - maxy) // t)), min(n, int((ORIGEM_3857 - miny) // t)) + 1)
+    gx, gy = (a.ravel() for a in np.meshgrid(xs, ys))
+    caixas = shapely.box(-ORIGEM_3857 + gx * t, ORIGEM_3857 - (gy + 1) * t,
+                         -ORIGEM_3857 + (gx + 1) * t, ORIGEM_3857 - gy * t)
+    ocupados = np.unique(shapely.STRtree(geoms).query(caixas, predicate='intersects')[0])
+    return list(zip(gx[ocupados].tolist(), gy[ocupados].tolist()))
+
+
+# ===== Pool de processos =====
+
+_CAMADAS = {}   # zoom -> (geometrias simplificadas, propriedades)
+_ARVORES = {}
+
+
+def _iniciar_worker(camadas):
+    global _CAMADAS
+    _CAMADAS = camadas
+
+
+def _gerar_lote(z: int, tiles):
+    """Codifica (e comprime) um lote de tiles do zoom z; roda nos workers."""
+    geoms, props = _CAMADAS[z]
+    if z not in _ARVORES:
+        _ARVORES[z] = shapely.STRtree(geoms)
+    arvore = _ARVORES[z]
+    t = tamanho_tile(z)
+    escala = EXTENT / t
+    margem = BUFFER / escala
+    resultado = []
+    for x, y in tiles:
+        minx, miny, maxx, maxy = limites_tile(z, x, y)
+        caixa = (minx - margem, miny - margem, maxx + margem, maxy + margem)
+        idx = np.sort(arvore.query(shapely.box(*caixa), predicate='intersects'))
+        feicoes = []
+        for i, geom in zip(idx, shapely.clip_by_rect(geoms[idx], *caixa)):
+            aneis = _aneis_tile(geom, minx, maxy, escala)
+            if aneis:
+                feicoes.append((int(i), props[i], aneis))
+        if feicoes:
+            resultado.append((z, x, y, gzip.compress(codificar_tile(feicoes), mtime=0)))
+    return resultado
+
+
+def gerar_tiles(geoms, props, zooms=ZOOM_PADRAO, workers: int = None):
+    """Dict {(z, x, y): tile MVT gzip} para a camada (geometrias em EPSG:3857)."""
+    geoms = np.asarray(geoms, dtype=object)
+    camadas, lotes = {}, []
+    for z in range(zooms[0], zooms[1] + 1):
+        camadas[z] = (simplificar_cobertura(geoms, tolerancia_zoom(z)), props)
+        tiles = tiles_ocupados(camadas[z][0], z)
+        lotes += [(z, tiles[i:i + TILES_POR_LOTE]) for i in range(0, len(tiles), TILES_POR_LOTE)]
+        print(f"   z{z}: {len(tiles):,} tiles")
+
+    tiles = {}
+    if not lotes:
+        return tiles
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_processos(),
+                             initializer=_iniciar_worker, initargs=(camadas,)) as pool:
+        for lote in pool.map(_gerar_lote, *zip(*lotes)):
+            for z, x, y, dados in lote:
+                tiles[(z, x, y)] = dados
+    return tiles
+
+
+# ===== PMTiles v3 =====
+
+def _girar(n: int, x: int, y: int, rx: int, ry: int):
+    if ry == 0:
+        if rx != 0:
+            x, y = n - 1 - x, n - 1 - y
+        return y, x
+    return x, y
+
+
+def tile_id(z: int, x: int, y: int) -> int:
+    """TileID do PMTiles: tiles dos zooms anteriores + posição na curva de Hilbert."""
+    acc = ((1 << (z * 2)) - 1) // 3
+    for a in range(z - 1, -1, -1):
+        s = 1 << a
+        rx, ry = s & x, s & y
+        acc += ((3 * rx) ^ ry) << a
+        x, y = _girar(s, x, y, rx, ry)
+    return acc
+
+
+def _diretorio(entradas) -> bytes:
+    """Serializa entradas (tile_id, offset, length, run_length) e comprime com gzip."""
+    buf = bytearray()
+    _varint(len(entradas), buf)
+    anterior = 0
+    for e in entradas:
+        _varint(e[0] - anterior, buf)
+        anterior = e[0]
+    for e in entradas:
+        _varint(e[3], buf)
+    for e in entradas:
+        _varint(e[2], buf)
+    for i, e in enumerate(entradas):
+        contiguo = i > 0 and e[1] == entradas[i - 1][1] + entradas[i - 1][2]
+        _varint(0 if contiguo else e[1] + 1, buf)
+    return gzip.compress(bytes(buf), mtime=0)
+
+
+def _diretorios(entradas):
+    """Diretório raiz (cabe nos primeiros 16 KB com o cabeçalho) e folhas, se preciso."""
+    raiz = _diretorio(entradas)
+    if len(raiz) <= 16384 - 127:
+        return raiz, b''
+    tamanho_folha = 4096
+    while True:
+        entradas_raiz, folhas = [], bytearray()
+        for i in range(0, len(entradas), tamanho_folha):
+            bloco = entradas[i:i + tamanho_folha]
+            folha = _diretorio(bloco)
+            entradas_raiz.append((bloco[0][0], len(folhas), len(folha), 0))
+            folhas += folha
+        raiz = _diretorio(entradas_raiz)
+        if len(raiz) <= 16384 - 127:
+            return raiz, bytes(folhas)
+        tamanho_folha *= 2
+
+
+def escrever_pmtiles(path: str, tiles: dict, metadados: dict, limites_4326):
+    """Grava o arquivo PMTiles v3 (tiles MVT gzip, diretórios gzip, tiles repetidos deduplicados)."""
+    entradas, dados, offsets = [], bytearray(), {}
+    for tid, tile in sorted((tile_id(*zxy), tile) for zxy, tile in tiles.items()):
+        if tile not in offsets:
+            offsets[tile] = len(dados)
+            dados += tile
+        offset = offsets[tile]
+        anterior = entradas[-1] if entradas else None
+        if anterior and anterior[1] == offset and anterior[0] + anterior[3] == tid:
+            entradas[-1] = (anterior[0], offset, len(tile), anterior[3] + 1)
+        else:
+            entradas.append((tid, offset, len(tile), 1))
+
+    raiz, folhas = _diretorios(entradas)
+    meta = gzip.compress(json.dumps(metadados, ensure_ascii=False).encode('utf-8'), mtime=0)
+    zooms = [z for z, _, _ in tiles]
+    minx, miny, maxx, maxy = limites_4326
+    e7 = lambda v: int(round(v * 1e7))
+    cabecalho = struct.pack(
+        '<7sB8Q3Q6B4iB2i', b'PMTiles', 3,
+        127, len(raiz), 127 + len(raiz), len(meta),
+        127 + len(raiz) + len(meta), len(folhas),
+        127 + len(raiz) + len(meta) + len(folhas), len(dados),
+        len(tiles), len(entradas), len(offsets),
+        1, 2, 2, 1,                     # clustered, gzip interno, tiles gzip, MVT
+        min(zooms), max(zooms),
+        e7(minx), e7(miny), e7(maxx), e7(maxy),
+        min(zooms), e7((minx + maxx) / 2), e7((miny + maxy) / 2),
+    )
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        for parte in (cabecalho, raiz, meta, folhas, dados):
+            f.write(parte)
+    os.replace(tmp, path)
+
+
+def escrever_mbtiles(path: str, tiles: dict, metadados: dict, limites_4326):
+    """Grava MBTiles (SQLite, linhas no esquema TMS, tiles MVT gzip)."""
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    zooms = [z for z, _, _ in tiles]
+    minx, miny, maxx, maxy = limites_4326
+    con = sqlite3.connect(tmp)
+    try:
+        con.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+        con.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)')
+        con.execute('CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)')
+        meta = {
+            'name': metadados['name'], 'format': 'pbf', 'minzoom': min(zooms), 'maxzoom': max(zooms),
+            'bounds': f'{minx},{miny},{maxx},{maxy}',
+            'center': f'{(minx + maxx) / 2},{(miny + maxy) / 2},{min(zooms)}',
+            'json': json.dumps({k: v for k, v in metadados.items() if k != 'name'}, ensure_ascii=False),
+        }
+        con.executemany('INSERT INTO metadata VALUES (?, ?)', [(k, str(v)) for k, v in meta.items()])
+        con.executemany('INSERT INTO tiles VALUES (?, ?, ?, ?)',
+                        [(z, x, (1 << z) - 1 - y, sqlite3.Binary(d)) for (z, x, y), d in sorted(tiles.items())])
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, path)
+
+
+def ler_metadados(path: str) -> dict:
+    """Metadados gravados por exportar_setores (PMTiles ou MBTiles)."""
+    if path.endswith('.mbtiles'):
+        con = sqlite3.connect(path)
+        try:
+            meta = dict(con.execute('SELECT name, value FROM metadata'))
+        finally:
+            con.close()
+        return dict(json.loads(meta.get('json', '{}')), name=meta.get('name'))
+    with open(path, 'rb') as f:
+        cabecalho = f.read(127)
+        if cabecalho[:7] != b'PMTiles':
+            raise ValueError(f'Arquivo não é PMTiles: {path}')
+        offset, tamanho = struct.unpack_from('<2Q', cabecalho, 24)
+        f.seek(offset)
+        return json.loads(gzip.decompress(f.read(tamanho)))
+
+
+# ===== Exportação =====
+
+def exportar_setores(saida: str = SETORES_PMTILES, zooms=ZOOM_PADRAO, workers: int = None) -> str:
+    from camada_setores import carregar_setores
+    from ibge_populacao import buscar_populacao
+
+    print("📦 Carregando setores...")
+    setores = carregar_setores()
+    coluna_pop = next((c for c in COLUNAS_POPULACAO if c in setores.columns), None)
+    setores = setores.to_crs(3857)
+    print(f"   ✓ {len(setores):,} setores (peso: {coluna_pop or 'área'})")
+
+    pop_df = buscar_populacao(uf='42')
+    if pop_df is None:
+        raise SystemExit("❌ Erro ao obter dados de população")
+    est = estimativas_setores(setores, pop_df, coluna_pop)
+
+    colunas = [c for c in ('CD_SETOR', 'CD_MUN', 'NM_MUN') if c in setores.columns]
+    atributos = pd.concat([setores[colunas].astype(str), est.round(2)], axis=1)
+    atributos = atributos.astype(object).where(atributos.notna(), None)
+    props = atributos.to_dict(orient='records')
+
+    print(f"🧱 Gerando tiles z{zooms[0]}-{zooms[1]}...")
+    tiles = gerar_tiles(setores.geometry.values, props, zooms, workers)
+
+    densidade = est['densidade_t_km2'].dropna()
+    metadados = {
+        'name': 'setores_residuos',
+        'format': 'pbf',
+        'description': 'Setores censitários de SC com estimativas de resíduos (t/ano)',
+        'vector_layers': [{
+            'id': CAMADA, 'minzoom': zooms[0], 'maxzoom': zooms[1],
+            'fields': {c: 'String' for c in colunas} | {c: 'Number' for c in est.columns},
+        }],
+        'classes_densidade': [round(float(v), 2) for v in densidade.quantile(QUANTIS)],
+    }
+    limites = setores.to_crs(4326).total_bounds
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    if saida.endswith('.mbtiles'):
+        escrever_mbtiles(saida, tiles, metadados, limites)
+    else:
+        escrever_pmtiles(saida, tiles, metadados, limites)
+    print(f"✅ {len(tiles):,} tiles salvos em: {saida} ({os.path.getsize(saida) / (1024 * 1024):.2f} MB)")
+    return saida
+
+
+# ===== Camada Folium =====
+
+class CamadaVetorial(JSCSSMixin, Layer):
+    """Coroplético dos setores a partir do PMTiles (protomaps-leaflet), com popup no clique.
+
+    url: caminho do .pmtiles relativo ao HTML; metadados: ler_metadados() do arquivo.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = protomapsL.leafletLayer({
+            url: {{ this.url|tojson }},
+            maxDataZoom: {{ this.max_data_zoom }},
+            paintRules: [{
+                dataLayer: {{ this.camada|tojson }},
+                symbolizer: new protomapsL.PolygonSymbolizer({
+                    fill: function(z, f) {
+                        var v = f ? f.props[{{ this.campo|tojson }}] : null;
+                        var limites = {{ this.limites|tojson }}, cores = {{ this.cores|tojson }};
+                        if (v === null || v === undefined) return '#cccccc';
+                        for (var i = 0; i < limites.length; i++) { if (v <= limites[i]) return cores[i]; }
+                        return cores[cores.length - 1];
+                    },
+                    opacity: {{ this.opacidade }},
+                    stroke: '#ffffff',
+                    width: 0.3
+                })
+            }],
+            labelRules: []
+        });
+        {%- if this.campos_popup %}
+        {{ this._parent.get_name() }}.on('click', function(e) {
+            if (!{{ this._parent.get_name() }}.hasLayer({{ this.get_name() }})) return;
+            var p = null;
+            {{ this.get_name() }}.queryTileFeaturesDebug(e.latlng.lng, e.latlng.lat).forEach(function(lista) {
+                lista.forEach(function(r) { if (!p && r.layerName === {{ this.camada|tojson }}) p = r.feature.props; });
+            });
+            if (!p) return;
+            var html = '<div style="font-family: Arial; font-size: 13px; min-width: 200px;">';
+            {{ this.campos_popup|tojson }}.forEach(function(c) {
+                var v = p[c[1]];
+                if (v !== null && v !== undefined && c[2] !== null) {
+                    v = Number(v).toLocaleString('en-US', {minimumFractionDigits: c[2], maximumFractionDigits: c[2]});
+                }
+                html += '<b>' + c[0] + ':</b> ' + (v === null || v === undefined ? '-' : v) + '<br>';
+            });
+            L.popup().setLatLng(e.latlng).setContent(html + '</div>').openOn({{ this._parent.get_name() }});
+        });
+        {%- endif %}
+        {% endmacro %}
+    """)
+
+    default_js = [('protomaps_leaflet', PROTOMAPS_JS)]
+
+    def __init__(self, url: str, metadados: dict, name: str = '🏘️ Setores - densidade (t/ano/km²)',
+                 campo: str = 'densidade_t_km2', cores=CORES_DENSIDADE, opacidade: float = 0.7,
+                 campos_popup=None, overlay: bool = True, show: bool = True):
+        super().__init__(name=name, overlay=overlay, show=show)
+        self._name = 'CamadaVetorial'
+        camada = metadados['vector_layers'][0]
+        self.url = url
+        self.camada = camada['id']
+        self.max_data_zoom = int(camada['maxzoom'])
+        self.campo = campo
+        self.limites = metadados.get('classes_densidade', [])
+        self.cores = list(cores)
+        self.opacidade = opacidade
+        self.campos_popup = campos_popup if campos_popup is not None else [
+            ['Município', 'NM_MUN', None],
+            ['Doméstico (t/ano)', 'domestico_t_ano', 1],
+            ['Reciclável (t/ano)', 'reciclavel_t_ano', 1],
+            ['Densidade (t/ano/km²)', 'densidade_t_km2', 1],
+        ]
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description="Exporta os setores com estimativas de resíduos em vector tiles")
+    p.add_argument('--saida', default=None, help="Arquivo de saída (padrão: outputs/setores_residuos.<formato>)")
+    p.add_argument('--formato', choices=['pmtiles', 'mbtiles'], default='pmtiles')
+    p.add_argument('--zoom', type=int, nargs=2, default=list(ZOOM_PADRAO), metavar=('MIN', 'MAX'))
+    p.add_argument('--workers', type=int, default=None, help="Processos (padrão: núcleos da CPU)")
+    args = p.parse_args()
+
+    saida = args.saida or os.path.join(OUTPUTS_DIR, f'setores_residuos.{args.formato}')
+    exportar_setores(saida, tuple(args.zoom), args.workers)
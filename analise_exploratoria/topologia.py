@@ -0,0 +1,160 @@
+"""
+Simplificação topológica de coberturas poligonais (bacias, Ottobacias).
+
+Simplificar cada polígono isoladamente (GeoSeries.simplify) trata a mesma
+fronteira duas vezes, uma por vizinho, com resultados diferentes: surgem frestas
+e sobreposições entre bacias. Aqui a fronteira compartilhada é simplificada UMA
+vez e reaproveitada pelos dois lados:
+
+- shapely >= 2.1 (GEOS >= 3.12) e cobertura válida -> shapely.coverage_simplify
+- caso contrário -> extração de arcos no estilo TopoJSON: os anéis são cortados
+  nos vértices de junção (onde três ou mais polígonos se encontram), cada arco
+  único é simplificado uma vez (Douglas-Peucker, extremidades fixas) e os
+  polígonos são remontados a partir dos arcos simplificados
+
+Em ambos os casos o resultado continua sendo uma cobertura sem frestas, que pode
+ser dissolvida depois com dissolucao.dissolver (coverage union).
+
+Uso:
+    from topologia import simplificar_cobertura
+    gdf['geometry'] = simplificar_cobertura(gdf.geometry.values, 500)  # CRS métrico
+"""
+import numpy as np
+import shapely
+from dissolucao import eh_cobertura_valida
+
+
+def simplificar_cobertura(geoms, tolerancia: float, simplificar_borda: bool = True) -> np.ndarray:
+    """Simplifica a cobertura preservando as fronteiras compartilhadas.
+
+    geoms:             array/GeoSeries de Polygon/MultiPolygon (CRS em metros)
+    tolerancia:        tolerância na unidade do CRS
+    simplificar_borda: também simplifica a borda externa da cobertura
+    """
+    arr = np.asarray(geoms, dtype=object)
+    if hasattr(shapely, 'coverage_simplify') and eh_cobertura_valida(arr):
+        try:
+            return shapely.coverage_simplify(arr, tolerancia, simplify_boundary=simplificar_borda)
+        except shapely.errors.GEOSException:
+            pass
+    return simplificar_por_arcos(arr, tolerancia, simplificar_borda)
+
+
+def _aneis(arr):
+    """Lista de (geometria, parte, anel, coords sem o ponto de fechamento)."""
+    aneis = []
+    for i, geom in enumerate(arr):
+        if geom is None or geom.is_empty:
+            continue
+        partes = shapely.get_parts(geom)
+        # só as partes poligonais (recortes podem deixar linhas/pontos soltos)
+        for j, poligono in enumerate(partes[shapely.get_type_id(partes) == 3]):
+            for k, anel in enumerate(shapely.get_rings(poligono)):
+                aneis.append((i, j, k, shapely.get_coordinates(anel)[:-1]))
+    return aneis
+
+
+def _juncoes(aneis):
+    """ids dos vértices de cada anel, máscara de junção por id e coordenadas de cada id."""
+    coords = np.concatenate([c for *_, c in aneis])
+    xy, ids = np.unique(coords, axis=0, return_inverse=True)
+    ids = ids.ravel()
+    tamanhos = np.array([len(c) for *_, c in aneis])
+    inicios = np.r_[0, np.cumsum(tamanhos)[:-1]]
+
+    # vizinhos anterior/seguinte dentro de cada anel (circular)
+    pos = np.arange(len(ids)) - np.repeat(inicios, tamanhos)
+    tam = np.repeat(tamanhos, tamanhos)
+    base = np.repeat(inicios, tamanhos)
+    anterior = ids[base + (pos - 1) % tam]
+    seguinte = ids[base + (pos + 1) % tam]
+    par = np.sort(np.column_stack([anterior, seguinte]), axis=1)
+
+    # junção: o vértice aparece com pares de vizinhos diferentes (a fronteira se divide ali)
+    distintos = np.unique(np.column_stack([ids, par]), axis=0)
+    juncao = np.bincount(distintos[:, 0], minlength=len(xy)) > 1
+    return np.split(ids, np.cumsum(tamanhos)[:-1]), juncao, xy
+
+
+def _arcos_do_anel(vids, juncao):
+    """Corta o anel (ids de vértices) nos pontos de junção; anel sem junção vira um arco fechado."""
+    cortes = np.flatnonzero(juncao[vids])
+    if len(cortes) == 0:
+        # arco fechado: começa no menor id para coincidir entre os dois lados
+        inicio = int(np.argmin(vids))
+        girado = np.r_[vids[inicio:], vids[:inicio]]
+        return [np.r_[girado, girado[:1]]]
+    girado = np.r_[vids[cortes[0]:], vids[:cortes[0]]]
+    cortes = cortes - cortes[0]
+    fim = np.r_[cortes[1:], len(girado)]
+    fechado = np.r_[girado, girado[:1]]
+    return [fechado[a:b + 1] for a, b in zip(cortes, fim)]
+
+
+def extrair_arcos(geoms):
+    """Topologia de arcos compartilhados (estilo TopoJSON) das partes poligonais de geoms.
+
+    Retorna (aneis, arcos, usos, referencias, xy):
+      aneis:       [(geometria, parte, anel, coords)] na ordem de _aneis
+      arcos:       ids de vértices de cada arco único (um arco e seu reverso são o mesmo)
+      usos:        quantos anéis usam cada arco (2 = fronteira entre vizinhos)
+      referencias: por anel, [(arco, invertido)] na ordem do anel
+      xy:          coordenadas de cada id de vértice
+    Retorna None se não houver anéis.
+    """
+    aneis = _aneis(np.asarray(geoms, dtype=object))
+    if not aneis:
+        return None
+    vertices_anel, juncao, xy = _juncoes(aneis)
+
+    indice, arcos, usos, referencias = {}, [], [], []
+    for vids in vertices_anel:
+        refs = []
+        for arco in _arcos_do_anel(vids, juncao):
+            direto, reverso = tuple(arco), tuple(arco[::-1])
+            chave = min(direto, reverso)
+            if chave not in indice:
+                indice[chave] = len(arcos)
+                arcos.append(np.array(chave))
+                usos.append(0)
+            a = indice[chave]
+            usos[a] += 1
+            refs.append((a, direto != chave))
+        referencias.append(refs)
+    return aneis, arcos, usos, referencias, xy
+
+
+def simplificar_por_arcos(geoms, tolerancia: float, simplificar_borda: bool = True) -> np.ndarray:
+    """Fallback sem coverage_simplify: topologia de arcos compartilhados (estilo TopoJSON)."""
+    arr = np.asarray(geoms, dtype=object)
+    topologia = extrair_arcos(arr)
+    if topologia is None:
+        return arr.copy()
+    aneis, arcos, usos, referencias, xy = topologia
+
+    # cada arco é simplificado uma única vez; extremidades (junções) ficam fixas
+    linhas = shapely.linestrings(xy[np.concatenate(arcos)],
+                                 indices=np.repeat(np.arange(len(arcos)), [len(a) for a in arcos]))
+    simplificar = np.array(usos) > 1 if not simplificar_borda else np.ones(len(arcos), dtype=bool)
+    linhas[simplificar] = shapely.simplify(linhas[simplificar], tolerancia, preserve_topology=False)
+    arcos_xy = [shapely.get_coordinates(linha) for linha in linhas]
+
+    # remonta anéis -> polígonos -> geometrias
+    partes = {}
+    for (i, j, k, original), refs in zip(aneis, referencias):
+        pedacos = [arcos_xy[a][::-1] if inv else arcos_xy[a] for a, inv in refs]
+        anel = np.concatenate([p[:-1] for p in pedacos] + [pedacos[-1][-1:]])
+        if len(anel) < 4:
+            anel = np.r_[original, original[:1]]  # anel pequeno demais: mantém o original
+        partes.setdefault(i, {}).setdefault(j, []).append(anel)
+
+    resultado = arr.copy()
+    for i, poligonos in partes.items():
+        polys = [shapely.Polygon(aneis_p[0], aneis_p[1:]) for _, aneis_p in sorted(poligonos.items())]
+        geom = polys[0] if len(polys) == 1 and arr[i].geom_type == 'Polygon' else shapely.MultiPolygon(polys)
+        if not geom.is_valid:
+            # autointerseção rara após simplificar: mantém só a parte poligonal
+            partes_validas = shapely.get_parts(shapely.make_valid(geom))
+            geom = shapely.union_all(partes_validas[np.isin(shapely.get_type_id(partes_validas), (3, 6))])
+        resultado[i] = geom
+    return resultado
@@ -0,0 +1,168 @@
+"""
+Agregação raster de registros de geradores de resíduos (lon, lat, kg, tipo).
+
+Desenhar cada gerador com ax.scatter deixa de funcionar depois de alguns
+milhares de pontos: o tempo do PNG cresce com o número de registros e os
+marcadores se sobrepõem. Aqui os registros são somados numa grade
+(Quantidade_kg por pixel), uma por tipo de resíduo, e o mapa desenha só as
+grades com imshow; o tempo de renderização depende do tamanho da grade, não
+do número de registros.
+
+- cada bloco de registros é convertido para EPSG:3857 e somado em todas as
+  grades numa única chamada de np.bincount (índice = tipo * pixels + pixel);
+- os blocos podem vir de um DataFrame ou de um cadastro CSV/Parquet lido
+  em partes (leitura_registros.ler_registros), sem carregar o arquivo inteiro;
+- os limites da grade podem ser informados ou calculados numa leitura
+  prévia só das colunas de coordenadas (limites_registros).
+
+Uso:
+    limites = limites_registros(ler_registros('registros.csv', ['Longitude', 'Latitude']))
+    grades, estatisticas, _ = agregar_blocos(ler_registros('registros.csv'), limites)
+    renderizar(grades, limites, 'mapas_residuos_por_tipo.png')
+"""
+import math
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import contextily as ctx
+from matplotlib.colors import LogNorm
+
+COLUNAS = ['Longitude', 'Latitude', 'Residuo', 'Quantidade_kg']
+LADO_GRADE = 800            # pixels no lado maior da grade
+TAMANHO_BLOCO = 1_000_000   # linhas por bloco na leitura do cadastro
+RAIO_TERRA = 6378137.0
+LAT_MAX = 85.05112878       # limite do Web Mercator
+
+
+def para_web_mercator(lon, lat):
+    """Longitude/latitude (graus) -> x, y em EPSG:3857, vetorizado."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.clip(np.asarray(lat, dtype=float), -LAT_MAX, LAT_MAX)
+    x = np.radians(lon) * RAIO_TERRA
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * RAIO_TERRA
+    return x, y
+
+
+def limites_registros(blocos, margem: float = 0.02):
+    """(xmin, ymin, xmax, ymax) em EPSG:3857 de todos os blocos, com margem relativa."""
+    xmin = ymin = math.inf
+    xmax = ymax = -math.inf
+    for bloco in blocos:
+        x, y = para_web_mercator(bloco['Longitude'], bloco['Latitude'])
+        validos = np.isfinite(x) & np.isfinite(y)
+        if validos.any():
+            xmin, xmax = min(xmin, x[validos].min()), max(xmax, x[validos].max())
+            ymin, ymax = min(ymin, y[validos].min()), max(ymax, y[validos].max())
+    if xmin > xmax:
+        raise ValueError('Nenhum registro com coordenadas válidas')
+    folga = max(xmax - xmin, ymax - ymin, 1.0) * margem
+    return (xmin - folga, ymin - folga, xmax + folga, ymax + folga)
+
+
+def forma_grade(limites, lado: int = LADO_GRADE):
+    """(altura, largura) em pixels quadrados, com 'lado' pixels na maior dimensão."""
+    xmin, ymin, xmax, ymax = limites
+    resolucao = max(xmax - xmin, ymax - ymin) / lado
+    return (max(1, math.ceil((ymax - ymin) / resolucao)),
+            max(1, math.ceil((xmax - xmin) / resolucao)))
+
+
+def agregar_blocos(blocos, limites, lado: int = LADO_GRADE, coluna_area: str = None):
+    """Soma Quantidade_kg por pixel e por tipo de resíduo, bloco a bloco.
+
+    Retorna (grades, estatisticas, por_area): grades = {residuo: matriz
+    (altura, largura)} com a linha 0 no norte; estatisticas = DataFrame por
+    Residuo com sum, mean e count dos registros dentro dos limites (registros
+    sem coordenadas ou fora dos limites são ignorados); por_area = kg por área
+    (linhas) e Residuo (colunas) se coluna_area for dada (ver
+    leitura_registros.com_area), senão None.
+    """
+    xmin, ymin, xmax, ymax = limites
+    altura, largura = forma_grade(limites, lado)
+    pixels = altura * largura
+    tipos = []
+    acumulado = np.zeros((0, pixels))
+    contagem = np.zeros(0, dtype=np.int64)
+    por_area = None
+
+    for bloco in blocos:
+        x, y = para_web_mercator(bloco['Longitude'], bloco['Latitude'])
+        kg = pd.to_numeric(bloco['Quantidade_kg'], errors='coerce').to_numpy(dtype=float)
+        if coluna_area:
+            parcial = (pd.DataFrame({'area': bloco[coluna_area].to_numpy(), 'Residuo': bloco['Residuo'].to_numpy(),
+                                     'kg': kg})
+                       .dropna().groupby(['area', 'Residuo'])['kg'].sum())
+            por_area = parcial if por_area is None else por_area.add(parcial, fill_value=0)
+        dentro = (x >= xmin) & (x < xmax) & (y > ymin) & (y <= ymax) & np.isfinite(kg)
+        residuo = bloco['Residuo'].to_numpy()[dentro]
+        novos = [t for t in pd.unique(residuo) if t not in tipos and pd.notna(t)]
+        if novos:
+            tipos.extend(novos)
+            acumulado = np.vstack([acumulado, np.zeros((len(novos), pixels))])
+            contagem = np.concatenate([contagem, np.zeros(len(novos), dtype=np.int64)])
+        codigo = pd.Categorical(residuo, categories=tipos).codes
+        com_tipo = codigo >= 0
+        codigo = codigo[com_tipo].astype(np.int64)
+
+        col = ((x[dentro][com_tipo] - xmin) * largura / (xmax - xmin)).astype(np.int64)
+        lin = ((ymax - y[dentro][com_tipo]) * altura / (ymax - ymin)).astype(np.int64)
+        pixel = np.minimum(lin, altura - 1) * largura + np.minimum(col, largura - 1)
+        acumulado += np.bincount(codigo * pixels + pixel, weights=kg[dentro][com_tipo],
+                                 minlength=len(tipos) * pixels).reshape(len(tipos), pixels)
+        contagem += np.bincount(codigo, minlength=len(tipos))
+
+    grades = {t: acumulado[i].reshape(altura, largura) for i, t in enumerate(tipos)}
+    soma = acumulado.sum(axis=1)
+    estatisticas = pd.DataFrame({
+        'sum': soma,
+        'mean': soma / np.maximum(contagem, 1),
+        'count': contagem,
+    }, index=pd.Index(tipos, name='Residuo')).sort_index().round(2)
+    if coluna_area:
+        por_area = por_area.unstack('Residuo', fill_value=0) if por_area is not None else pd.DataFrame()
+        por_area.index.name = coluna_area
+    return grades, estatisticas, por_area
+
+
+def renderizar(grades: dict, limites, arquivo: str, titulo: str = 'Mapas de Calor - Geração de Resíduos por Tipo',
+               cmap: str = 'YlOrRd', dpi: int = 300):
+    """Um painel por tipo com a grade (imshow, escala log) sobre o mapa de fundo; salva em 'arquivo'."""
+    xmin, ymin, xmax, ymax = limites
+    tipos = sorted(grades)
+    linhas = max(1, math.ceil(len(tipos) / 2))
+    fig, axes = plt.subplots(linhas, 2, figsize=(20, 7.5 * linhas))
+    axes = np.atleast_1d(axes).flatten()
+
+    for ax, residuo in zip(axes, tipos):
+        grade = grades[residuo]
+        valores = np.ma.masked_less_equal(grade, 0)  # pixel vazio fica transparente
+        if valores.count():
+            imagem = ax.imshow(
+                valores,
+                extent=(xmin, xmax, ymin, ymax),
+                origin='upper',
+                cmap=cmap,
+                norm=LogNorm(vmin=valores.min(), vmax=max(valores.max(), valores.min() * 1.0001)),
+                alpha=0.8,
+                interpolation='nearest',
+                zorder=2,
+            )
+            plt.colorbar(imagem, ax=ax, label='Quantidade (kg por pixel)')
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+
+        # Adicionar mapa de fundo
+        ctx.add_basemap(ax, crs='EPSG:3857', source=ctx.providers.CartoDB.Positron)
+
+        ax.set_title(f'Geração de {residuo}\n(Total: {grade.sum():,.0f} kg)',
+                     fontsize=14, fontweight='bold')
+        ax.axis('off')
+
+    # Ocultar eixos vazios se houver
+    for ax in axes[len(tipos):]:
+        ax.axis('off')
+
+    plt.suptitle(titulo, fontsize=18, fontweight='bold', y=0.95)
+    plt.tight_layout()
+    plt.savefig(arquivo, dpi=dpi, bbox_inches='tight')
+    return fig
@@ -0,0 +1,80 @@
+"""
+Leitura em blocos dos cadastros de geradores de resíduos (CSV ou Parquet).
+
+Os cadastros reais têm milhões de linhas (Longitude, Latitude, Residuo,
+Quantidade_kg, ...). Aqui o arquivo nunca é carregado inteiro: ele é lido em
+blocos de até TAMANHO_BLOCO linhas, só com as colunas necessárias, e cada
+bloco passa pelas etapas e é descartado.
+
+- ler_registros: blocos de um CSV (pandas chunksize) ou Parquet (pyarrow,
+  por lotes de registros);
+- pontos: coordenadas do bloco -> GeoSeries em EPSG:4326 (points_from_xy);
+- com_area: acrescenta ao bloco a área (setor, município) em que cada ponto
+  cai, com o índice espacial das áreas;
+- limites_areas: limites da grade a partir das áreas, sem percorrer o arquivo.
+
+Os blocos alimentam agregacao_raster.agregar_blocos, que soma as grades por
+tipo, a tabela por Residuo e, se os blocos tiverem a coluna da área, os
+totais por área.
+
+Uso:
+    areas = gpd.read_file('municipios.shp')
+    blocos = com_area(ler_registros('cadastro.parquet'), areas, 'NM_MUN')
+    grades, estatisticas, por_area = agregar_blocos(blocos, limites_areas(areas), coluna_area='NM_MUN')
+"""
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from agregacao_raster import COLUNAS, TAMANHO_BLOCO, para_web_mercator
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet fica indisponível; CSV continua funcionando
+    pq = None
+
+
+def ler_registros(caminho: str, colunas=None, tamanho_bloco: int = TAMANHO_BLOCO):
+    """Blocos (DataFrames) do cadastro, CSV ou Parquet conforme a extensão."""
+    colunas = list(colunas or COLUNAS)
+    if os.path.splitext(caminho)[1].lower() in ('.parquet', '.pq'):
+        if pq is None:
+            raise ImportError('Leitura de Parquet requer pyarrow (pip install pyarrow)')
+        arquivo = pq.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, usecols=colunas, chunksize=tamanho_bloco)
+
+
+def pontos(bloco: pd.DataFrame) -> gpd.GeoSeries:
+    """Pontos do bloco em EPSG:4326, vetorizados (mesmo índice do bloco)."""
+    return gpd.GeoSeries(gpd.points_from_xy(bloco['Longitude'], bloco['Latitude']),
+                         index=bloco.index, crs='EPSG:4326')
+
+
+def com_area(blocos, areas: gpd.GeoDataFrame, coluna: str):
+    """Repassa os blocos com a coluna 'coluna' da área que contém cada ponto (NaN fora das áreas).
+
+    Ponto sobre a divisa de duas áreas fica com a primeira delas na ordem de 'areas'.
+    """
+    areas = areas.to_crs('EPSG:4326')[[coluna, areas.geometry.name]].reset_index(drop=True)
+    indice = areas.sindex
+    for bloco in blocos:
+        geoms = pontos(bloco)
+        # 'intersects' inclui a borda (com 'within' o ponto na divisa ficaria sem área)
+        idx_pontos, idx_areas = indice.query(geoms.values, predicate='intersects')
+        ordem = np.lexsort((idx_areas, idx_pontos))
+        idx_pontos, idx_areas = idx_pontos[ordem], idx_areas[ordem]
+        primeiro = np.unique(idx_pontos, return_index=True)[1]
+        valores = np.full(len(bloco), np.nan, dtype=object)
+        valores[idx_pontos[primeiro]] = areas[coluna].to_numpy()[idx_areas[primeiro]]
+        yield bloco.assign(**{coluna: valores})
+
+
+def limites_areas(areas: gpd.GeoDataFrame, margem: float = 0.02):
+    """(xmin, ymin, xmax, ymax) em EPSG:3857 das áreas, com margem relativa."""
+    lon0, lat0, lon1, lat1 = areas.to_crs('EPSG:4326').total_bounds
+    (xmin, xmax), (ymin, ymax) = para_web_mercator([lon0, lon1], [lat0, lat1])
+    folga = max(xmax - xmin, ymax - ymin, 1.0) * margem
+    return (xmin - folga, ymin - folga, xmax + folga, ymax + folga)
@@ -2,8 +2,14 @@ import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
 import contextily as ctx
-from shapely.geometry import Point
 import numpy as np
+import argparse
+from agregacao_raster import agregar_blocos, limites_registros, renderizar, TAMANHO_BLOCO
+from leitura_registros import ler_registros, pontos, com_area, limites_areas
+
+# Acima deste número de registros os pontos são somados numa grade por tipo
+# (agregacao_raster.py) em vez de desenhados um a um com scatter
+LIMITE_SCATTER = 5000
 
 # Criar dados de exemplo
 def criar_dados_exemplo():
@@ -20,67 +26,111 @@ def criar_dados_exemplo():
     }
     return pd.DataFrame(data)
 
-# Criar GeoDataFrame
-df = criar_dados_exemplo()
-geometry = [Point(xy) for xy in zip(df.Longitude, df.Latitude)]
-gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
-
-# Converter para Web Mercator para usar com contextily
-gdf = gdf.to_crs(epsg=3857)
-
-print("Dados carregados com sucesso!")
-print(f"Total de pontos: {len(gdf)}")
-print(f"Tipos de resíduos: {gdf['Residuo'].unique()}")
-
-# AGORA o código avançado (após a definição do gdf)
-
-# Criar subplots para cada tipo de resíduo
-fig, axes = plt.subplots(2, 2, figsize=(20, 15))
-axes = axes.flatten()
-
-tipos_residuos = gdf['Residuo'].unique()
-
-for i, residuo in enumerate(tipos_residuos):
-    if i < len(axes):
-        ax = axes[i]
-        dados_residuo = gdf[gdf['Residuo'] == residuo]
-        
-        if not dados_residuo.empty:
-            # Plotar pontos com tamanho proporcional à quantidade
-            scatter = ax.scatter(
-                dados_residuo.geometry.x,
-                dados_residuo.geometry.y,
-                c=dados_residuo['Quantidade_kg'],
-                s=dados_residuo['Quantidade_kg'] * 3,
-                cmap='YlOrRd',
-                alpha=0.7,
-                edgecolors='black',
-                linewidth=0.5
-            )
-            
-            # Adicionar mapa de fundo
-            ctx.add_basemap(ax, crs=gdf.crs, source=ctx.providers.CartoDB.Positron)
-            
-            # Configurações
-            ax.set_title(f'Geração de {residuo}\n(Total: {dados_residuo["Quantidade_kg"].sum()} kg)', 
-                        fontsize=14, fontweight='bold')
-            ax.axis('off')
-            
-            # Adicionar barra de cores
-            plt.colorbar(scatter, ax=ax, label='Quantidade (kg)')
-
-# Ocultar eixos vazios se houver
-for i in range(len(tipos_residuos), len(axes)):
-    axes[i].axis('off')
-
-# Ajustar layout
-plt.suptitle('Mapas de Calor - Geração de Resíduos por Tipo', 
-             fontsize=18, fontweight='bold', y=0.95)
-plt.tight_layout()
-plt.savefig('mapas_residuos_por_tipo.png', dpi=300, bbox_inches='tight')
-plt.show()
+# Cadastro real (CSV ou Parquet) lido em blocos e agregado direto nas grades e
+# tabelas, sem carregar o arquivo inteiro; sem cadastro, usa os dados de exemplo
+parser = argparse.ArgumentParser(description='Mapas de calor da geração de resíduos por tipo')
+parser.add_argument('cadastro', nargs='?',
+                    help='CSV ou Parquet com Longitude, Latitude, Residuo e Quantidade_kg')
+parser.add_argument('--areas', help='setores ou municípios (shapefile, GeoPackage...) para os totais por área')
+parser.add_argument('--coluna-area',
+                    help='coluna da área: nas --areas (padrão NM_MUN) ou já presente no cadastro')
+parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help='linhas lidas por vez')
+args = parser.parse_args()
+arquivo = args.cadastro
+por_area = None
+
+if arquivo:
+    coluna_area = args.coluna_area or ('NM_MUN' if args.areas else None)
+    if args.areas:
+        # Área de cada ponto pelo índice espacial; a grade cobre as áreas (sem leitura prévia)
+        areas = gpd.read_file(args.areas)
+        limites = limites_areas(areas)
+        blocos = com_area(ler_registros(arquivo, tamanho_bloco=args.bloco), areas, coluna_area)
+    else:
+        limites = limites_registros(ler_registros(arquivo, ['Longitude', 'Latitude'], args.bloco))
+        colunas = ['Longitude', 'Latitude', 'Residuo', 'Quantidade_kg'] + ([coluna_area] if coluna_area else [])
+        blocos = ler_registros(arquivo, colunas, args.bloco)
+    grades, estatisticas, por_area = agregar_blocos(blocos, limites, coluna_area=coluna_area)
+    print("Dados carregados com sucesso!")
+    print(f"Total de pontos: {estatisticas['count'].sum()}")
+    print(f"Tipos de resíduos: {list(grades)}")
+else:
+    # Criar GeoDataFrame
+    df = criar_dados_exemplo()
+    gdf = gpd.GeoDataFrame(df, geometry=pontos(df), crs="EPSG:4326")
+
+    # Converter para Web Mercator para usar com contextily
+    gdf = gdf.to_crs(epsg=3857)
+
+    print("Dados carregados com sucesso!")
+    print(f"Total de pontos: {len(gdf)}")
+    print(f"Tipos de resíduos: {gdf['Residuo'].unique()}")
+
+# Muitos registros: uma grade por tipo desenhada com imshow
+if arquivo or len(gdf) > LIMITE_SCATTER:
+    if not arquivo:
+        limites = limites_registros([df])
+        grades, estatisticas, _ = agregar_blocos([df], limites)
+    renderizar(grades, limites, 'mapas_residuos_por_tipo.png')
+    plt.show()
+else:
+    # Criar subplots para cada tipo de resíduo
+    fig, axes = plt.subplots(2, 2, figsize=(20, 15))
+    axes = axes.flatten()
+
+    tipos_residuos = gdf['Residuo'].unique()
+
+    for i, residuo in enumerate(tipos_residuos):
+        if i < len(axes):
+            ax = axes[i]
+            dados_residuo = gdf[gdf['Residuo'] == residuo]
+
+            if not dados_residuo.empty:
+                # Plotar pontos com tamanho proporcional à quantidade
+                scatter = ax.scatter(
+                    dados_residuo.geometry.x,
+                    dados_residuo.geometry.y,
+                    c=dados_residuo['Quantidade_kg'],
+                    s=dados_residuo['Quantidade_kg'] * 3,
+                    cmap='YlOrRd',
+                    alpha=0.7,
+                    edgecolors='black',
+                    linewidth=0.5
+                )
+
+                # Adicionar mapa de fundo
+                ctx.add_basemap(ax, crs=gdf.crs, source=ctx.providers.CartoDB.Positron)
+
+                # Configurações
+                ax.set_title(f'Geração de {residuo}\n(Total: {dados_residuo["Quantidade_kg"].sum()} kg)', 
+                            fontsize=14, fontweight='bold')
+                ax.axis('off')
+
+                # Adicionar barra de cores
+                plt.colorbar(scatter, ax=ax, label='Quantidade (kg)')
+
+    # Ocultar eixos vazios se houver
+    for i in range(len(tipos_residuos), len(axes)):
+        axes[i].axis('off')
+
+    # Ajustar layout
+    plt.suptitle('Mapas de Calor - Geração de Resíduos por Tipo', 
+                 fontsize=18, fontweight='bold', y=0.95)
+    plt.tight_layout()
+    plt.savefig('mapas_residuos_por_tipo.png', dpi=300, bbox_inches='tight')
+    plt.show()
 
 # Estatísticas básicas
 print("\n📊 Estatísticas de Geração de Resíduos:")
-estatisticas = gdf.groupby('Residuo')['Quantidade_kg'].agg(['sum', 'mean', 'count']).round(2)
-print(estatisticas)
\ No newline at end of file
+if not arquivo and len(gdf) <= LIMITE_SCATTER:
+    estatisticas = gdf.groupby('Residuo')['Quantidade_kg'].agg(['sum', 'mean', 'count']).round(2)
+print(estatisticas)
+
+# Totais por setor/município (kg por tipo de resíduo)
+if por_area is not None:
+    por_area['Total'] = por_area.sum(axis=1)
+    por_area = por_area.sort_values('Total', ascending=False)
+    por_area.round(2).to_csv('residuos_por_area.csv')
+    print(f"\n🗺️ Geração por área ({len(por_area)} áreas, 10 maiores):")
+    print(por_area.head(10).round(2))
+    print("💾 Tabela completa em residuos_por_area.csv")
\ No newline at end of file